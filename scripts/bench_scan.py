@@ -0,0 +1,169 @@
+"""
+Discovery scanner benchmark: pathlib rglob versus the os.scandir walker.
+
+Generates a command tree of the requested size together with the clutter a
+real monorepo package carries (a __pycache__ next to every module directory,
+a tests/ tree, a vendored library and a hidden .git-style directory), then
+times in-process scans of it:
+
+  rglob           the original pkg_dir.rglob("*.py") scanner
+  scandir         autocli._scan.scan_package
+  scandir_ignore  scan_package with --ignore patterns (default: tests, vendor)
+  scandir_dirs    scan_package also recording directory mtimes (cache miss)
+
+Both scanners are checked to return the same modules before timing.
+
+Usage:
+    python scripts/bench_scan.py --sizes 1000 8000 --output bench_scan.json
+"""
+
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Callable, Dict, List
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR.parent / "src"))
+
+from autocli._scan import scan_package  # noqa: E402
+from autocli.tree import CommandEntry  # noqa: E402
+
+DEFAULT_SIZES = (1000, 8000)
+
+# Commands per directory
+FANOUT = 10
+
+
+def rglob_scan(pkg_dir: Path, pkg_name: str) -> List[CommandEntry]:
+    """The pathlib scanner scan_package replaced, for comparison."""
+    found_modules = []
+    for file_path in pkg_dir.rglob("*.py"):
+        relative_path = file_path.relative_to(pkg_dir)
+        if relative_path.name == "__init__.py":
+            continue
+        if relative_path.as_posix() == "_autocli_index.py":
+            continue
+        cmd_path_str = relative_path.with_suffix("").as_posix()
+        found_modules.append(
+            CommandEntry(
+                cmd_path_str.replace("/", "__").split("__"),
+                f"{pkg_name}.{cmd_path_str.replace('/', '.')}",
+                relative_path.as_posix(),
+            )
+        )
+    return found_modules
+
+
+def generate_tree(root: Path, count: int) -> Path:
+    """Writes count command files plus typical clutter and returns the package dir."""
+    pkg_dir = root / f"commands_{count}"
+    for i in range(count):
+        group, sub, cmd = i // (FANOUT * FANOUT), (i // FANOUT) % FANOUT, i % FANOUT
+        directory = pkg_dir / f"g{group}" / f"s{sub}"
+        if not directory.exists():
+            directory.mkdir(parents=True)
+            (directory / "__init__.py").write_text("")
+            (directory.parent / "__init__.py").write_text("")
+            (directory / "__pycache__").mkdir()
+        (directory / f"c{cmd}.py").write_text("")
+        (directory / "__pycache__" / f"c{cmd}.cpython-311.pyc").write_text("")
+
+    # Clutter: roughly a quarter of the tree each for tests and vendored code,
+    # and a hidden directory full of non-Python files
+    clutter = max(count // 4, 1)
+    for name in ("tests", "vendor"):
+        for i in range(clutter):
+            directory = pkg_dir / name / f"d{i // FANOUT}"
+            directory.mkdir(parents=True, exist_ok=True)
+            (directory / f"m{i}.py").write_text("")
+    hidden = pkg_dir / ".git" / "objects"
+    hidden.mkdir(parents=True)
+    for i in range(clutter):
+        (hidden / f"obj{i}").write_text("")
+    (pkg_dir / "__init__.py").write_text("")
+    return pkg_dir
+
+
+def time_scan(scan: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        scan()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": statistics.median(samples), "min_ms": min(samples)}
+
+
+def bench_tree(pkg_dir: Path, ignore: List[str], repeat: int) -> Dict[str, Any]:
+    name = pkg_dir.name
+    # Parity excludes pruned directories, which rglob lists and scandir skips
+    expected = [
+        m for m in rglob_scan(pkg_dir, name) if not m.path.startswith(".")
+    ]
+    if scan_package(pkg_dir, name) != expected:
+        raise RuntimeError(f"Scanners disagree on {pkg_dir}")
+
+    return {
+        "modules": len(expected),
+        "modules_ignored": len(scan_package(pkg_dir, name, ignore)),
+        "rglob": time_scan(lambda: rglob_scan(pkg_dir, name), repeat),
+        "scandir": time_scan(lambda: scan_package(pkg_dir, name), repeat),
+        "scandir_ignore": time_scan(lambda: scan_package(pkg_dir, name, ignore), repeat),
+        "scandir_dirs": time_scan(
+            lambda: scan_package(pkg_dir, name, ignore, dirs={}), repeat
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+        help="Number of command files per generated tree.",
+    )
+    parser.add_argument(
+        "--ignore", nargs="*", default=["tests", "vendor"],
+        help="Ignore patterns for the scandir_ignore scenario.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=7, help="Scans per scenario (median reported).",
+    )
+    parser.add_argument(
+        "--output", default="bench_scan.json", help="Where to write the JSON results.",
+    )
+    args = parser.parse_args()
+
+    results = []
+    with TemporaryDirectory(prefix="autocli-bench-scan-") as tmp:
+        for size in args.sizes:
+            print(f"Scanning a tree with {size} commands...", file=sys.stderr)
+            pkg_dir = generate_tree(Path(tmp), size)
+            results.append({"commands": size, **bench_tree(pkg_dir, args.ignore, args.repeat)})
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "repeat": args.repeat,
+        "ignore": args.ignore,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    scenarios = ["rglob", "scandir", "scandir_ignore", "scandir_dirs"]
+    print(f"{'commands':>9}" + "".join(f"{s:>16}" for s in scenarios))
+    for entry in results:
+        row = f"{entry['commands']:>9}"
+        for scenario in scenarios:
+            row += f"{entry[scenario]['median_ms']:>14.1f}ms"
+        print(row)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Command tree benchmark: memory and lookup cost of autocli.tree versus dicts.
+
+Builds the discovery result for a synthetic package of the requested size
+(three levels deep, ten names per level, like bench_scan.py) in two shapes:
+
+  dicts  what discovery used before autocli.tree: one dict per module plus
+         the nested {"modules": [...], "children": {...}} tree built from them
+  tree   CommandEntry objects in a CommandTree
+
+and reports the memory each one allocates (tracemalloc; the strings both
+shapes share are created beforehand and not counted), how long building it
+takes and how long resolving one argv prefix takes.
+
+Usage:
+    python scripts/bench_tree.py --sizes 1000 10000 --output bench_tree.json
+"""
+
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR.parent / "src"))
+
+from autocli.tree import CommandEntry, CommandTree  # noqa: E402
+
+DEFAULT_SIZES = (1000, 10000)
+
+# Names per level
+FANOUT = 10
+
+SHAPES = ["dicts", "tree"]
+
+Raw = Tuple[List[str], str, str]
+
+
+def raw_modules(count: int) -> List[Raw]:
+    """The command parts, import name and path of count synthetic modules."""
+    modules = []
+    for i in range(count):
+        parts = [f"g{i // (FANOUT * FANOUT)}", f"s{(i // FANOUT) % FANOUT}", f"c{i % FANOUT}"]
+        modules.append((parts, "commands." + ".".join(parts), "/".join(parts) + ".py"))
+    return modules
+
+
+def build_dicts(modules: List[Raw]) -> Any:
+    found_modules = [
+        {
+            "command_parts": list(parts),
+            "import_name": import_name,
+            "path": path,
+            "valid": None,
+            "help": None,
+            "options": None,
+        }
+        for parts, import_name, path in modules
+    ]
+    root: Dict[str, Any] = {"modules": [], "children": {}}
+    for mod_info in found_modules:
+        node = root
+        for part in mod_info["command_parts"]:
+            node = node["children"].setdefault(part, {"modules": [], "children": {}})
+        node["modules"].append(mod_info)
+    return found_modules, root
+
+
+def lookup_dicts(built: Any, argv: List[str]) -> Any:
+    node = built[1]
+    for word in argv:
+        child = node["children"].get(word)
+        if child is None:
+            break
+        node = child
+    return node
+
+
+def build_tree(modules: List[Raw]) -> CommandTree:
+    return CommandTree(
+        CommandEntry(parts, import_name, path) for parts, import_name, path in modules
+    )
+
+
+def lookup_tree(built: CommandTree, argv: List[str]) -> Any:
+    return built.lookup(argv)[0]
+
+
+def measure_memory(build: Callable[[List[Raw]], Any], modules: List[Raw]) -> int:
+    tracemalloc.start()
+    try:
+        built = build(modules)
+        size, _peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del built
+    return size
+
+
+def time_call(call: Callable[[], Any], repeat: int, number: int = 1) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        samples.append((time.perf_counter() - start) / number)
+    return statistics.median(samples)
+
+
+def bench_size(count: int, repeat: int) -> Dict[str, Any]:
+    modules = raw_modules(count)
+    argv = modules[-1][0] + ["--name", "x"]
+    builders = {"dicts": (build_dicts, lookup_dicts), "tree": (build_tree, lookup_tree)}
+
+    results = {}
+    for shape in SHAPES:
+        build, lookup = builders[shape]
+        memory = measure_memory(build, modules)
+        built = build(modules)
+        results[shape] = {
+            "memory_bytes": memory,
+            "bytes_per_command": memory / count,
+            "build_ms": time_call(lambda: build(modules), repeat) * 1000,
+            "lookup_us": time_call(lambda: lookup(built, argv), repeat, 1000) * 1e6,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+        help="Number of commands per generated tree.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=7, help="Runs per measurement (median reported).",
+    )
+    parser.add_argument(
+        "--output", default="bench_tree.json", help="Where to write the JSON results.",
+    )
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        print(f"Building trees of {size} commands...", file=sys.stderr)
+        results.append({"commands": size, "shapes": bench_size(size, args.repeat)})
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'commands':>9} {'shape':>6} {'memory':>10} {'per cmd':>9} {'build':>10} {'lookup':>9}")
+    for entry in results:
+        for shape in SHAPES:
+            row = entry["shapes"][shape]
+            print(
+                f"{entry['commands']:>9} {shape:>6} {row['memory_bytes'] / 1024:>8.0f}KB"
+                f" {row['bytes_per_command']:>8.0f}B {row['build_ms']:>8.1f}ms"
+                f" {row['lookup_us']:>7.2f}us"
+            )
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Startup benchmark: command package as a directory versus inside a zipapp.
+
+Generates the synthetic apps of benchmark.py and times fresh interpreter runs
+dispatching one command, with the commands package:
+
+  dir             as a directory (bytecode in __pycache__)
+  dir_lazy        as a directory, lazy=True with a warm discovery manifest
+  zipapp          inside a .pyz built with zipapp (legacy .pyc next to each
+                  module, since zipimport cannot write bytecode caches)
+  zipapp_lazy     the same archive with lazy=True
+  zipapp_index    lazy=True from an archive that also contains the generated
+                  _autocli_index, so discovery never lists the archive
+
+Each run also counts the stat-family syscalls the interpreter made when
+strace is available, since that is what a network filesystem pays for.
+
+Usage:
+    python scripts/bench_zipapp.py --sizes 100 1000 --output bench_zipapp.json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import zipapp
+import argparse
+import platform
+import compileall
+import subprocess
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Dict, List, Optional
+
+from benchmark import SRC_DIR, command_paths_argv, generate_app, summarize
+
+DEFAULT_SIZES = (100, 1000)
+
+SCENARIOS = ["dir", "dir_lazy", "zipapp", "zipapp_lazy", "zipapp_index"]
+
+STAT_CALLS = re.compile(
+    r"^(?:\[pid\s+\d+\]\s+)?(?:stat|lstat|fstat|newfstatat|statx|openat)\(", re.M
+)
+
+
+def build_zipapp(app_dir: Path, target: Path, index: bool) -> Path:
+    """Copies the app, compiles it to legacy .pyc files and zips it."""
+    staging = target.with_name(f"{target.stem}_staging")
+    shutil.copytree(
+        app_dir, staging, ignore=shutil.ignore_patterns("__pycache__", "*.json")
+    )
+    if index:
+        subprocess.run(
+            [sys.executable, "-m", "autocli", "build-index", "commands"],
+            cwd=str(staging),
+            env=dict(os.environ, PYTHONPATH=str(SRC_DIR)),
+            check=True,
+            capture_output=True,
+        )
+    compileall.compile_dir(str(staging), quiet=1, legacy=True)
+    zipapp.create_archive(staging, target, main="run:main")
+    shutil.rmtree(staging)
+    return target
+
+
+def run_once(
+    target: Path, cwd: Path, argv: List[str], env: Dict[str, str], strace: Optional[str]
+) -> Dict[str, Any]:
+    stats_file = cwd / "stats.json"
+    run_env = dict(
+        env,
+        AUTOCLI_BENCH_STATS=str(stats_file),
+        PYTHONPATH=os.pathsep.join([str(SRC_DIR), env.get("PYTHONPATH", "")]),
+    )
+    command = [sys.executable, str(target)] + argv
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        command, cwd=str(cwd), env=run_env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"Benchmark run failed ({' '.join(command)}):\n{result.stderr}"
+        )
+
+    sample = {"wall_ms": wall * 1000}
+    sample.update(json.loads(stats_file.read_text()))
+    if strace:
+        traced = subprocess.run(
+            [strace, "-f", "-qq", "-e", "trace=%stat,openat"] + command,
+            cwd=str(cwd), env=run_env, capture_output=True, text=True,
+        )
+        sample["stat_calls"] = len(STAT_CALLS.findall(traced.stderr))
+    return sample
+
+
+def bench_app(
+    app_dir: Path, root: Path, repeat: int, strace: Optional[str]
+) -> Dict[str, Any]:
+    base_env = {k: v for k, v in os.environ.items() if not k.startswith("AUTOCLI_")}
+    lazy_env = dict(base_env, AUTOCLI_BENCH_LAZY="1")
+    cache_env = dict(lazy_env, AUTOCLI_CACHE_DIR=str(root / f"cache_{app_dir.name}"))
+    argv = command_paths_argv(app_dir) + ["--test-value", "x"]
+
+    pyz = build_zipapp(app_dir, root / f"{app_dir.name}.pyz", index=False)
+    pyz_index = build_zipapp(app_dir, root / f"{app_dir.name}_index.pyz", index=True)
+
+    runs = {
+        "dir": (app_dir / "run.py", base_env),
+        "dir_lazy": (app_dir / "run.py", cache_env),
+        "zipapp": (pyz, base_env),
+        "zipapp_lazy": (pyz, lazy_env),
+        "zipapp_index": (pyz_index, lazy_env),
+    }
+    results = {}
+    for name in SCENARIOS:
+        target, env = runs[name]
+        run_once(target, app_dir, argv, env, None)  # warm-up (bytecode, manifest)
+        results[name] = summarize(
+            [run_once(target, app_dir, argv, env, strace) for _ in range(repeat)]
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+        help="Number of commands per generated tree.",
+    )
+    parser.add_argument(
+        "--layout", default="dirs", choices=("dunder", "dirs", "mixed"),
+        help="Command package layout to generate.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Runs per scenario (median reported).",
+    )
+    parser.add_argument(
+        "--no-strace", action="store_true", help="Do not count stat syscalls.",
+    )
+    parser.add_argument(
+        "--output", default="bench_zipapp.json", help="Where to write the JSON results.",
+    )
+    args = parser.parse_args()
+    strace = None if args.no_strace else shutil.which("strace")
+
+    results = []
+    with TemporaryDirectory(prefix="autocli-bench-zip-") as tmp:
+        root = Path(tmp)
+        for size in args.sizes:
+            print(f"Benchmarking {size} commands...", file=sys.stderr)
+            app_dir = generate_app(root, args.layout, size, 0)
+            scenarios = bench_app(app_dir, root, args.repeat, strace)
+            results.append({"commands": size, "scenarios": scenarios})
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "layout": args.layout,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'commands':>9}" + "".join(f"{s:>15}" for s in SCENARIOS))
+    for entry in results:
+        row = f"{entry['commands']:>9}"
+        for name in SCENARIOS:
+            row += f"{entry['scenarios'][name]['wall_ms']:>13.1f}ms"
+        print(row)
+        if strace:
+            row = f"{'stats':>9}"
+            for name in SCENARIOS:
+                row += f"{entry['scenarios'][name]['stat_calls']:>15.0f}"
+            print(row)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
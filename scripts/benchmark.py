@@ -0,0 +1,297 @@
+"""
+Scalability benchmarks for create_command_parser.
+
+Generates synthetic command packages (dunder, nested-dir and mixed layouts) of
+configurable size and import weight, then times fresh interpreter runs of each:
+
+  cold_dispatch   first run of one command, no .pyc files and no cache
+  warm_dispatch   the same command again (bytecode cached)
+  lazy_dispatch   the same command with lazy=True and a discovery manifest
+  help            root --help (eager)
+  lazy_help       root --help (lazy, manifest warm)
+  lazy_complete   shell completion of the first group's commands (manifest warm)
+
+Every run reports wall time, peak RSS and autocli's own profile phases
+(discover, register, parse_args), and the results are written as JSON so
+releases can be compared.
+
+Usage:
+    python scripts/benchmark.py --sizes 10 100 1000 --output bench_results.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Dict, List
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+SRC_DIR = PROJECT_ROOT / "src"
+
+LAYOUTS = ("dunder", "dirs", "mixed")
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+
+# Commands per group, and groups per top-level group in the nested layouts
+FANOUT = 10
+
+COMMAND_TEMPLATE = """\
+import argparse
+
+# Synthetic import-time work standing in for heavy top-level imports
+_PAYLOAD = sum(i * i for i in range({weight}))
+
+
+def autocli_setup_parser(subparsers: argparse._SubParsersAction, command_name: str):
+    parser = subparsers.add_parser(command_name, help=f"The {{command_name}} command.")
+    parser.add_argument("--test-value", type=str, required=True)
+    parser.add_argument("--flag", action="store_true")
+    parser.set_defaults(func=run_command)
+
+
+def run_command(args: argparse.Namespace):
+    print(f"ran with value: {{args.test_value}}")
+"""
+
+RUNNER_TEMPLATE = """\
+import os
+import sys
+import json
+import atexit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _write_stats():
+    path = os.environ.get("AUTOCLI_BENCH_STATS")
+    if not path:
+        return
+    try:
+        import resource
+
+        # ru_maxrss is in KiB on Linux and bytes on macOS
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        rss_kib = rss // 1024 if sys.platform == "darwin" else rss
+    except ImportError:
+        rss_kib = None
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"peak_rss_kib": rss_kib}, f)
+
+
+atexit.register(_write_stats)
+
+from autocli import create_command_parser
+import commands
+
+
+def main():
+    lazy = os.environ.get("AUTOCLI_BENCH_LAZY") == "1"
+    parser = create_command_parser(commands, lazy=lazy, description="bench")
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
+"""
+
+
+def command_paths(layout: str, count: int) -> List[str]:
+    """Returns the package-relative command file paths for a synthetic tree."""
+    paths = []
+    for i in range(count):
+        group, sub, cmd = i // (FANOUT * FANOUT), (i // FANOUT) % FANOUT, i % FANOUT
+        if layout == "dunder":
+            paths.append(f"g{group}__s{sub}__c{cmd}.py")
+        elif layout == "dirs":
+            paths.append(f"g{group}/s{sub}/c{cmd}.py")
+        elif layout == "mixed":
+            paths.append(f"g{group}/s{sub}__c{cmd}.py")
+        else:
+            raise ValueError(f"Unknown layout: {layout}")
+    return paths
+
+
+def generate_app(root: Path, layout: str, count: int, weight: int) -> Path:
+    """Writes a synthetic app (run.py + commands package) and returns its dir."""
+    app_dir = root / f"{layout}_{count}"
+    commands_dir = app_dir / "commands"
+    commands_dir.mkdir(parents=True)
+    (commands_dir / "__init__.py").write_text("")
+    (app_dir / "run.py").write_text(RUNNER_TEMPLATE)
+
+    content = COMMAND_TEMPLATE.format(weight=weight)
+    for relative in command_paths(layout, count):
+        path = commands_dir / relative
+        if not path.parent.exists():
+            path.parent.mkdir(parents=True)
+            # Every directory level needs to be a package
+            for parent in path.relative_to(commands_dir).parents:
+                init = commands_dir / parent / "__init__.py"
+                if not init.exists():
+                    init.write_text("")
+        path.write_text(content)
+    return app_dir
+
+
+def clear_bytecode(app_dir: Path) -> None:
+    for pycache in app_dir.rglob("__pycache__"):
+        shutil.rmtree(pycache, ignore_errors=True)
+
+
+def run_once(app_dir: Path, argv: List[str], env: Dict[str, str]) -> Dict[str, Any]:
+    """Runs the app in a fresh interpreter and collects wall time, RSS and profile."""
+    stats_file = app_dir / "stats.json"
+    profile_file = app_dir / "profile.json"
+    run_env = dict(
+        env,
+        AUTOCLI_BENCH_STATS=str(stats_file),
+        AUTOCLI_PROFILE=str(profile_file),
+        PYTHONPATH=os.pathsep.join([str(SRC_DIR), env.get("PYTHONPATH", "")]),
+    )
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, str(app_dir / "run.py")] + argv,
+        cwd=str(app_dir),
+        env=run_env,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - start
+
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"Benchmark run failed ({' '.join(argv)}):\n{result.stderr}"
+        )
+
+    sample = {"wall_ms": wall * 1000}
+    sample.update(json.loads(stats_file.read_text()))
+    profile = json.loads(profile_file.read_text())
+    for phase in profile["phases"]:
+        sample[f"{phase['phase']}_ms"] = phase["ns"] / 1e6
+    sample["modules_loaded"] = len(profile["modules"])
+    return sample
+
+
+def summarize(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Takes the median of every numeric field across repeated samples."""
+    summary = {}
+    for key in samples[0]:
+        values = [s[key] for s in samples if s.get(key) is not None]
+        summary[key] = statistics.median(values) if values else None
+    return summary
+
+
+def bench_app(app_dir: Path, cache_dir: Path, repeat: int) -> Dict[str, Dict[str, Any]]:
+    """Runs every scenario against one generated app."""
+    base_env = {k: v for k, v in os.environ.items() if not k.startswith("AUTOCLI_")}
+    first_command = command_paths_argv(app_dir)
+    dispatch_argv = first_command + ["--test-value", "x"]
+    lazy_env = dict(base_env, AUTOCLI_BENCH_LAZY="1", AUTOCLI_CACHE_DIR=str(cache_dir))
+    complete_env = dict(lazy_env, AUTOCLI_COMPLETE="bash")
+
+    results = {}
+
+    cold = []
+    for _ in range(repeat):
+        clear_bytecode(app_dir)
+        cold.append(run_once(app_dir, dispatch_argv, base_env))
+    results["cold_dispatch"] = summarize(cold)
+
+    scenarios = [
+        ("warm_dispatch", dispatch_argv, base_env),
+        ("lazy_dispatch", dispatch_argv, lazy_env),
+        ("help", ["--help"], base_env),
+        ("lazy_help", ["--help"], lazy_env),
+        ("lazy_complete", first_command[:1] + [""], complete_env),
+    ]
+    for name, argv, env in scenarios:
+        run_once(app_dir, argv, env)  # warm-up (bytecode, manifest)
+        results[name] = summarize([run_once(app_dir, argv, env) for _ in range(repeat)])
+
+    return results
+
+
+def command_paths_argv(app_dir: Path) -> List[str]:
+    """Returns the argv of the first command of a generated app."""
+    layout = app_dir.name.rsplit("_", 1)[0]
+    relative = command_paths(layout, 1)[0]
+    return relative[: -len(".py")].replace("/", "__").split("__")
+
+
+def print_table(results: List[Dict[str, Any]]) -> None:
+    scenarios = [
+        "cold_dispatch", "warm_dispatch", "lazy_dispatch", "help", "lazy_help", "lazy_complete"
+    ]
+    header = f"{'layout':<8}{'commands':>9}" + "".join(f"{s:>15}" for s in scenarios)
+    print(header)
+    for entry in results:
+        row = f"{entry['layout']:<8}{entry['commands']:>9}"
+        for scenario in scenarios:
+            row += f"{entry['scenarios'][scenario]['wall_ms']:>13.1f}ms"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+        help="Number of commands per generated tree.",
+    )
+    parser.add_argument(
+        "--layouts", nargs="+", choices=LAYOUTS, default=list(LAYOUTS),
+        help="Command package layouts to generate.",
+    )
+    parser.add_argument(
+        "--import-weight", type=int, default=0,
+        help="Synthetic import-time work per command module (loop iterations).",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs per scenario (median reported).",
+    )
+    parser.add_argument(
+        "--output", default="bench_results.json", help="Where to write the JSON results.",
+    )
+    args = parser.parse_args()
+
+    results = []
+    with TemporaryDirectory(prefix="autocli-bench-") as tmp:
+        root = Path(tmp)
+        for layout in args.layouts:
+            for size in args.sizes:
+                print(f"Benchmarking {layout} layout with {size} commands...", file=sys.stderr)
+                app_dir = generate_app(root, layout, size, args.import_weight)
+                cache_dir = root / f"cache_{layout}_{size}"
+                results.append(
+                    {
+                        "layout": layout,
+                        "commands": size,
+                        "import_weight": args.import_weight,
+                        "scenarios": bench_app(app_dir, cache_dir, args.repeat),
+                    }
+                )
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print_table(results)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
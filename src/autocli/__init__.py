@@ -1,17 +1,80 @@
+from __future__ import annotations
+
 import os
 import sys
-import argparse
 import typing as t
 import importlib
+import functools
 import types
 from pathlib import Path
 
+from . import _index, _manifest, _plugins, _profile, _scan
+from . import completion
+from .tree import CommandEntry, CommandNode, CommandTree
+
+if t.TYPE_CHECKING:
+    import argparse
+
+    from . import _help
+    from . import telemetry as _telemetry
+    from ._dispatch import dispatch
+    from ._imports import lazy_import
+    from ._lazy import LazySubParsersAction
+    from ._parser import CommandParser, CommandSubParsersAction
+    from ._results import cached
+
+# Public names imported from their module on first access: a shell completion
+# request is answered before argparse (or anything only the parser needs) is
+# imported
+_LAZY_EXPORTS = {
+    "dispatch": "._dispatch",
+    "lazy_import": "._imports",
+    "cached": "._results",
+    "CommandParser": "._parser",
+    "CommandSubParsersAction": "._parser",
+    "LazySubParsersAction": "._lazy",
+}
+
+__all__ = [
+    "create_command_parser",
+    "dispatch",
+    "lazy_import",
+    "cached",
+    "CommandEntry",
+    "CommandNode",
+    "CommandTree",
+    "CommandParser",
+    "CommandSubParsersAction",
+    "LazySubParsersAction",
+]
+
 # Define the expected types for command modules
 CommandModule = types.ModuleType
 
 
+def __getattr__(name: str) -> t.Any:
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
 def create_command_parser(
-    package_module: CommandModule, *args, **kwargs
+    package_module: t.Union[CommandModule, t.Sequence[CommandModule]],
+    *args,
+    lazy: bool = False,
+    cache_dir: t.Optional[t.Union[str, os.PathLike]] = None,
+    index: bool = True,
+    profile: _profile.ProfileTarget = None,
+    static: bool = False,
+    ignore: t.Optional[t.Sequence[str]] = None,
+    entry_points: t.Optional[str] = None,
+    bundle: bool = True,
+    fast_parse: bool = True,
+    telemetry: _telemetry.TelemetryTarget = None,
+    **kwargs,
 ) -> argparse.ArgumentParser:
     """
     Creates the main ArgumentParser, dynamically discovers and registers all
@@ -22,26 +85,509 @@ def create_command_parser(
     2. File names separated by '__' (e.g., 'user__add.py' becomes 'user add').
     3. Both mixed (e.g., 'user/db__connect.py' becomes 'user db connect').
 
+    Command names can be abbreviated to any unambiguous prefix ('us ad' runs
+    'user add') unless allow_abbrev=False is passed, and a mistyped name is
+    answered with the closest names. Both are resolved from the names alone,
+    before any command module is imported.
+
     Args:
-        package_module: The package object (e.g., importlib.import_module('autocli.commands')).
-        *args, **kwargs: Passed directly to argparse.ArgumentParser.
+        package_module: The package object (e.g., importlib.import_module('autocli.commands')),
+            or a list of packages whose command trees are merged.
+        *args, **kwargs: Passed directly to the CommandParser (an
+            argparse.ArgumentParser subclass).
+        lazy: Build the command tree on demand. Groups and commands are only
+            recorded by name (and help, when the index or manifest knows it);
+            a command module is imported and its autocli_setup_parser called
+            when argparse selects it, or when its group's help is rendered.
+            The values of a lazy group's `choices` dict are None until then.
+        cache_dir: Directory for the discovery manifest (falls back to the
+            AUTOCLI_CACHE_DIR environment variable). When set, later runs only
+            re-stat the package instead of rescanning it, and modules known to
+            be missing their setup/run functions are not imported again
+            (what importing the commands taught it is dropped whenever a
+            package __init__ or helper module they imported changes). The
+            rendered -h/--help of every command and group is kept there too,
+            so asking for it again builds (and, when lazy, imports) nothing
+            until one of the modules it depends on changes.
+        index: Use the package's generated _autocli_index module (see
+            `python -m autocli build-index`) when it exists. The index replaces
+            discovery entirely, so rebuild it whenever commands change.
+        profile: Collect startup timings (discovery, each module's import and
+            autocli_setup_parser call, parse_args) and report them at exit:
+            True prints a table sorted by cost to stderr, a path writes JSON.
+            Defaults to the AUTOCLI_PROFILE environment variable.
+        static: Fill in help strings the index or manifest does not know yet by
+            parsing the command sources with ast instead of importing them, so
+            lazy group listings never execute command module code.
+        ignore: fnmatch-style patterns for files and directories to leave out
+            of discovery, matched against each name and against its path
+            relative to the package (e.g. ["tests", "vendor", "*_test.py"]).
+            Bytecode caches and hidden directories are always skipped.
+        entry_points: An importlib.metadata entry-point group (e.g.
+            'myapp.commands') whose entries name further command packages,
+            so separately installed distributions can add commands. Their
+            trees are merged after package_module's. When two packages
+            provide the same command (or one's command is the other's group),
+            the first one wins and the other module is skipped with a
+            warning. The group lookup is cached in cache_dir until the set of
+            installed distributions changes.
+        bundle: Import command modules from the package's frozen bundle (see
+            `python -m autocli bundle`) when it exists: one file of
+            precompiled code read by a meta-path importer instead of a
+            filesystem search per module. Its command list also replaces
+            the directory scan, so rebuild it whenever commands change.
+        fast_parse: With lazy, parse a well-formed command line straight
+            into a Namespace using the parse table recorded for the command
+            (by build-index, or in the manifest once the command has been
+            registered): the command module is imported but no parser is
+            built and its autocli_setup_parser is not called. Unusual or
+            invalid arguments (and -h) fall back to argparse, so errors and
+            help are unchanged.
+        telemetry: Hooks around every command's run_command (see
+            autocli.telemetry): a CommandHooks object or a list of them, or
+            the path of a metrics file that a MetricsCollector keeps wall
+            time, CPU time, exit status and peak RSS per command in (SQLite
+            for .db/.sqlite/.sqlite3, OpenMetrics text otherwise). Defaults
+            to the AUTOCLI_METRICS environment variable.
 
     Returns:
-        A configured argparse.ArgumentParser instance.
+        A configured CommandParser instance.
+    """
+
+    startup_profile = _profile.start_profile(profile)
+
+    # 1. Discover the command modules of every package
+    with startup_profile.phase("discover"):
+        packages = _command_packages(package_module, entry_points, cache_dir)
+        discovered = [
+            _discover_modules(package, cache_dir, index, static, ignore, bundle)
+            for package in packages
+        ]
+        save_cache = _chain_callbacks([save for _, save, _ in discovered])
+    # Parse tables only serve the fast path of later runs, so they are only
+    # compiled when a manifest keeps them
+    tables = any(help_cache is not None for _, _, help_cache in discovered)
+
+    # Shell completion requests are answered from the discovered metadata
+    # without building (or importing) anything
+    if os.environ.get(completion.COMPLETE_ENV):
+        valid_tree = _merge_packages(
+            [[m for m in modules if m.valid is not False] for modules, _, _ in discovered]
+        )
+        completion.respond(
+            valid_tree, sys.argv[1:], functools.partial(_load_command_options, tables=tables)
+        )
+        save_cache()
+        sys.exit(0)
+
+    tree = _merge_packages([modules for modules, _, _ in discovered])
+
+    from . import _fastparse, _help
+    from ._lazy import LazySubParsersAction
+    from ._parser import CommandParser
+
+    # 2. Initialize the root parser
+    parser = CommandParser(*args, **kwargs)
+
+    root_kwargs = {"action": LazySubParsersAction} if lazy else {}
+    subparsers = parser.add_subparsers(
+        title="Commands", dest="cmd", required=True, **root_kwargs
+    )
+
+    # 3. Import and Register all found modules (or just their names when lazy)
+    with startup_profile.phase("register"):
+        if lazy:
+            _add_lazy_choices(subparsers, tree.root, save_cache, startup_profile, tables)
+        else:
+            _register_modules(subparsers, tree, startup_profile, tables)
+
+    # Rendered help is only cached for a single package with a manifest
+    help_cache = discovered[0][2] if len(discovered) == 1 else None
+    if help_cache is not None:
+        _help.serve_cached_help(parser, tree, help_cache(), save_cache)
+    if lazy and fast_parse:
+        _fastparse.install_fast_path(parser, tree, startup_profile)
+
+    if _telemetry_configured(telemetry):
+        from . import telemetry as _telemetry
+
+        hooks = _telemetry.resolve_hooks(telemetry)
+        if hooks:
+            _telemetry.install(parser, hooks)
+
+    # Installed last so parse_args is timed whichever wrapper answers it
+    if startup_profile.enabled:
+        _profile_parse_args(parser, startup_profile)
+
+    save_cache()
+
+    return parser
+
+
+def _command_packages(
+    package_module: t.Union[CommandModule, t.Sequence[CommandModule]],
+    entry_points: t.Optional[str],
+    cache_dir: t.Optional[t.Union[str, os.PathLike]],
+) -> t.List[CommandModule]:
+    """Returns the command packages to merge, in order of precedence."""
+    if isinstance(package_module, types.ModuleType):
+        packages = [package_module]
+    else:
+        packages = list(package_module)
+
+    if entry_points:
+        cache_root = _manifest.resolve_cache_dir(cache_dir)
+        packages += _plugins.load_plugin_packages(entry_points, cache_root)
+
+    # A plugin may register a package that was also passed explicitly
+    seen = set()
+    unique = []
+    for package in packages:
+        if package.__name__ not in seen:
+            seen.add(package.__name__)
+            unique.append(package)
+    return unique
+
+
+def _merge_packages(discovered: t.List[t.List[CommandEntry]]) -> CommandTree:
+    """
+    Merges the command modules of several packages into one tree. Groups merge
+    freely; a module whose command is already taken by an earlier package, or
+    that would turn an earlier package's command into a group (or the other
+    way around), is skipped with a warning. Conflicts inside one package are
+    left to registration, exactly as with a single package.
+    """
+    tree = CommandTree(discovered[0])
+    for found_modules in discovered[1:]:
+        accepted = []
+        for mod_info in found_modules:
+            owner = _merge_conflict(tree, mod_info.command_parts)
+            if owner is not None:
+                print(
+                    f"Warning: Skipping {mod_info.import_name}: command "
+                    f"'{' '.join(mod_info.command_parts)}' conflicts with {owner}.",
+                    file=sys.stderr,
+                )
+                continue
+            accepted.append(mod_info)
+
+        for mod_info in accepted:
+            tree.add(mod_info)
+    return tree
+
+
+def _merge_conflict(tree: CommandTree, parts: t.Sequence[str]) -> t.Optional[str]:
     """
+    Returns the module of the tree that a command at parts would conflict
+    with: one registering the same command, one inside a group of that name,
+    or one registering a command where parts needs a group. None otherwise.
+    """
+    node, consumed = tree.lookup(parts)
+    if consumed == len(parts):
+        for descendant in node.walk():
+            if descendant.entries:
+                return descendant.entries[0].import_name
+        node = node.parent
+    while node.parent is not None:
+        if node.entries:
+            return node.entries[0].import_name
+        node = node.parent
+    return None
+
 
-    # 1. Initialize the root parser
-    parser = argparse.ArgumentParser(*args, **kwargs)
+def _chain_callbacks(callbacks: t.List[t.Callable[[], None]]) -> t.Callable[[], None]:
+    """Returns one callable that calls all of callbacks in order."""
+    if len(callbacks) == 1:
+        return callbacks[0]
 
-    # targets will map command group keys (e.g., '', 'user', 'user__db') to
-    # their respective subparsers action objects.
-    # '' is the root key.
-    targets: t.Dict[str, argparse._SubParsersAction] = {}
-    targets[""] = parser.add_subparsers(title="Commands", dest="cmd", required=True)
+    def call_all():
+        for callback in callbacks:
+            callback()
 
+    return call_all
+
+
+def _discover_modules(
+    package_module: CommandModule,
+    cache_dir: t.Optional[t.Union[str, os.PathLike]],
+    index: bool,
+    static: bool = False,
+    ignore: t.Optional[t.Sequence[str]] = None,
+    bundle: bool = False,
+) -> t.Tuple[
+    t.List[CommandEntry],
+    t.Callable[[], None],
+    t.Optional[t.Callable[[], _help.HelpCache]],
+]:
+    """
+    Returns the command modules of the package together with a callable that
+    persists whatever registration learned about them (validity, help), and
+    a factory for the cache of rendered --help texts when there is a manifest
+    to keep it in. The callable may be called again whenever lazy
+    registration learns more.
+
+    A generated index needs no filesystem access at all, and neither does the
+    command list of a frozen bundle; otherwise the manifest is reused when
+    the layout of the package is unchanged since it was written, and the
+    package directory is scanned when it is not. A package inside a zipapp
+    or zipimport archive is walked through importlib.resources instead. With
+    static, help strings that are still unknown are read from the sources.
+    """
+    pkg_name = package_module.__name__
+
+    # Installed first so the index itself is imported from the bundle
+    finder = None
+    if bundle and _has_bundle(package_module):
+        from . import _bundle
+
+        finder = _bundle.install_bundle(package_module)
+
+    found_modules = _index.load_index(pkg_name) if index else None
+    if found_modules is not None:
+        return found_modules, lambda: None, None
+
+    if finder is not None:
+        found_modules = [
+            CommandEntry(
+                command["command_parts"],
+                f"{pkg_name}.{command['module']}",
+                command["path"],
+            )
+            for command in finder.commands
+        ]
+        if static:
+            _fill_static_metadata(Path(finder.pkg_dir), found_modules)
+        return found_modules, lambda: None, None
+
+    # Packages inside zip archives are listed through their loader. Reading
+    # the archive's table of contents is cheap, so nothing is cached
+    location = _get_package_zip(package_module)
+    if location is not None:
+        found_modules = _scan.scan_zip(*location, pkg_name, ignore)
+        if static:
+            _fill_static_metadata(_get_zip_root(package_module, location), found_modules)
+        return found_modules, lambda: None, None
+
+    resources = _get_package_resources(package_module)
+    if resources is not None:
+        found_modules = _scan.scan_resources(resources, pkg_name, ignore)
+        if static:
+            _fill_static_metadata(resources, found_modules)
+        return found_modules, lambda: None, None
+
+    pkg_dir = _get_package_dir(package_module)
+
+    cache_root = _manifest.resolve_cache_dir(cache_dir)
+    if cache_root is None:
+        found_modules = _scan_command_modules(pkg_dir, pkg_name, ignore)
+        if static:
+            _fill_static_metadata(pkg_dir, found_modules)
+        return found_modules, lambda: None, None
+
+    cache_file = _manifest.manifest_path(cache_root, pkg_name, pkg_dir)
+    ignore = list(ignore or ())
+    manifest = _manifest.load_manifest(cache_file, pkg_name, pkg_dir, ignore)
+
+    if manifest is not None and _manifest.directories_unchanged(
+        pkg_dir, manifest["dirs"]
+    ):
+        found_modules = [
+            CommandEntry.from_dict(entry) for entry in manifest["modules"].values()
+        ]
+        dirs = manifest["dirs"]
+    else:
+        # Records the directory mtimes in the same walk
+        dirs = {}
+        found_modules = _scan_command_modules(pkg_dir, pkg_name, ignore, dirs)
+
+    cached_modules = manifest["modules"] if manifest is not None else {}
+    support = manifest["support"] if manifest is not None else {}
+    help_texts = dict(manifest["help"]) if manifest is not None else {}
+    # A changed helper module may change any command's options and help, so
+    # nothing learned by importing the commands is reused
+    if not _manifest.support_unchanged(pkg_dir, support):
+        cached_modules, support, help_texts = {}, {}, {}
+    stats = _manifest.refresh_entries(pkg_dir, found_modules, cached_modules)
+    if static:
+        _fill_static_metadata(pkg_dir, found_modules)
+
+    # Texts carry their own digests, so they survive a rescan of the package.
+    # The cache is created on demand: completion never needs it
+    def help_cache() -> _help.HelpCache:
+        from . import _help
+
+        return _help.HelpCache(help_texts, stats)
+
+    def save_cache():
+        nonlocal manifest
+        new_manifest = _manifest.new_manifest(pkg_name, pkg_dir, ignore)
+        new_manifest.update(
+            {
+                "dirs": dirs,
+                "modules": _manifest.module_table(found_modules, stats),
+                "support": {
+                    **support,
+                    **_manifest.support_modules(pkg_name, pkg_dir, found_modules),
+                },
+                "help": dict(help_texts),
+            }
+        )
+        if new_manifest != manifest:
+            _manifest.save_manifest(cache_file, new_manifest)
+            manifest = new_manifest
+
+    return found_modules, save_cache, help_cache
+
+
+def _fill_static_metadata(pkg_dir: t.Any, found_modules: t.List[CommandEntry]) -> None:
+    """
+    Reads the help string and option flags of every module for which they are
+    still unknown from its source, and marks modules that certainly lack the
+    required functions as invalid so listing a group never has to import them.
+    """
+    from . import _static
+
+    pending = [
+        mod_info
+        for mod_info in found_modules
+        if mod_info.valid is not False
+        and (mod_info.help is None or mod_info.options is None)
+    ]
+    # Archive members (Traversables) are read in-process, never in a pool
+    results = _static.analyze_files(
+        [pkg_dir / mod_info.path for mod_info in pending],
+        max_workers=None if isinstance(pkg_dir, Path) else 1,
+    )
+    for mod_info, result in zip(pending, results):
+        if result["valid"] is False:
+            mod_info.valid = False
+        elif result["valid"]:
+            if mod_info.help is None:
+                mod_info.help = _static.format_help(result["help"], mod_info.name)
+            if mod_info.options is None:
+                mod_info.options = _static.option_strings(result)
+
+
+def _telemetry_configured(telemetry: _telemetry.TelemetryTarget) -> bool:
+    """
+    Whether the telemetry argument (or AUTOCLI_METRICS, see
+    telemetry.METRICS_ENV) configures anything, decided without importing
+    autocli.telemetry.
+    """
+    if telemetry is None:
+        return bool(os.environ.get("AUTOCLI_METRICS"))
+    return not (telemetry is False or telemetry is True or telemetry == "")
+
+
+def _profile_parse_args(
+    parser: argparse.ArgumentParser, startup_profile: _profile.StartupProfile
+) -> None:
+    """Times the root parser's parse_known_args (which parse_args goes through)."""
+    parse_known_args = parser.parse_known_args
+
+    @functools.wraps(parse_known_args)
+    def timed_parse_known_args(*args, **kwargs):
+        with startup_profile.phase("parse_args"):
+            return parse_known_args(*args, **kwargs)
+
+    parser.parse_known_args = timed_parse_known_args
+
+
+def _has_bundle(package_module: CommandModule) -> bool:
+    """Whether the package has a bundle file, checked without importing _bundle."""
+    file = getattr(package_module, "__file__", None)
+    return bool(file) and os.path.exists(
+        os.path.join(os.path.dirname(file), _index.BUNDLE_FILE)
+    )
+
+
+def _get_package_zip(package_module: CommandModule) -> t.Optional[t.Tuple[str, str]]:
+    """
+    Returns the archive path and the package's prefix inside it (e.g.
+    "app/commands/") when the package was imported by zipimport, or None.
+    """
+    import zipimport
+
+    spec = getattr(package_module, "__spec__", None)
+    loader = getattr(spec, "loader", None)
+    locations = getattr(package_module, "__path__", None)
+    if not isinstance(loader, zipimport.zipimporter) or not locations:
+        return None
+
+    archive = loader.archive
+    location = list(locations)[0]
+    if not location.startswith(archive + os.sep):
+        return None
+    prefix = location[len(archive) + 1 :].replace(os.sep, "/")
+    return archive, prefix + "/"
+
+
+def _get_zip_root(package_module: CommandModule, location: t.Tuple[str, str]) -> t.Any:
+    """
+    Returns a Traversable of a zipimported package (see _get_package_zip)
+    to read its members' sources through.
+    """
+    resources = _get_package_resources(package_module)
+    if resources is None:
+        # Python < 3.9 has no importlib.resources.files(); zipfile.Path reads
+        # the archive members just the same
+        import zipfile
+
+        resources = zipfile.Path(*location)
+    return resources
+
+
+def _scan_package_sources(
+    package_module: CommandModule, ignore: t.Optional[t.Sequence[str]] = None
+) -> t.Tuple[t.List[CommandEntry], t.Any]:
+    """
+    Lists the command modules of a package as discovery does, but always
+    afresh: from the archive of a zipimported package, through
+    importlib.resources for other loaders that are not directories on disk,
+    else by scanning the package directory. Returns them together with the
+    root their sources are read from (root / mod_info.path).
+    """
+    pkg_name = package_module.__name__
+    location = _get_package_zip(package_module)
+    if location is not None:
+        found_modules = _scan.scan_zip(*location, pkg_name, ignore)
+        return found_modules, _get_zip_root(package_module, location)
+
+    resources = _get_package_resources(package_module)
+    if resources is not None:
+        return _scan.scan_resources(resources, pkg_name, ignore), resources
+
+    pkg_dir = _get_package_dir(package_module)
+    return _scan_command_modules(pkg_dir, pkg_name, ignore), pkg_dir
+
+
+def _get_package_resources(package_module: CommandModule) -> t.Optional[t.Any]:
+    """
+    Returns the importlib.resources Traversable of a package that is not a
+    directory on disk but whose loader can list it (zipapp, zipimport), or
+    None.
+    """
+    file = getattr(package_module, "__file__", None)
+    if file and os.path.isdir(os.path.dirname(file)):
+        return None
+    if not getattr(package_module, "__path__", None):
+        return None
+
+    try:
+        from importlib.resources import files
+    except ImportError:  # Python < 3.9
+        return None
+    try:
+        resources = files(package_module)
+    except (TypeError, ValueError, NotImplementedError):
+        return None
+    return resources if resources.is_dir() else None
+
+
+def _get_package_dir(package_module: CommandModule) -> Path:
+    """Returns the physical directory of the command package, or exits."""
     pkg_name = package_module.__name__
 
-    # Determine the physical directory path of the package
     if not hasattr(package_module, "__file__") or not package_module.__file__:
         sys.exit(
             f"Error: Could not determine physical path for package '{pkg_name}' to scan recursively."
@@ -51,71 +597,261 @@ def create_command_parser(
     if not pkg_dir.is_dir():
         sys.exit(f"Error: Package path '{pkg_dir}' is not a directory.")
 
-    found_modules = []
+    return pkg_dir
 
-    # 2. Recursively scan the package directory for command modules (*.py)
-    for file_path in pkg_dir.rglob("*.py"):
-        relative_path = file_path.relative_to(pkg_dir)
-        if relative_path.name == "__init__.py":
-            continue
 
-        # Get the module name parts based on path and filename
-        # Example 1: user/db/connect.py -> parts from dir ('user', 'db') + filename base ('connect')
-        # Example 2: user__add.py -> no dir parts + filename base ('user', 'add')
+def _register_modules(
+    subparsers: argparse._SubParsersAction,
+    tree: CommandTree,
+    startup_profile: _profile.Profile = _profile.NULL_PROFILE,
+    tables: bool = False,
+) -> None:
+    """
+    Imports the modules of the tree, in the order they were found, and lets
+    each one register its command parser below subparsers. The validity and
+    help of every imported module (and with tables, its parse table) are
+    recorded back into its entry so callers can cache them.
+    """
+    # Maps group nodes to their subparsers actions, created on first use
+    targets: t.Dict[CommandNode, argparse._SubParsersAction] = {tree.root: subparsers}
+    # Nodes a module has registered a command parser at
+    commands: t.Set[CommandNode] = set()
+    for mod_info in tree:
+        # Modules already known to lack the required functions are not
+        # imported again just to repeat the warning
+        if mod_info.valid is False:
+            print(
+                f"Warning: Module {mod_info.import_name} skipped (missing setup or run function).",
+                file=sys.stderr,
+            )
+            continue
 
-        cmd_path_str = relative_path.with_suffix("").as_posix()
-        cmd_parts = cmd_path_str.replace(os.sep, "__").split("__")
-        import_name = cmd_path_str.replace(os.sep, ".")
+        node = tree.find(mod_info.command_parts)
+        conflict = _registration_conflict(node, targets, commands)
+        if conflict is not None:
+            # Not left to argparse: before Python 3.11 add_parser() silently
+            # replaces an existing choice instead of raising
+            print(
+                f"Error processing module {mod_info.import_name}: "
+                f"conflicting subparser: {conflict}",
+                file=sys.stderr,
+            )
+            continue
 
-        found_modules.append(
-            {
-                "command_parts": cmd_parts,
-                "import_name": f"{pkg_name}.{import_name}",
-            }
+        group = node.parent
+        _register_module(
+            mod_info,
+            functools.partial(_get_group_target, targets, group),
+            startup_profile,
+            tables,
         )
+        if group in targets and mod_info.name in targets[group]._name_parser_map:
+            commands.add(node)
 
-    # 3. Import and Register all found modules
-    for mod_info in found_modules:
-        parts = mod_info["command_parts"]
-        import_name = mod_info["import_name"]
 
-        try:
+def _registration_conflict(
+    node: CommandNode,
+    targets: t.Dict[CommandNode, argparse._SubParsersAction],
+    commands: t.Set[CommandNode],
+) -> t.Optional[str]:
+    """
+    Returns the name a command at node would register twice: its own when a
+    command or a group already took it, or that of a parent group some
+    module registered as a command instead. None when there is no conflict.
+    """
+    if node in commands or node in targets:
+        return node.name
+    groups = []
+    parent = node.parent
+    while parent is not None and parent not in targets:
+        groups.append(parent)
+        parent = parent.parent
+    for group in reversed(groups):
+        if group in commands:
+            return group.name
+    return None
+
+
+def _register_module(
+    mod_info: CommandEntry,
+    get_target: t.Callable[[], argparse._SubParsersAction],
+    startup_profile: _profile.Profile = _profile.NULL_PROFILE,
+    tables: bool = False,
+) -> None:
+    """
+    Imports one command module and calls its autocli_setup_parser on the
+    subparsers action returned by get_target, compiling the command's parse
+    table when tables is set. Errors are reported, not raised.
+    """
+    from . import _fastparse, _results
+
+    import_name = mod_info.import_name
+
+    try:
+        with startup_profile.module_step(import_name, "import"):
             module = importlib.import_module(import_name)
 
-            # Enforce required functions
-            if not hasattr(module, "autocli_setup_parser") or not hasattr(
-                module, "run_command"
-            ):
-                print(
-                    f"Warning: Module {import_name} skipped (missing setup or run function).",
-                    file=sys.stderr,
-                )
-                continue
+        # Enforce required functions
+        mod_info.valid = hasattr(module, "autocli_setup_parser") and hasattr(
+            module, "run_command"
+        )
+        if not mod_info.valid:
+            print(
+                f"Warning: Module {import_name} skipped (missing setup or run function).",
+                file=sys.stderr,
+            )
+            return
 
-            # Build the command group hierarchy dynamically
-            parent_key = ""
-            for part in parts[:-1]:
-                # The key uses the original __ delimiter format for consistency in the targets dict
-                current_key = f"{parent_key}{'__' if parent_key else ''}{part}"
+        # Register the final command (the last part of the parts list)
+        final_target = get_target()
 
-                # If this group doesn't exist yet, create its subparser
-                if current_key not in targets:
-                    parent_parser = targets[parent_key].add_parser(
-                        part, help=f"Subcommands for the '{part}' group"
-                    )
-                    targets[current_key] = parent_parser.add_subparsers(
-                        dest=current_key, required=True
-                    )
-                parent_key = current_key
+        # The command module must call final_target.add_parser() and attach
+        # the run_command function as a default.
+        with startup_profile.module_step(import_name, "setup"):
+            module.autocli_setup_parser(final_target, mod_info.name)
+        command_parser = final_target._name_parser_map.get(mod_info.name)
+        if command_parser is not None:
+            # A run_command decorated with autocli.cached gets its flags
+            _results.add_cache_options(command_parser)
+        mod_info.help = _get_choice_help(final_target, mod_info.name)
+        mod_info.options = _get_option_strings(final_target, mod_info.name)
+        mod_info.table = (
+            _fastparse.compile_table(command_parser, module)
+            if tables and command_parser is not None
+            else None
+        )
 
-            # Register the final command (the last part of the parts list)
-            final_target = targets[parent_key]
+    except Exception as e:
+        print(f"Error processing module {import_name}: {e}", file=sys.stderr)
 
-            # The command module must call final_target.add_parser() and attach
-            # the run_command function as a default.
-            module.autocli_setup_parser(final_target, parts[-1])
 
-        except Exception as e:
-            print(f"Error processing module {import_name}: {e}", file=sys.stderr)
+def _scan_command_modules(
+    pkg_dir: Path,
+    pkg_name: str,
+    ignore: t.Optional[t.Sequence[str]] = None,
+    dirs: t.Optional[t.Dict[str, int]] = None,
+) -> t.List[CommandEntry]:
+    """
+    Recursively scans the package directory for command modules (*.py) and
+    returns their command parts and import names.
 
-    return parser
+    Example 1: user/db/connect.py -> parts from dir ('user', 'db') + filename base ('connect')
+    Example 2: user__add.py -> no dir parts + filename base ('user', 'add')
+    """
+    return _scan.scan_package(pkg_dir, pkg_name, ignore, dirs)
+
+
+def _get_choice_help(
+    subparsers: argparse._SubParsersAction, name: str
+) -> t.Optional[str]:
+    """Returns the help string a command registered for itself, if any."""
+    for choice_action in subparsers._choices_actions:
+        if choice_action.dest == name:
+            return choice_action.help
+    return None
+
+
+def _get_group_target(
+    targets: t.Dict[CommandNode, argparse._SubParsersAction], group: CommandNode
+) -> argparse._SubParsersAction:
+    """
+    Returns the subparsers action of a group node, creating its parser (and
+    those of any missing parent groups) along the way.
+    """
+    if group not in targets:
+        parent_target = _get_group_target(targets, group.parent)
+        group_parser = parent_target.add_parser(
+            group.name, help=f"Subcommands for the '{group.name}' group"
+        )
+        # The dest uses the original __ delimiter format, e.g. 'user__db'
+        targets[group] = group_parser.add_subparsers(dest=group.key, required=True)
+    return targets[group]
+
+
+def _get_option_strings(
+    subparsers: argparse._SubParsersAction, name: str
+) -> t.Optional[t.List[str]]:
+    """Returns every option flag of a registered command's parser."""
+    command_parser = subparsers._name_parser_map.get(name)
+    if command_parser is None:
+        return None
+    return [flag for action in command_parser._actions for flag in action.option_strings]
+
+
+def _load_command_options(
+    mod_info: CommandEntry, tables: bool = False
+) -> t.Optional[t.List[str]]:
+    """Imports a single command module to learn its option flags."""
+    import argparse
+
+    target = argparse.ArgumentParser().add_subparsers()
+    _register_module(mod_info, lambda: target, tables=tables)
+    return mod_info.options
+
+
+def _add_lazy_choices(
+    subparsers: LazySubParsersAction,
+    node: CommandNode,
+    save_cache: t.Callable[[], None],
+    startup_profile: _profile.Profile = _profile.NULL_PROFILE,
+    tables: bool = False,
+) -> None:
+    """Records the groups and commands below node on a lazy subparsers action."""
+    for name, child in (node.children or {}).items():
+        if child.is_group:
+            subparsers.add_lazy_parser(
+                name,
+                functools.partial(
+                    _load_lazy_group, child, save_cache, startup_profile, tables
+                ),
+                help=f"Subcommands for the '{name}' group",
+            )
+            continue
+
+        modules = [m for m in child.entries if m.valid is not False]
+        if modules:
+            subparsers.add_lazy_parser(
+                name,
+                functools.partial(
+                    _load_lazy_commands, modules, save_cache, startup_profile, tables
+                ),
+                help=modules[0].help,
+            )
+
+
+def _load_lazy_group(
+    node: CommandNode,
+    save_cache: t.Callable[[], None],
+    startup_profile: _profile.Profile,
+    tables: bool,
+    subparsers: argparse._SubParsersAction,
+    name: str,
+) -> None:
+    """Builds a group parser whose own choices are lazy again."""
+    from ._lazy import LazySubParsersAction
+
+    for mod_info in node.entries:
+        print(
+            f"Error processing module {mod_info.import_name}: conflicting subparser: {name}",
+            file=sys.stderr,
+        )
+
+    group_parser = subparsers.add_parser(name, help=f"Subcommands for the '{name}' group")
+    group_subparsers = group_parser.add_subparsers(
+        dest=node.key, required=True, action=LazySubParsersAction
+    )
+    _add_lazy_choices(group_subparsers, node, save_cache, startup_profile, tables)
+
+
+def _load_lazy_commands(
+    modules: t.List[CommandEntry],
+    save_cache: t.Callable[[], None],
+    startup_profile: _profile.Profile,
+    tables: bool,
+    subparsers: argparse._SubParsersAction,
+    name: str,
+) -> None:
+    """Imports and sets up the module(s) of a command once it is needed."""
+    for mod_info in modules:
+        _register_module(mod_info, lambda: subparsers, startup_profile, tables)
+    save_cache()
@@ -0,0 +1,442 @@
+import os
+import sys
+import json
+import argparse
+import importlib
+from pathlib import Path
+
+from . import (
+    _index,
+    _scan_package_sources,
+    _static,
+    completion,
+    create_command_parser,
+)
+
+
+def _import_package(name: str):
+    """Imports a command package by name, looking in the current directory too."""
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+    try:
+        return importlib.import_module(name)
+    except ImportError as e:
+        sys.exit(f"Error: Could not import command package '{name}': {e}")
+
+
+def build_index_command(args: argparse.Namespace):
+    """Generates the static command index for a package."""
+    package_module = _import_package(args.package)
+    output = _index.build_index(package_module, args.output, args.ignore)
+    print(f"Wrote command index {output}")
+
+
+def bundle_command(args: argparse.Namespace):
+    """Compiles a command package into a frozen bundle."""
+    from . import _bundle
+
+    package_module = _import_package(args.package)
+    output = _bundle.build_bundle(package_module, args.output, args.ignore)
+    print(f"Wrote command bundle {output}")
+
+
+def check_command(args: argparse.Namespace):
+    """Lists and validates a command package without importing its modules."""
+    package_module = _import_package(args.package)
+    found_modules, root = _scan_package_sources(package_module, args.ignore)
+    # Archive members (Traversables) are read in-process, never in a pool
+    results = _static.analyze_files(
+        [root / mod_info.path for mod_info in found_modules],
+        args.jobs if isinstance(root, Path) else 1,
+    )
+
+    problems = 0
+    rows = []
+    for mod_info, result in sorted(
+        zip(found_modules, results), key=lambda item: item[0].command_parts
+    ):
+        command = " ".join(mod_info.command_parts)
+        # valid is None when only an import can tell (e.g. `from .impl import *`)
+        if result["error"] or result["valid"] is False:
+            problems += 1
+            missing = [f for f in _static.REQUIRED_FUNCTIONS if f not in result["defines"]]
+            reason = result["error"] or f"missing {', '.join(missing)}"
+            print(f"Error: {mod_info.path}: {reason}", file=sys.stderr)
+            continue
+        help = _static.format_help(result["help"], mod_info.name)
+        rows.append((command, help or ""))
+
+    width = max((len(command) for command, _ in rows), default=0)
+    for command, help in rows:
+        print(f"  {command:<{width}}  {help}".rstrip())
+
+    if problems:
+        sys.exit(f"{problems} command module(s) failed validation.")
+
+
+def doctor_command(args: argparse.Namespace):
+    """Audits what importing each command module costs, against budgets."""
+    from . import _doctor
+
+    try:
+        budgets = [_doctor.parse_budget(value) for value in args.budget or []]
+    except ValueError as e:
+        sys.exit(f"Error: Invalid --budget: {e}")
+    package_module = _import_package(args.package)
+    found_modules = sorted(
+        _scan_package_sources(package_module, args.ignore)[0],
+        key=lambda mod_info: mod_info.command_parts,
+    )
+    results = _doctor.audit_modules(found_modules, args.jobs, args.repeat)
+    max_memory_kb = None if args.max_memory_mb is None else int(args.max_memory_mb * 1024)
+
+    problems = 0
+    rows = []
+    report = []
+    for mod_info, result in zip(found_modules, results):
+        command = " ".join(mod_info.command_parts)
+        max_ms = _doctor.command_budget(command, args.max_import_ms, budgets)
+        found = _doctor.violations(result, max_ms, max_memory_kb, args.forbid or [])
+        for problem in found:
+            print(f"Error: {mod_info.path}: {problem}", file=sys.stderr)
+        problems += bool(found)
+        report.append(dict(result, command=command, path=mod_info.path, problems=found))
+        if not result["error"]:
+            memory = "?" if result["memory_kb"] is None else str(result["memory_kb"])
+            imports = ", ".join(result["third_party"])
+            rows.append(
+                (command, f"{result['import_ms']:.1f}", memory, result["new_modules"], imports)
+            )
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        width = max([len(row[0]) for row in rows] + [len("command")])
+        print(f"  {'command':<{width}}  {'ms':>8}  {'KiB':>7}  {'modules':>7}  third-party")
+        for command, ms, memory, count, imports in rows:
+            print(f"  {command:<{width}}  {ms:>8}  {memory:>7}  {count:>7}  {imports}".rstrip())
+
+    if problems:
+        sys.exit(f"{problems} command module(s) over budget.")
+
+
+def completion_command(args: argparse.Namespace):
+    """Prints the shell completion script for a program."""
+    print(completion.completion_script(args.shell, args.prog), end="")
+
+
+def fanout_command(args: argparse.Namespace):
+    """Runs one command line once per value from a file (or stdin)."""
+    from . import fanout
+
+    if args.command and args.command[0] == "--":
+        args.command = args.command[1:]
+    if not args.command:
+        sys.exit("Error: No command given to fan out (e.g. -- db ping --host {}).")
+
+    package_module = _import_package(args.package)
+    parser = create_command_parser(package_module, prog=args.prog, lazy=True)
+
+    if args.values == "-":
+        values = fanout.read_values(sys.stdin)
+    else:
+        with open(args.values, encoding="utf-8") as f:
+            values = fanout.read_values(f)
+
+    sys.exit(
+        fanout.fan_out(
+            parser,
+            args.command,
+            values,
+            workers=args.jobs,
+            ordered=not args.as_completed,
+            processes=args.processes,
+            placeholder=args.placeholder,
+        )
+    )
+
+
+def daemon_command(args: argparse.Namespace):
+    """Builds the parser for a command package once and serves it."""
+    from . import daemon
+
+    package_module = _import_package(args.package)
+    parser = create_command_parser(package_module, prog=args.prog)
+    daemon.serve(
+        parser,
+        args.socket,
+        ready=lambda: print(f"Serving {args.package} on {args.socket}", file=sys.stderr),
+    )
+
+
+def daemon_client_command(args: argparse.Namespace):
+    """Prints the standalone daemon client script."""
+    from . import daemon
+
+    print(daemon.client_script(args.socket), end="")
+
+
+def batch_command(args: argparse.Namespace):
+    """Runs every command line from a file (or stdin) in this process."""
+    from . import batch
+
+    package_module = _import_package(args.package)
+    parser = create_command_parser(package_module, prog=args.prog, lazy=True)
+
+    source = sys.stdin if args.file == "-" else open(args.file, encoding="utf-8")
+    report = None
+    try:
+        if args.report == "-":
+            report = sys.stderr
+        elif args.report:
+            report = open(args.report, "w", encoding="utf-8")
+        code = batch.run_batch(
+            parser,
+            source,
+            args.format,
+            report,
+            stop_on_error=args.stop_on_error,
+            concurrency=args.concurrency,
+        )
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if report is not None and report is not sys.stderr:
+            report.close()
+    sys.exit(code)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m autocli", description="autocli maintenance commands."
+    )
+    subparsers = parser.add_subparsers(title="Commands", dest="cmd", required=True)
+
+    build_index = subparsers.add_parser(
+        "build-index",
+        help="Write a static command index into a command package.",
+        description=(
+            "Walks and imports the command package the way create_command_parser "
+            "does and writes its _autocli_index.py, so installed deployments "
+            "load commands without scanning the filesystem."
+        ),
+    )
+    build_index.add_argument(
+        "package", help="Import name of the command package (e.g. myapp.commands)."
+    )
+    build_index.add_argument(
+        "-o", "--output", help="Write the index here instead of into the package."
+    )
+    build_index.add_argument(
+        "--ignore", action="append", metavar="PATTERN",
+        help="Leave matching files/directories out (fnmatch, repeatable).",
+    )
+    build_index.set_defaults(func=build_index_command)
+
+    bundle_parser = subparsers.add_parser(
+        "bundle",
+        help="Compile a command package into one frozen bundle file.",
+        description=(
+            "Compiles every module of the command package into "
+            "_autocli_bundle.bin (marshalled code objects with an index). "
+            "create_command_parser then imports commands from it with one read "
+            "each instead of a filesystem search. Rebuild it whenever commands "
+            "change."
+        ),
+    )
+    bundle_parser.add_argument(
+        "package", help="Import name of the command package (e.g. myapp.commands)."
+    )
+    bundle_parser.add_argument(
+        "-o", "--output", help="Write the bundle here instead of into the package."
+    )
+    bundle_parser.add_argument(
+        "--ignore", action="append", metavar="PATTERN",
+        help="Leave matching files/directories out (fnmatch, repeatable).",
+    )
+    bundle_parser.set_defaults(func=bundle_command)
+
+    check = subparsers.add_parser(
+        "check",
+        help="List and validate a command package without importing it.",
+        description=(
+            "Parses every command module with ast, lists the commands with their "
+            "help strings and reports modules missing autocli_setup_parser or "
+            "run_command. Exits non-zero if any module is invalid."
+        ),
+    )
+    check.add_argument(
+        "package", help="Import name of the command package (e.g. myapp.commands)."
+    )
+    check.add_argument(
+        "-j", "--jobs", type=int, help="Worker processes for large trees."
+    )
+    check.add_argument(
+        "--ignore", action="append", metavar="PATTERN",
+        help="Leave matching files/directories out (fnmatch, repeatable).",
+    )
+    check.set_defaults(func=check_command)
+
+    doctor = subparsers.add_parser(
+        "doctor",
+        help="Audit the import cost of every command module against budgets.",
+        description=(
+            "Imports each command module in a fresh interpreter (several in "
+            "parallel) and reports its import time, the growth of the peak RSS, "
+            "the number of modules it pulled in and which third-party packages "
+            "they belong to. Exits non-zero if any module fails to import or "
+            "exceeds a budget."
+        ),
+    )
+    doctor.add_argument(
+        "package", help="Import name of the command package (e.g. myapp.commands)."
+    )
+    doctor.add_argument(
+        "--max-import-ms", type=float, metavar="MS",
+        help="Import-time budget of every command module.",
+    )
+    doctor.add_argument(
+        "--budget", action="append", metavar="PATTERN=MS",
+        help="Import-time budget of the commands matching PATTERN (fnmatch on "
+        "the command, e.g. 'report *=250'); later ones win (repeatable).",
+    )
+    doctor.add_argument(
+        "--max-memory-mb", type=float, metavar="MB",
+        help="Budget for the peak RSS growth of an import.",
+    )
+    doctor.add_argument(
+        "--forbid", action="append", metavar="PACKAGE",
+        help="Third-party package no command may import at module level, e.g. "
+        "one that should go through autocli.lazy_import (repeatable).",
+    )
+    doctor.add_argument(
+        "--repeat", type=int, default=1,
+        help="Import each module N times and keep the fastest (default: 1).",
+    )
+    doctor.add_argument(
+        "-j", "--jobs", type=int, help="Interpreters to run at once (default: CPUs)."
+    )
+    doctor.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    doctor.add_argument(
+        "--ignore", action="append", metavar="PATTERN",
+        help="Leave matching files/directories out (fnmatch, repeatable).",
+    )
+    doctor.set_defaults(func=doctor_command)
+
+    completion_parser = subparsers.add_parser(
+        "completion",
+        help="Print a shell completion script for an autocli program.",
+        description=(
+            "Prints a completion script that asks the program itself for "
+            "candidates. Completion is answered from the command index or "
+            "discovery manifest, without importing command modules. Example: "
+            "eval \"$(python -m autocli completion bash myapp)\""
+        ),
+    )
+    completion_parser.add_argument("shell", choices=completion.SHELLS)
+    completion_parser.add_argument("prog", help="Name of the program to complete.")
+    completion_parser.set_defaults(func=completion_command)
+
+    batch_parser = subparsers.add_parser(
+        "batch",
+        help="Run many command lines of a command package in one process.",
+        description=(
+            "Builds the parser once and runs one invocation per input line "
+            "(shell-style text or a JSON array of arguments). A failing line, "
+            "including sys.exit() in a command, does not stop the batch. Exits 1 "
+            "if any line failed."
+        ),
+    )
+    batch_parser.add_argument(
+        "package", help="Import name of the command package (e.g. myapp.commands)."
+    )
+    batch_parser.add_argument(
+        "file", nargs="?", default="-", help="File of command lines (default: stdin)."
+    )
+    batch_parser.add_argument(
+        "--format", choices=("auto", "lines", "jsonl"), default="auto",
+        help="How to read each line (default: auto).",
+    )
+    batch_parser.add_argument(
+        "--report", help="Write per-line exit status and timing as JSON lines ('-' for stderr).",
+    )
+    batch_parser.add_argument(
+        "--stop-on-error", action="store_true", help="Stop at the first failing line."
+    )
+    batch_parser.add_argument(
+        "-j", "--concurrency", type=int, default=1,
+        help="Run up to N async commands at once on one event loop (default: 1).",
+    )
+    batch_parser.add_argument("--prog", help="Program name shown in usage and help.")
+    batch_parser.set_defaults(func=batch_command)
+
+    fanout_parser = subparsers.add_parser(
+        "fanout",
+        help="Run one command once per value (host, tenant, ...) in parallel.",
+        usage="%(prog)s --values FILE [options] package -- command ...",
+        description=(
+            "Builds the parser once and runs the command line after '--' once per "
+            "value, substituting each value for the placeholder (or appending it). "
+            "Output of each run is replayed as one block; exits 1 if any run failed."
+        ),
+    )
+    fanout_parser.add_argument(
+        "package", help="Import name of the command package (e.g. myapp.commands)."
+    )
+    fanout_parser.add_argument(
+        "--values", required=True, help="File with one value per line ('-' for stdin)."
+    )
+    fanout_parser.add_argument(
+        "-j", "--jobs", type=int, default=8, help="Maximum concurrent runs (default: 8)."
+    )
+    fanout_parser.add_argument(
+        "--processes", action="store_true",
+        help="Use a forked process pool instead of threads (CPU-bound commands).",
+    )
+    fanout_parser.add_argument(
+        "--as-completed", action="store_true",
+        help="Print each run's output as it finishes instead of in input order.",
+    )
+    fanout_parser.add_argument(
+        "--placeholder", default="{}", help="Token replaced by each value (default: {}).",
+    )
+    fanout_parser.add_argument("--prog", help="Program name shown in usage and help.")
+    fanout_parser.add_argument(
+        "command", nargs=argparse.REMAINDER, help="The command line to run, after '--'."
+    )
+    fanout_parser.set_defaults(func=fanout_command)
+
+    daemon_parser = subparsers.add_parser(
+        "daemon",
+        help="Serve a command package from a long-lived process (Unix only).",
+        description=(
+            "Imports every command module once and serves invocations forwarded "
+            "by the daemon client over a Unix domain socket. Each request runs in "
+            "a forked child with the client's argv, environment, cwd and stdio."
+        ),
+    )
+    daemon_parser.add_argument(
+        "package", help="Import name of the command package (e.g. myapp.commands)."
+    )
+    daemon_parser.add_argument("--socket", required=True, help="Socket path to listen on.")
+    daemon_parser.add_argument("--prog", help="Program name shown in usage and help.")
+    daemon_parser.set_defaults(func=daemon_command)
+
+    client_parser = subparsers.add_parser(
+        "daemon-client",
+        help="Print a standalone client script for a running daemon.",
+        description=(
+            "Prints a script that forwards its command line to the daemon. It "
+            "does not import autocli, so it starts as fast as the interpreter. "
+            "AUTOCLI_DAEMON_SOCKET overrides the socket at run time."
+        ),
+    )
+    client_parser.add_argument("--socket", required=True, help="Socket path of the daemon.")
+    client_parser.set_defaults(func=daemon_client_command)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
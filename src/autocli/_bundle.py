@@ -0,0 +1,244 @@
+import os
+import sys
+import struct
+import marshal
+import importlib.util
+import importlib.machinery
+import threading
+import types
+import typing as t
+from pathlib import Path
+
+from . import _scan
+from ._index import BUNDLE_FILE
+
+# Bump whenever the layout of the bundle changes
+BUNDLE_VERSION = 1
+
+_MAGIC = b"ACLIBNDL"
+
+# magic, Python bytecode magic, bundle version, table of contents size
+_HEADER = struct.Struct("<8s4sIQ")
+
+# Installed finders by bundle path, so building many parsers installs one
+_installed: t.Dict[str, "BundleFinder"] = {}
+
+
+def _package_sources(
+    pkg_dir: Path, ignore: t.Optional[t.Sequence[str]] = None
+) -> t.Iterator[str]:
+    """
+    Yields the package-relative posix path of every module below pkg_dir,
+    pruned like the discovery scan (caches, hidden directories, ignore).
+    """
+    is_ignored = _scan.compile_ignore(ignore)
+
+    def skipped(name: str, relative: str) -> bool:
+        return is_ignored is not None and bool(is_ignored(name) or is_ignored(relative))
+
+    for root, dirs, files in os.walk(pkg_dir):
+        relative_root = os.path.relpath(root, pkg_dir).replace(os.sep, "/")
+        prefix = "" if relative_root == "." else f"{relative_root}/"
+        dirs[:] = sorted(
+            d
+            for d in dirs
+            if d != "__pycache__" and "." not in d and not skipped(d, prefix + d)
+        )
+        for name in sorted(files):
+            if name.endswith(".py") and not skipped(name, prefix + name):
+                yield prefix + name
+
+
+def build_bundle(
+    package_module: types.ModuleType,
+    output: t.Optional[Path] = None,
+    ignore: t.Optional[t.Sequence[str]] = None,
+) -> Path:
+    """
+    Compiles every module of the command package (commands, helpers and
+    subpackages, but not the package's own __init__) into one file of
+    marshalled code objects with a table of contents and the command list,
+    written into the package (or to output). Returns the path written.
+    """
+    from . import _get_package_dir
+
+    pkg_name = package_module.__name__
+    pkg_dir = _get_package_dir(package_module)
+
+    modules = {}
+    blobs = []
+    offset = 0
+    for relative in _package_sources(pkg_dir, ignore):
+        if relative == "__init__.py":
+            continue
+        is_package = relative.endswith("/__init__.py")
+        stem = relative[: -len("/__init__.py")] if is_package else relative[:-3]
+        path = pkg_dir / relative
+        code = compile(path.read_bytes(), str(path), "exec", dont_inherit=True)
+        blob = marshal.dumps(code)
+        modules[stem.replace("/", ".")] = (offset, len(blob), is_package, relative)
+        blobs.append(blob)
+        offset += len(blob)
+
+    commands = [
+        {
+            "command_parts": list(mod_info.command_parts),
+            "module": mod_info.import_name[len(pkg_name) + 1 :],
+            "path": mod_info.path,
+        }
+        for mod_info in _scan.scan_package(pkg_dir, pkg_name, ignore)
+    ]
+    toc = marshal.dumps({"modules": modules, "commands": commands})
+
+    output = Path(output) if output is not None else pkg_dir / BUNDLE_FILE
+    tmp_output = output.with_name(f"{output.name}.{os.getpid()}.tmp")
+    with open(tmp_output, "wb") as f:
+        f.write(
+            _HEADER.pack(_MAGIC, importlib.util.MAGIC_NUMBER, BUNDLE_VERSION, len(toc))
+        )
+        f.write(toc)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_output, output)
+    return output
+
+
+class BundleFinder:
+    """
+    A meta-path finder and loader for the modules of one bundle. A module is
+    loaded with one positioned read from the already open bundle instead of a
+    search along sys.path, stats and a .pyc read. It only answers for names
+    inside its command package; everything else falls through to the regular
+    finders. A bundle compiled by a different Python version, or older than
+    one of the sources it holds, is ignored.
+    """
+
+    def __init__(
+        self, path: str, pkg_name: str, pkg_dir: str, fd: int, toc: dict, data_start: int
+    ):
+        self.path = path
+        self.pkg_name = pkg_name
+        self.pkg_dir = pkg_dir
+        self._fd = fd
+        self._data_start = data_start
+        self._lock = threading.Lock()
+        prefix = f"{pkg_name}."
+        self.modules = {prefix + name: entry for name, entry in toc["modules"].items()}
+        self.commands = toc["commands"]
+
+    @classmethod
+    def open(cls, path: str, pkg_name: str) -> t.Optional["BundleFinder"]:
+        """Reads a bundle's table of contents, or returns None if there is none."""
+        try:
+            fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        except OSError:
+            return None
+
+        try:
+            header = os.read(fd, _HEADER.size)
+            magic, python_magic, version, toc_size = _HEADER.unpack(header)
+            if magic != _MAGIC or version != BUNDLE_VERSION:
+                raise ValueError("not an autocli bundle of this version")
+            if python_magic != importlib.util.MAGIC_NUMBER:
+                raise ValueError("compiled for a different Python version")
+            toc = marshal.loads(os.read(fd, toc_size))
+            stale = _changed_source(os.path.dirname(path), toc, os.fstat(fd).st_mtime_ns)
+            if stale is not None:
+                raise ValueError(f"{stale} changed since it was built")
+        except (OSError, ValueError, EOFError, TypeError, struct.error) as e:
+            os.close(fd)
+            print(f"Warning: Ignoring command bundle {path} ({e}).", file=sys.stderr)
+            return None
+
+        return cls(path, pkg_name, os.path.dirname(path), fd, toc, _HEADER.size + toc_size)
+
+    def install(self) -> None:
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self) -> None:
+        """Removes the finder from sys.meta_path and closes the bundle."""
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+        _installed.pop(self.path, None)
+        os.close(self._fd)
+
+    def find_spec(self, fullname, path=None, target=None):
+        entry = self.modules.get(fullname)
+        if entry is None:
+            return None
+        _offset, _size, is_package, relative = entry
+        origin = os.path.join(self.pkg_dir, relative)
+        spec = importlib.machinery.ModuleSpec(
+            fullname, self, origin=origin, is_package=is_package
+        )
+        spec.has_location = True
+        if is_package:
+            spec.submodule_search_locations = [os.path.dirname(origin)]
+        return spec
+
+    def create_module(self, spec):
+        return None  # default module creation
+
+    def exec_module(self, module: types.ModuleType) -> None:
+        exec(self.get_code(module.__name__), module.__dict__)
+
+    def get_code(self, fullname: str) -> types.CodeType:
+        offset, size, _is_package, _relative = self.modules[fullname]
+        position = self._data_start + offset
+        if hasattr(os, "pread"):
+            data = os.pread(self._fd, size, position)
+        else:
+            with self._lock:
+                os.lseek(self._fd, position, os.SEEK_SET)
+                data = os.read(self._fd, size)
+        return marshal.loads(data)
+
+    def is_package(self, fullname: str) -> bool:
+        return self.modules[fullname][2]
+
+    def get_source(self, fullname: str) -> t.Optional[str]:
+        """Reads the module's source from disk when it is still there (tracebacks)."""
+        try:
+            with open(os.path.join(self.pkg_dir, self.modules[fullname][3]), "rb") as f:
+                return importlib.util.decode_source(f.read())
+        except OSError:
+            return None
+
+    def get_filename(self, fullname: str) -> str:
+        return os.path.join(self.pkg_dir, self.modules[fullname][3])
+
+
+def _changed_source(pkg_dir: str, toc: dict, built_ns: int) -> t.Optional[str]:
+    """
+    Returns the first module source in the bundle that was modified after
+    the bundle was written, or None. Sources that were removed (a deployment
+    shipping only the bundle) do not count.
+    """
+    for _offset, _size, _is_package, relative in toc["modules"].values():
+        try:
+            if os.stat(os.path.join(pkg_dir, relative)).st_mtime_ns > built_ns:
+                return relative
+        except OSError:
+            continue
+    return None
+
+
+def install_bundle(package_module: types.ModuleType) -> t.Optional[BundleFinder]:
+    """
+    Installs the finder for the package's bundle (once per process) and
+    returns it, or returns None when the package has no usable bundle.
+    """
+    file = getattr(package_module, "__file__", None)
+    if not file:
+        return None
+    path = os.path.join(os.path.dirname(file), BUNDLE_FILE)
+
+    finder = _installed.get(path)
+    if finder is None:
+        finder = BundleFinder.open(path, package_module.__name__)
+        if finder is None:
+            return None
+        _installed[path] = finder
+    finder.install()
+    return finder
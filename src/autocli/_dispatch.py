@@ -0,0 +1,94 @@
+import sys
+import argparse
+import traceback
+import typing as t
+
+
+def exit_code_for(exc: SystemExit) -> int:
+    """
+    Converts a SystemExit into the process exit code the interpreter would
+    use, printing a string code to stderr the way the interpreter does.
+    """
+    code = exc.code
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def dispatch(
+    parser: argparse.ArgumentParser, argv: t.Optional[t.Sequence[str]] = None
+) -> int:
+    """
+    Parses argv and runs the selected command's run_command (args.func),
+    returning an exit code instead of leaving the process.
+
+    This is what a run.py main() does, made reusable for long-lived
+    processes: sys.exit() and argparse errors become their exit code, Ctrl-C
+    becomes 130, and any other exception prints its traceback and returns 1.
+    A coroutine run_command (`async def`) is driven to completion on an
+    event loop.
+    """
+    try:
+        result = _parse_and_call(parser, argv)
+        if hasattr(result, "__await__"):
+            import asyncio
+
+            return asyncio.run(_await_command(result))
+    except SystemExit as e:
+        return exit_code_for(e)
+    except KeyboardInterrupt:
+        return 130
+    except Exception:
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+async def dispatch_async(
+    parser: argparse.ArgumentParser, argv: t.Optional[t.Sequence[str]] = None
+) -> int:
+    """
+    dispatch() for code already running on an event loop. Coroutine commands
+    are awaited on the current loop, so many of them can run concurrently;
+    plain commands run inline.
+    """
+    try:
+        result = _parse_and_call(parser, argv)
+    except SystemExit as e:
+        return exit_code_for(e)
+    except Exception:
+        traceback.print_exc()
+        return 1
+
+    if hasattr(result, "__await__"):
+        return await _await_command(result)
+    return 0
+
+
+def _parse_and_call(
+    parser: argparse.ArgumentParser, argv: t.Optional[t.Sequence[str]]
+) -> t.Any:
+    """Parses argv and calls args.func, returning whatever it returned."""
+    args = parser.parse_args(argv)
+    if hasattr(args, "func"):
+        return args.func(args)
+    parser.print_help()  # no subcommand provided
+    return None
+
+
+async def _await_command(awaitable: t.Awaitable) -> int:
+    """
+    Awaits a coroutine command. SystemExit is caught here, inside the task,
+    because asyncio would otherwise let it escape the event loop.
+    """
+    try:
+        await awaitable
+    except SystemExit as e:
+        return exit_code_for(e)
+    except Exception:
+        traceback.print_exc()
+        return 1
+    return 0
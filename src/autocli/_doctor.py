@@ -0,0 +1,152 @@
+import os
+import sys
+import json
+import fnmatch
+import subprocess
+import typing as t
+
+from .tree import CommandEntry
+
+# Runs in a fresh interpreter per command module: imports the module's parent
+# packages first (their cost is shared by every command), then the module
+# itself, and prints what the import cost as JSON
+PROBE_SOURCE = """\
+import sys, json, time, importlib, sysconfig
+
+import_name = sys.argv[1]
+
+
+def rss_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss // 1024 if sys.platform == "darwin" else maxrss
+
+
+def is_stdlib(top):
+    names = getattr(sys, "stdlib_module_names", None)
+    if names is not None:
+        return top in names
+    if top in sys.builtin_module_names:
+        return True
+    path = getattr(sys.modules.get(top), "__file__", None) or ""
+    stdlib = sysconfig.get_paths()["stdlib"]
+    return path.startswith(stdlib) and "-packages" not in path
+
+
+parts = import_name.split(".")
+result = {"error": None}
+try:
+    for i in range(1, len(parts)):
+        importlib.import_module(".".join(parts[:i]))
+    before = set(sys.modules)
+    rss_before = rss_kb()
+    start = time.perf_counter()
+    importlib.import_module(import_name)
+    result["import_ms"] = (time.perf_counter() - start) * 1000
+    rss_after = rss_kb()
+except BaseException as e:
+    result["error"] = f"{type(e).__name__}: {e}"
+else:
+    new = sys.modules.keys() - before - {import_name}
+    own = parts[0]
+    tops = {name.partition(".")[0] for name in new} - {own}
+    result["memory_kb"] = None if rss_before is None else rss_after - rss_before
+    result["new_modules"] = len(new)
+    result["third_party"] = sorted(top for top in tops if not is_stdlib(top))
+print(json.dumps(result))
+"""
+
+
+def probe_module(import_name: str, repeat: int = 1) -> t.Dict[str, t.Any]:
+    """
+    Imports one command module in fresh interpreters (repeat times, keeping
+    the fastest run) and returns its import_ms, memory_kb (growth of the
+    peak RSS), new_modules, third_party (top-level non-stdlib packages it
+    pulled in) and error.
+    """
+    env = dict(os.environ)
+    # The subprocess must find the package wherever this process found it
+    env["PYTHONPATH"] = os.pathsep.join(p for p in sys.path if p)
+    env.pop("AUTOCLI_METRICS", None)
+
+    best: t.Optional[t.Dict[str, t.Any]] = None
+    for _ in range(max(1, repeat)):
+        completed = subprocess.run(
+            [sys.executable, "-c", PROBE_SOURCE, import_name],
+            capture_output=True,
+            text=True,
+            env=env,
+            check=False,
+        )
+        try:
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+        except (IndexError, ValueError):
+            detail = completed.stderr.strip().splitlines()
+            error = detail[-1] if detail else f"exit status {completed.returncode}"
+            return {"error": f"probe failed: {error}"}
+        if result["error"] or best is None or result["import_ms"] < best["import_ms"]:
+            best = result
+        if result["error"]:
+            break
+    return best
+
+
+def audit_modules(
+    modules: t.Sequence[CommandEntry], jobs: t.Optional[int] = None, repeat: int = 1
+) -> t.List[t.Dict[str, t.Any]]:
+    """
+    Probes every command module, up to jobs interpreters at a time, and
+    returns the results in the order of modules.
+    """
+    import concurrent.futures
+
+    workers = jobs or os.cpu_count() or 1
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(
+            executor.map(lambda entry: probe_module(entry.import_name, repeat), modules)
+        )
+
+
+def command_budget(
+    command: str, max_ms: t.Optional[float], budgets: t.Sequence[t.Tuple[str, float]]
+) -> t.Optional[float]:
+    """Returns the import-time budget of a command; later patterns win."""
+    for pattern, ms in budgets:
+        if fnmatch.fnmatchcase(command, pattern):
+            max_ms = ms
+    return max_ms
+
+
+def parse_budget(value: str) -> t.Tuple[str, float]:
+    """Parses a --budget value, 'PATTERN=MS' (e.g. 'report *=250')."""
+    pattern, sep, ms = value.rpartition("=")
+    try:
+        if not sep or not pattern:
+            raise ValueError
+        return pattern.strip(), float(ms)
+    except ValueError:
+        raise ValueError(f"expected PATTERN=MS, got {value!r}") from None
+
+
+def violations(
+    result: t.Dict[str, t.Any],
+    max_ms: t.Optional[float],
+    max_memory_kb: t.Optional[int],
+    forbid: t.Sequence[str],
+) -> t.List[str]:
+    """Describes every way a probe result exceeds its budget."""
+    if result["error"]:
+        return [f"import failed: {result['error']}"]
+    problems = []
+    if max_ms is not None and result["import_ms"] > max_ms:
+        problems.append(f"import took {result['import_ms']:.1f} ms (budget {max_ms:g} ms)")
+    memory = result["memory_kb"]
+    if max_memory_kb is not None and memory is not None and memory > max_memory_kb:
+        problems.append(f"import grew RSS by {memory} KiB (budget {max_memory_kb} KiB)")
+    heavy = [name for name in result["third_party"] if name in forbid]
+    if heavy:
+        problems.append(f"imports {', '.join(heavy)} at module level")
+    return problems
@@ -0,0 +1,306 @@
+import sys
+import math
+import argparse
+import functools
+import importlib
+import typing as t
+
+from . import _profile
+from .tree import CommandEntry, CommandTree
+
+# Bump whenever the layout of a parse table changes
+TABLE_VERSION = 2
+
+# Longest list of choices a table spells out; a range of any size is stored
+# as its bounds, anything bigger goes through argparse
+MAX_CHOICES = 256
+
+# Action classes the fast path reproduces, matched exactly so subclasses
+# (custom actions) always go through argparse
+_KINDS = {
+    argparse._StoreAction: "store",
+    argparse._StoreConstAction: "store_const",
+    argparse._StoreTrueAction: "store_const",
+    argparse._StoreFalseAction: "store_const",
+    argparse._AppendAction: "append",
+    argparse._CountAction: "count",
+}
+
+_TYPES: t.Dict[t.Any, str] = {None: "str", str: "str", int: "int", float: "float"}
+
+_CONVERTERS: t.Dict[str, t.Callable[[str], t.Any]] = {
+    "str": str,
+    "int": int,
+    "float": float,
+}
+
+_PRIMITIVES = (type(None), bool, int, float, str)
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _literal(value: t.Any) -> t.Any:
+    """Returns value if it survives repr/JSON unchanged, else raises _Unsupported."""
+    if isinstance(value, float) and not math.isfinite(value):
+        raise _Unsupported
+    if isinstance(value, _PRIMITIVES):
+        return value
+    if type(value) is list and all(isinstance(v, _PRIMITIVES) for v in value):
+        return list(value)
+    raise _Unsupported
+
+
+def _compile_default(value: t.Any, module: t.Any) -> t.Any:
+    # Functions of the command module (run_command) are stored by name
+    name = getattr(value, "__name__", None)
+    if callable(value) and name and getattr(module, name, None) is value:
+        return {"attr": name}
+    return _literal(value)
+
+
+def _compile_action(action: argparse.Action) -> t.Dict[str, t.Any]:
+    kind = _KINDS.get(type(action))
+    if kind is None or action.dest == argparse.SUPPRESS:
+        raise _Unsupported
+    if kind in ("store", "append") and action.nargs is not None:
+        raise _Unsupported
+    if not action.option_strings and kind != "store":
+        raise _Unsupported
+    if action.type not in _TYPES:
+        raise _Unsupported
+
+    choices = action.choices
+    if isinstance(choices, range):
+        choices = {"range": [choices.start, choices.stop, choices.step]}
+    elif choices is not None:
+        if not isinstance(choices, (list, tuple)) or len(choices) > MAX_CHOICES:
+            raise _Unsupported
+        choices = _literal(list(choices))
+    return {
+        "dest": action.dest,
+        "kind": kind,
+        "type": _TYPES[action.type],
+        "choices": choices,
+        "required": action.required,
+        "default": _literal(action.default),
+        "const": _literal(action.const),
+    }
+
+
+def compile_table(
+    parser: argparse.ArgumentParser, module: t.Any
+) -> t.Optional[t.Dict[str, t.Any]]:
+    """
+    Compiles a command's parser into a parse table: its positionals and
+    options with their kinds, types, choices, defaults and required flags,
+    plus the parser's set_defaults (functions of the command module by
+    name). Returns None when the parser uses anything the fast path does not
+    reproduce exactly (custom actions or types, nargs, mutually exclusive
+    groups, subcommands, ...), so such commands always go through argparse.
+    """
+    if (
+        parser.prefix_chars != "-"
+        or parser.fromfile_prefix_chars is not None
+        or parser._mutually_exclusive_groups
+    ):
+        return None
+
+    try:
+        options: t.Dict[str, int] = {}
+        positionals: t.List[int] = []
+        actions = []
+        for action in parser._actions:
+            if type(action) is argparse._HelpAction:
+                continue  # -h/--help is not in the table, so it falls back
+            if action.option_strings:
+                for flag in action.option_strings:
+                    options[flag] = len(actions)
+            else:
+                positionals.append(len(actions))
+            actions.append(_compile_action(action))
+        defaults = {
+            dest: _compile_default(value, module) for dest, value in parser._defaults.items()
+        }
+    except _Unsupported:
+        return None
+
+    return {
+        "version": TABLE_VERSION,
+        "options": options,
+        "positionals": positionals,
+        "actions": actions,
+        "defaults": defaults,
+    }
+
+
+def _convert(action: t.Dict[str, t.Any], value: str) -> t.Any:
+    converted = _CONVERTERS[action["type"]](value)
+    choices = action["choices"]
+    if isinstance(choices, dict):
+        choices = range(*choices["range"])
+    if choices is not None and converted not in choices:
+        raise ValueError(value)
+    return converted
+
+
+def parse_with_table(
+    table: t.Dict[str, t.Any], argv: t.Sequence[str]
+) -> t.Optional[t.Dict[str, t.Any]]:
+    """
+    Parses a command's arguments with its parse table and returns the
+    namespace values (with functions still as {"attr": name}), or None when
+    argv is anything but plainly well-formed: unknown or abbreviated options,
+    -h, --, values starting with '-', bad types or choices, missing or extra
+    arguments. argparse then parses it, and reports any error, as usual.
+    """
+    if table.get("version") != TABLE_VERSION:
+        return None
+    actions = table["actions"]
+    options = table["options"]
+    values: t.Dict[str, t.Any] = {}
+    seen = set()
+    positional_args = []
+
+    try:
+        i = 0
+        while i < len(argv):
+            arg = argv[i]
+            i += 1
+            if not arg.startswith("-") or arg == "-":
+                positional_args.append(arg)
+                continue
+
+            if arg.startswith("--"):
+                flag, explicit, inline = arg.partition("=")
+            else:
+                flag, explicit, inline = arg, "", ""
+            index = options.get(flag)
+            if index is None:
+                return None
+            action = actions[index]
+            dest = action["dest"]
+            kind = action["kind"]
+            seen.add(index)
+
+            if kind in ("store", "append"):
+                if not explicit:
+                    if i == len(argv) or argv[i].startswith("-"):
+                        return None
+                    inline = argv[i]
+                    i += 1
+                value = _convert(action, inline)
+                if kind == "store":
+                    values[dest] = value
+                else:
+                    items = values.get(dest, action["default"])
+                    values[dest] = list(items or []) + [value]
+            elif explicit:
+                return None
+            elif kind == "store_const":
+                values[dest] = action["const"]
+            else:  # count
+                values[dest] = (values.get(dest, action["default"]) or 0) + 1
+
+        positionals = table["positionals"]
+        if len(positional_args) != len(positionals):
+            return None
+        for index, arg in zip(positionals, positional_args):
+            values[actions[index]["dest"]] = _convert(actions[index], arg)
+            seen.add(index)
+
+        namespace: t.Dict[str, t.Any] = {}
+        for index, action in enumerate(actions):
+            if action["required"] and index not in seen:
+                return None
+            default = action["default"]
+            if default == argparse.SUPPRESS or action["dest"] in namespace:
+                continue
+            # argparse converts string defaults of arguments that were not given
+            if isinstance(default, str) and index not in seen:
+                default = _convert(dict(action, choices=None), default)
+            namespace[action["dest"]] = default
+        for dest, default in table["defaults"].items():
+            namespace.setdefault(dest, default)
+    except (ValueError, TypeError):
+        return None
+
+    namespace.update(values)
+    return namespace
+
+
+def fast_parse(
+    parser: argparse.ArgumentParser,
+    tree: CommandTree,
+    argv: t.Sequence[str],
+    startup_profile: _profile.Profile = _profile.NULL_PROFILE,
+) -> t.Optional[argparse.Namespace]:
+    """
+    Returns the namespace for argv built from the parse table of the command
+    it names, or None when argparse has to parse it. The command module is
+    imported (run_command lives there, and the import is timed in
+    startup_profile), but no parser is built and its autocli_setup_parser is
+    not called.
+    """
+    # Anything the root parser would add (options, set_defaults) needs argparse
+    if parser._defaults or parser.fromfile_prefix_chars is not None:
+        return None
+    root_dest = None
+    for action in parser._actions:
+        if isinstance(action, argparse._SubParsersAction):
+            root_dest = action.dest
+        elif type(action) is not argparse._HelpAction:
+            return None
+
+    node, consumed = tree.lookup(argv)
+    if node.children is not None or len(node.entries) != 1 or consumed == 0:
+        return None
+    entry: CommandEntry = node.entries[0]
+    if entry.valid is not True or entry.table is None:
+        return None
+
+    values = parse_with_table(entry.table, argv[consumed:])
+    if values is None:
+        return None
+    try:
+        with startup_profile.module_step(entry.import_name, "import"):
+            module = importlib.import_module(entry.import_name)
+        for dest, value in values.items():
+            if isinstance(value, dict):
+                values[dest] = getattr(module, value["attr"])
+    except (ImportError, AttributeError):
+        return None
+
+    namespace = argparse.Namespace()
+    # The dests of the root and group subparsers hold the chosen names
+    if root_dest is not None and root_dest != argparse.SUPPRESS:
+        setattr(namespace, root_dest, argv[0])
+    for i in range(1, consumed):
+        setattr(namespace, "__".join(argv[:i]), argv[i])
+    for dest, value in values.items():
+        setattr(namespace, dest, value)
+    return namespace
+
+
+def install_fast_path(
+    parser: argparse.ArgumentParser,
+    tree: CommandTree,
+    startup_profile: _profile.Profile = _profile.NULL_PROFILE,
+) -> None:
+    """
+    Lets parser answer well-formed command lines from the parse tables of
+    the tree's commands before falling back to argparse.
+    """
+    parse_known_args = parser.parse_known_args
+
+    @functools.wraps(parse_known_args)
+    def parse_known_args_fast(args=None, namespace=None):
+        if namespace is None:
+            argv = sys.argv[1:] if args is None else list(args)
+            fast_namespace = fast_parse(parser, tree, argv, startup_profile)
+            if fast_namespace is not None:
+                return fast_namespace, []
+        return parse_known_args(args, namespace)
+
+    parser.parse_known_args = parse_known_args_fast
@@ -0,0 +1,162 @@
+import sys
+import hashlib
+import argparse
+import functools
+import shutil
+import typing as t
+
+from .tree import CommandNode, CommandTree
+
+HELP_FLAGS = ("-h", "--help")
+
+
+class HelpCache:
+    """
+    The rendered --help texts of one command package, kept in its discovery
+    manifest. Every text is stored under its node's key together with a
+    digest of what went into it: the root parser's settings and options, the
+    terminal width, and the path, stat and validity of every module that
+    contributes to it (the command's own module, or the direct commands of a
+    group). Editing any of those files changes the digest, so a stale text is
+    never served and the next --help stores a fresh one. Helper modules the
+    commands import are not part of the digest: when one of them changes,
+    the whole cache is dropped on load (see _manifest.support_modules).
+    """
+
+    def __init__(
+        self,
+        texts: t.Dict[str, t.Dict[str, str]],
+        stats: t.Dict[str, t.Optional[t.List[int]]],
+    ):
+        self.texts = texts
+        self.stats = stats
+
+    def digest(self, node: CommandNode, context: str) -> t.Optional[str]:
+        """Returns the digest of node's help, or None when it cannot be cached."""
+        contributors = [(node.key, node.entries)]
+        contributors += [(name, child.entries) for name, child in (node.children or {}).items()]
+
+        hasher = hashlib.sha1(context.encode("utf-8"))
+        for name, entries in contributors:
+            signature = [name]
+            for entry in entries:
+                stat = self.stats.get(entry.path)
+                if stat is None:
+                    return None
+                signature.append([entry.path, stat, entry.valid])
+            hasher.update(repr(signature).encode("utf-8"))
+        return hasher.hexdigest()
+
+    def get(self, node: CommandNode, context: str) -> t.Optional[str]:
+        cached = self.texts.get(node.key)
+        if cached is None or cached["digest"] != self.digest(node, context):
+            return None
+        return cached["text"]
+
+    def put(self, node: CommandNode, context: str, text: str) -> None:
+        digest = self.digest(node, context)
+        if digest is not None:
+            self.texts[node.key] = {"digest": digest, "text": text}
+
+
+def help_context(parser: argparse.ArgumentParser) -> str:
+    """
+    Describes everything besides the command modules that shapes the help of
+    parser and of the parsers below it: its settings, the options added to it
+    (also after create_command_parser returned), the Python version (argparse
+    output differs between versions) and the terminal width.
+    """
+    actions = [
+        (a.option_strings, a.dest, a.nargs, a.default, a.required, a.help, a.metavar)
+        for a in parser._actions
+        if not isinstance(a, argparse._SubParsersAction)
+    ]
+    return repr(
+        (
+            sys.version_info[:2],
+            parser.prog,
+            parser.usage,
+            parser.description,
+            parser.epilog,
+            parser.formatter_class.__qualname__,
+            actions,
+            shutil.get_terminal_size().columns,
+        )
+    )
+
+
+def help_request(
+    parser: argparse.ArgumentParser, tree: CommandTree, argv: t.Sequence[str]
+) -> t.Optional[CommandNode]:
+    """
+    Returns the node whose help argv asks for when argv is nothing but exact
+    command names followed by -h/--help, or None for anything else (which is
+    then left to argparse).
+    """
+    if not parser.add_help or "-" not in parser.prefix_chars:
+        return None
+    if not argv or argv[-1] not in HELP_FLAGS:
+        return None
+
+    node, consumed = tree.lookup(argv[:-1])
+    if consumed != len(argv) - 1:
+        return None
+    if node.children is not None:
+        # A group that is also a command is reported by the parser
+        return node if not node.entries else None
+    entries = node.entries
+    return node if len(entries) == 1 and entries[0].valid is not False else None
+
+
+def resolve_parser(
+    parser: argparse.ArgumentParser, parts: t.Sequence[str]
+) -> t.Optional[argparse.ArgumentParser]:
+    """Builds (when lazy) and returns the parser of the command or group at parts."""
+    for part in parts:
+        subparsers = next(
+            (a for a in parser._actions if isinstance(a, argparse._SubParsersAction)),
+            None,
+        )
+        if subparsers is None:
+            return None
+        resolve = getattr(subparsers, "resolve", None)
+        parser = resolve(part) if resolve else subparsers._name_parser_map.get(part)
+        if parser is None:
+            return None
+    return parser
+
+
+def serve_cached_help(
+    parser: argparse.ArgumentParser,
+    tree: CommandTree,
+    cache: HelpCache,
+    save_cache: t.Callable[[], None],
+) -> None:
+    """
+    Answers -h/--help requests for any command or group of parser from the
+    cache, without building (or, when lazy, importing) anything. A request
+    the cache cannot answer renders the help from the parser as argparse
+    would and stores it.
+    """
+    parse_known_args = parser.parse_known_args
+
+    @functools.wraps(parse_known_args)
+    def parse_known_args_with_cached_help(args=None, namespace=None):
+        argv = sys.argv[1:] if args is None else list(args)
+        node = help_request(parser, tree, argv)
+        if node is not None:
+            context = help_context(parser)
+            text = cache.get(node, context)
+            if text is None:
+                target = resolve_parser(parser, node.parts)
+                if target is not None:
+                    text = target.format_help()
+                    # Rendering may have imported modules and learned their validity
+                    cache.put(node, context, text)
+                    save_cache()
+            if text is not None:
+                parser._print_message(text, sys.stdout)
+                parser.exit()
+        return parse_known_args(args, namespace)
+
+    parser.parse_known_args = parse_known_args_with_cached_help
@@ -0,0 +1,67 @@
+import sys
+import types
+import importlib
+import threading
+import typing as t
+
+_resolve_lock = threading.RLock()
+
+
+class LazyModule(types.ModuleType):
+    """
+    Stands in for a module that has not been imported yet. The real import
+    happens on the first attribute access, and every attribute access is
+    forwarded to the real module from then on.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_autocli_module"] = None
+
+    def _autocli_resolve(self) -> types.ModuleType:
+        module = self.__dict__["_autocli_module"]
+        if module is None:
+            with _resolve_lock:
+                module = self.__dict__["_autocli_module"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_autocli_module"] = module
+        return module
+
+    def __getattr__(self, name: str) -> t.Any:
+        return getattr(self._autocli_resolve(), name)
+
+    def __setattr__(self, name: str, value: t.Any) -> None:
+        setattr(self._autocli_resolve(), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        delattr(self._autocli_resolve(), name)
+
+    def __dir__(self) -> t.List[str]:
+        return dir(self._autocli_resolve())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_autocli_module"] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    Returns a module that is only imported when one of its attributes is first
+    used, so a command module can declare heavy dependencies at the top
+    without making autocli_setup_parser (and --help) pay for them:
+
+        pd = autocli.lazy_import("pandas")
+
+        def run_command(args):
+            frame = pd.read_csv(args.path)  # pandas is imported here
+
+    A module that is already imported is returned as is. Import errors surface
+    on first use rather than at the lazy_import() call. Run with
+    AUTOCLI_PROFILE=1 to see which command modules still pay for imports
+    while the parser is built.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
@@ -0,0 +1,107 @@
+import sys
+import typing as t
+import importlib
+import types
+from pathlib import Path
+
+from .tree import CommandEntry, CommandTree
+
+# Name of the generated module inside the command package
+INDEX_MODULE = "_autocli_index"
+
+# Name of the bundle file inside the command package (see _bundle). A bundle
+# older than any source it holds is ignored, but modules added since it was
+# built are only picked up by rebuilding it
+BUNDLE_FILE = "_autocli_bundle.bin"
+
+# Bump whenever the layout of the generated module changes
+INDEX_VERSION = 1
+
+INDEX_HEADER = """\
+# Generated by `python -m autocli build-index`; do not edit.
+# Delete this file (or pass index=False to create_command_parser) to go back
+# to scanning the package directory.
+"""
+
+
+def load_index(pkg_name: str) -> t.Optional[t.List[CommandEntry]]:
+    """
+    Imports the package's generated index and returns its entries like the
+    directory scan does, or None when the package has no index.
+    """
+    index_name = f"{pkg_name}.{INDEX_MODULE}"
+    try:
+        index = importlib.import_module(index_name)
+    except ModuleNotFoundError as e:
+        if e.name != index_name:
+            raise
+        return None
+
+    if getattr(index, "AUTOCLI_INDEX_VERSION", None) != INDEX_VERSION:
+        print(
+            f"Warning: Ignoring {index_name} (built by a different autocli version).",
+            file=sys.stderr,
+        )
+        return None
+
+    return [
+        CommandEntry(
+            entry["command_parts"],
+            f"{pkg_name}.{entry['module']}",
+            entry["path"],
+            entry["valid"],
+            entry["help"],
+            entry.get("options"),
+            entry.get("table"),
+        )
+        for entry in index.COMMANDS
+    ]
+
+
+def render_index(pkg_name: str, found_modules: t.Iterable[CommandEntry]) -> str:
+    """Renders the source of the generated index module."""
+    lines = [INDEX_HEADER, f"AUTOCLI_INDEX_VERSION = {INDEX_VERSION}", "", "COMMANDS = ["]
+    for mod_info in found_modules:
+        entry = {
+            "command_parts": list(mod_info.command_parts),
+            # Stored relative to the package so the index survives relocation
+            "module": mod_info.import_name[len(pkg_name) + 1 :],
+            "path": mod_info.path,
+            "valid": mod_info.valid,
+            "help": mod_info.help,
+            "options": mod_info.options,
+            "table": mod_info.table,
+        }
+        lines.append(f"    {entry!r},")
+    lines.append("]")
+    return "\n".join(lines) + "\n"
+
+
+def build_index(
+    package_module: types.ModuleType,
+    output: t.Optional[Path] = None,
+    ignore: t.Optional[t.Sequence[str]] = None,
+) -> Path:
+    """
+    Walks and imports the command package exactly like create_command_parser
+    does (leaving out anything matching the ignore patterns), then writes the
+    generated index module next to the commands (or to output). Returns the
+    path written.
+    """
+    import argparse
+
+    from . import _get_package_dir, _register_modules, _scan_command_modules
+
+    pkg_name = package_module.__name__
+    pkg_dir = _get_package_dir(package_module)
+    found_modules = _scan_command_modules(pkg_dir, pkg_name, ignore)
+
+    # Register everything on a throwaway parser to learn validity and help
+    parser = argparse.ArgumentParser()
+    _register_modules(
+        parser.add_subparsers(dest="cmd"), CommandTree(found_modules), tables=True
+    )
+
+    output = Path(output) if output is not None else pkg_dir / f"{INDEX_MODULE}.py"
+    output.write_text(render_index(pkg_name, found_modules), encoding="utf-8")
+    return output
@@ -0,0 +1,101 @@
+import argparse
+import threading
+import typing as t
+
+from ._parser import CommandSubParsersAction
+
+# A loader registers the real parser for `name` on the given subparsers action,
+# normally by calling add_parser itself (e.g. a module's autocli_setup_parser)
+Loader = t.Callable[[argparse._SubParsersAction, str], None]
+
+# Serializes loading so threads parsing concurrently (e.g. a fan-out) never
+# build the same choice twice. Reentrant because loaders add lazy choices.
+_resolve_lock = threading.RLock()
+
+
+class LazySubParsersAction(CommandSubParsersAction):
+    """
+    A subparsers action whose choices are only built when they are needed.
+
+    add_lazy_parser() records just a name and help string. The loader that
+    builds the real parser runs when argparse selects that choice, or when the
+    group's help is rendered and the help string is not known up front. Until
+    then the choice maps to None in the `choices` dict; use resolve() to get
+    the parser.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lazy_loaders: t.Dict[str, Loader] = {}
+
+    def add_lazy_parser(
+        self, name: str, loader: Loader, help: t.Optional[str] = None
+    ) -> None:
+        """Registers a choice whose parser is built by loader on first use."""
+        if name in self._name_parser_map:
+            raise argparse.ArgumentError(self, f"conflicting subparser: {name}")
+
+        self._name_parser_map[name] = None
+        self._choice_index = None
+        self._choices_actions.append(self._ChoicesPseudoAction(name, (), help))
+        self._lazy_loaders[name] = loader
+
+    def resolve(self, name: str) -> t.Optional[argparse.ArgumentParser]:
+        """
+        Builds the parser for a lazy choice (if not built yet) and returns it,
+        or None if the loader did not register anything under that name.
+        """
+        if name not in self._lazy_loaders:
+            return self._name_parser_map.get(name)
+
+        # The loader stays registered until it has finished, so another thread
+        # never sees a parser whose own choices are still being added
+        with _resolve_lock:
+            loader = self._lazy_loaders.get(name)
+            if loader is None:
+                return self._name_parser_map.get(name)
+            try:
+                return self._load(name, loader)
+            finally:
+                del self._lazy_loaders[name]
+
+    def _load(self, name: str, loader: Loader) -> t.Optional[argparse.ArgumentParser]:
+        # The loader adds the real parser to a copy of the map without the
+        # placeholder, so `choices` (the original dict) never lacks the name
+        # while another thread checks it. Its help entry is put back where the
+        # placeholder was to keep the order
+        choices = self._name_parser_map
+        self._name_parser_map = {k: v for k, v in choices.items() if k != name}
+        position = next(
+            i for i, action in enumerate(self._choices_actions) if action.dest == name
+        )
+        del self._choices_actions[position]
+        count = len(self._choices_actions)
+
+        try:
+            loader(self, name)
+        finally:
+            loaded, self._name_parser_map = self._name_parser_map, choices
+            choices.update(loaded)
+            if loaded.get(name) is None:
+                del choices[name]
+                self._choice_index = None
+
+        if len(self._choices_actions) > count:
+            self._choices_actions.insert(position, self._choices_actions.pop())
+        return choices.get(name)
+
+    def _get_subactions(self):
+        # Help is being rendered: build the choices whose help is unknown
+        for choice_action in list(self._choices_actions):
+            if choice_action.help is None and choice_action.dest in self._lazy_loaders:
+                self.resolve(choice_action.dest)
+        return super()._get_subactions()
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        values = [self.match(values[0])] + list(values[1:])
+        if self.resolve(values[0]) is None:
+            raise argparse.ArgumentError(
+                self, f"command {values[0]!r} could not be loaded"
+            )
+        super().__call__(parser, namespace, values, option_string)
@@ -0,0 +1,194 @@
+import os
+import sys
+import json
+import hashlib
+import typing as t
+from pathlib import Path
+
+from .tree import CommandEntry
+
+# Bump whenever the on-disk layout of the manifest changes
+MANIFEST_VERSION = 4
+
+# Environment variable that enables the discovery cache without code changes
+CACHE_DIR_ENV = "AUTOCLI_CACHE_DIR"
+
+def resolve_cache_dir(
+    cache_dir: t.Optional[t.Union[str, os.PathLike]] = None,
+) -> t.Optional[Path]:
+    """
+    Returns the directory discovery manifests are stored in, or None when
+    caching is disabled (no cache_dir argument and no AUTOCLI_CACHE_DIR).
+    """
+    if cache_dir is None:
+        cache_dir = os.environ.get(CACHE_DIR_ENV) or None
+    if cache_dir is None:
+        return None
+    return Path(cache_dir).expanduser()
+
+
+def manifest_path(cache_dir: Path, pkg_name: str, pkg_dir: Path) -> Path:
+    """
+    Returns the manifest file for a command package. The physical location is
+    part of the key so two checkouts of the same package never share a manifest.
+    """
+    digest = hashlib.sha1(str(pkg_dir.resolve()).encode("utf-8")).hexdigest()[:12]
+    return cache_dir / f"{pkg_name}-{digest}.json"
+
+
+def stat_key(path: t.Union[str, os.PathLike]) -> t.Optional[t.List[int]]:
+    """Returns the [mtime_ns, size] pair used to detect a changed file."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def directories_unchanged(pkg_dir: Path, dirs: t.Dict[str, int]) -> bool:
+    """
+    Checks the recorded directory mtimes (see _scan.scan_package) against the
+    filesystem. Adding, removing or renaming a file always touches the mtime
+    of its directory, so these are enough to notice layout changes without
+    listing the tree again.
+    """
+    root = str(pkg_dir)
+    for relative, mtime_ns in dirs.items():
+        try:
+            if os.stat(os.path.join(root, relative)).st_mtime_ns != mtime_ns:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def load_manifest(
+    path: Path, pkg_name: str, pkg_dir: Path, ignore: t.Sequence[str] = ()
+) -> t.Optional[dict]:
+    """
+    Reads a manifest, returning None if it is missing, unreadable, from another
+    manifest version or recorded for a different package location or set of
+    ignore patterns.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if (
+        not isinstance(manifest, dict)
+        or manifest.get("version") != MANIFEST_VERSION
+        or manifest.get("package") != pkg_name
+        or manifest.get("root") != str(pkg_dir)
+        or manifest.get("ignore") != list(ignore)
+    ):
+        return None
+    return manifest
+
+
+def save_manifest(path: Path, manifest: dict) -> None:
+    """
+    Writes a manifest atomically. Failures are reported but never fatal: a
+    read-only cache directory only costs the next run a rescan.
+    """
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Warning: Could not write discovery cache {path}: {e}", file=sys.stderr)
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
+def new_manifest(pkg_name: str, pkg_dir: Path, ignore: t.Sequence[str] = ()) -> dict:
+    return {
+        "version": MANIFEST_VERSION,
+        "package": pkg_name,
+        "root": str(pkg_dir),
+        "ignore": list(ignore),
+        "dirs": {},
+        "modules": {},
+        "support": {},
+        "help": {},
+    }
+
+
+def refresh_entries(
+    pkg_dir: Path,
+    found_modules: t.List[CommandEntry],
+    cached_modules: t.Dict[str, t.Dict[str, t.Any]],
+) -> t.Dict[str, t.Optional[t.List[int]]]:
+    """
+    Stats the source of every found module. Modules whose source still has the
+    recorded mtime and size take their cached validity, help, options and
+    parse table; anything new or modified starts out unknown (valid=None).
+    Returns the stats by path for module_table().
+    """
+    stats = {}
+    root = str(pkg_dir)
+    for mod_info in found_modules:
+        stat = stat_key(os.path.join(root, mod_info.path))
+        cached = cached_modules.get(mod_info.path)
+        if cached is not None and stat is not None and cached.get("stat") == stat:
+            mod_info.valid = cached.get("valid")
+            mod_info.help = cached.get("help")
+            mod_info.options = cached.get("options")
+            mod_info.table = cached.get("table")
+        else:
+            mod_info.valid = mod_info.help = mod_info.options = mod_info.table = None
+        stats[mod_info.path] = stat
+    return stats
+
+
+def module_table(
+    found_modules: t.Iterable[CommandEntry],
+    stats: t.Dict[str, t.Optional[t.List[int]]],
+) -> t.Dict[str, t.Dict[str, t.Any]]:
+    """Builds the manifest module table: every entry plus its source's stat."""
+    return {
+        mod_info.path: dict(mod_info.to_dict(), stat=stats[mod_info.path])
+        for mod_info in found_modules
+    }
+
+
+def support_modules(
+    pkg_name: str,
+    pkg_dir: Path,
+    found_modules: t.Iterable[CommandEntry],
+) -> t.Dict[str, t.Optional[t.List[int]]]:
+    """
+    Returns the stats by path of the package's modules that are imported but
+    are not valid commands themselves: package __init__ files and helper
+    modules that commands build their parsers with. A change to any of them
+    can change every command's options and help, which the stats of the
+    command modules alone would not reveal.
+    """
+    commands = {mod_info.path for mod_info in found_modules if mod_info.valid is True}
+    root = os.path.realpath(pkg_dir)
+    prefix = f"{pkg_name}."
+    support = {}
+    for name, module in list(sys.modules.items()):
+        if name != pkg_name and not name.startswith(prefix):
+            continue
+        path = getattr(module, "__file__", None)
+        if not path:
+            continue
+        relative = os.path.relpath(os.path.realpath(path), root).replace(os.sep, "/")
+        if relative.startswith("../") or relative in commands:
+            continue
+        support[relative] = stat_key(path)
+    return support
+
+
+def support_unchanged(pkg_dir: Path, support: t.Dict[str, t.Optional[t.List[int]]]) -> bool:
+    """Checks the recorded stats of support_modules() against the filesystem."""
+    root = str(pkg_dir)
+    return all(
+        stat_key(os.path.join(root, relative)) == stat for relative, stat in support.items()
+    )
@@ -0,0 +1,102 @@
+import argparse
+import typing as t
+
+from ._suggest import ChoiceIndex
+
+# Invalid choices in groups larger than this are not answered with the list
+# of every name, which is unreadable (and slow to format) for big trees
+MAX_LISTED_CHOICES = 20
+
+# Names shown when a prefix matches several commands
+MAX_AMBIGUOUS_MATCHES = 10
+
+
+class CommandSubParsersAction(argparse._SubParsersAction):
+    """
+    A subparsers action that accepts any unambiguous prefix of a command name
+    (`us ad` for `user add`) when allow_abbrev is set, and answers a mistyped
+    name with the closest names instead of the list of every choice. The
+    full name is what ends up in the namespace.
+
+    Name lookups go through a ChoiceIndex that is built on the first name
+    that is not an exact match, so correctly spelled commands never pay
+    for it.
+    """
+
+    allow_abbrev = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._choice_index: t.Optional[ChoiceIndex] = None
+
+    def add_parser(self, name: str, **kwargs) -> argparse.ArgumentParser:
+        if issubclass(self._parser_class, CommandParser):
+            kwargs.setdefault("allow_abbrev", self.allow_abbrev)
+        self._choice_index = None
+        return super().add_parser(name, **kwargs)
+
+    def match(self, value: str) -> str:
+        """
+        Returns the command name value stands for, or raises an ArgumentError
+        saying why it stands for none (unknown or ambiguous).
+        """
+        if value in self.choices:
+            return value
+
+        index = self._choice_index
+        if index is None:
+            index = self._choice_index = ChoiceIndex(self.choices)
+
+        if self.allow_abbrev and value:
+            matches = index.with_prefix(value, MAX_AMBIGUOUS_MATCHES + 1)
+            if len(matches) == 1:
+                return matches[0]
+            if matches:
+                listed = ", ".join(matches[:MAX_AMBIGUOUS_MATCHES])
+                if len(matches) > MAX_AMBIGUOUS_MATCHES:
+                    listed += ", ..."
+                raise argparse.ArgumentError(
+                    self, f"ambiguous choice: {value!r} could match {listed}"
+                )
+
+        suggestions = index.suggest(value)
+        if suggestions:
+            hint = "did you mean " + " or ".join(map(repr, suggestions)) + "?"
+        elif len(self.choices) <= MAX_LISTED_CHOICES:
+            hint = "choose from " + ", ".join(map(repr, self.choices))
+        else:
+            count = len(self.choices)
+            hint = f"see '{self._prog_prefix} --help' for the {count} choices"
+        raise argparse.ArgumentError(self, f"invalid choice: {value!r} ({hint})")
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        values = [self.match(values[0])] + list(values[1:])
+        super().__call__(parser, namespace, values, option_string)
+
+
+class CommandParser(argparse.ArgumentParser):
+    """
+    The parser create_command_parser returns. Its subparsers (and those of
+    every parser created below it) are CommandSubParsersActions, so command
+    names resolve by unique prefix and typos get suggestions. Passing
+    allow_abbrev=False turns command abbreviations off along with those of
+    long options.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.register("action", "parsers", CommandSubParsersAction)
+
+    def add_subparsers(self, **kwargs):
+        action = super().add_subparsers(**kwargs)
+        if isinstance(action, CommandSubParsersAction):
+            action.allow_abbrev = self.allow_abbrev
+        return action
+
+    def _check_value(self, action, value):
+        # Runs before the action, so an unknown or ambiguous name is reported
+        # before any command module is imported
+        if isinstance(action, CommandSubParsersAction):
+            action.match(value)
+            return
+        super()._check_value(action, value)
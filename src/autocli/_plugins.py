@@ -0,0 +1,135 @@
+import os
+import sys
+import json
+import hashlib
+import importlib
+import types
+import typing as t
+from pathlib import Path
+
+from . import _manifest
+
+# Bump whenever the on-disk layout of the entry-point cache changes
+PLUGINS_VERSION = 1
+
+# {"name": ..., "value": "dist_pkg.commands", "dist": ...}
+EntryPoint = t.Dict[str, t.Optional[str]]
+
+
+def distributions_fingerprint(
+    path: t.Optional[t.Sequence[str]] = None,
+) -> t.List[t.List[t.Any]]:
+    """
+    Returns the mtime of every existing sys.path entry. Installing, upgrading
+    or removing a distribution adds or removes its .dist-info directory (or
+    .egg-link/.pth file) in one of them, so an unchanged fingerprint means the
+    set of installed distributions is unchanged.
+    """
+    fingerprint = []
+    for entry in sys.path if path is None else path:
+        try:
+            fingerprint.append([entry, os.stat(entry or ".").st_mtime_ns])
+        except OSError:
+            continue
+    return fingerprint
+
+
+def find_entry_points(group: str) -> t.List[EntryPoint]:
+    """
+    Reads the entry points of a group from the metadata of every installed
+    distribution (the slow part), sorted by name so precedence is stable.
+    """
+    import importlib.metadata
+
+    entry_points = importlib.metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        selected = entry_points.select(group=group)
+    else:  # Python < 3.10
+        selected = entry_points.get(group, [])
+
+    found = [
+        {
+            "name": ep.name,
+            "value": ep.value,
+            "dist": getattr(getattr(ep, "dist", None), "name", None),
+        }
+        for ep in selected
+    ]
+    return sorted(found, key=lambda ep: (ep["name"], ep["value"]))
+
+
+def cache_path(cache_dir: Path, group: str) -> Path:
+    """Returns the cache file for a group under the current sys.path."""
+    key = "\0".join([group] + sys.path)
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+    return cache_dir / f"entry-points-{digest}.json"
+
+
+def resolve_entry_points(
+    group: str, cache_dir: t.Optional[Path] = None
+) -> t.List[EntryPoint]:
+    """
+    Returns the entry points of a group. With a cache directory the result is
+    reused until distributions_fingerprint() changes, so only runs after an
+    install or uninstall pay for reading distribution metadata.
+    """
+    if cache_dir is None:
+        return find_entry_points(group)
+
+    cache_file = cache_path(cache_dir, group)
+    fingerprint = distributions_fingerprint()
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        cached = None
+
+    if (
+        isinstance(cached, dict)
+        and cached.get("version") == PLUGINS_VERSION
+        and cached.get("group") == group
+        and cached.get("fingerprint") == fingerprint
+    ):
+        return cached["entry_points"]
+
+    entry_points = find_entry_points(group)
+    _manifest.save_manifest(
+        cache_file,
+        {
+            "version": PLUGINS_VERSION,
+            "group": group,
+            "fingerprint": fingerprint,
+            "entry_points": entry_points,
+        },
+    )
+    return entry_points
+
+
+def load_entry_point(value: str) -> types.ModuleType:
+    """Imports the command package an entry point value ("pkg.commands") names."""
+    module_name, _, attr = value.partition(":")
+    package = importlib.import_module(module_name.strip())
+    for name in filter(None, attr.strip().split(".")):
+        package = getattr(package, name)
+    if not isinstance(package, types.ModuleType):
+        raise TypeError(f"{value} is not a module")
+    return package
+
+
+def load_plugin_packages(
+    group: str, cache_dir: t.Optional[Path] = None
+) -> t.List[types.ModuleType]:
+    """
+    Imports the command packages registered under an entry-point group. A
+    plugin that fails to import is reported and skipped.
+    """
+    packages = []
+    for ep in resolve_entry_points(group, cache_dir):
+        try:
+            packages.append(load_entry_point(ep["value"]))
+        except Exception as e:
+            print(
+                f"Warning: Skipping command plugin '{ep['name']}' ({ep['value']}): {e}",
+                file=sys.stderr,
+            )
+    return packages
@@ -0,0 +1,166 @@
+import os
+import sys
+import json
+import time
+import atexit
+import contextlib
+import typing as t
+
+# Environment variable that turns profiling on without code changes:
+# "1"/"true"/"stderr" prints a report to stderr, anything else is a JSON path
+PROFILE_ENV = "AUTOCLI_PROFILE"
+
+ProfileTarget = t.Optional[t.Union[bool, str, os.PathLike]]
+
+
+class StartupProfile:
+    """
+    Collects high-resolution startup timings: named phases (discovery,
+    registration, parse_args) and, per command module, the time spent in
+    importlib.import_module, in autocli_setup_parser, the number of modules
+    newly added to sys.modules by its import, and which top-level packages
+    its import and setup pulled in (candidates for autocli.lazy_import).
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.phases: t.List[t.Tuple[str, int]] = []
+        self.modules: t.Dict[str, t.Dict[str, int]] = {}
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter_ns() - start))
+
+    @contextlib.contextmanager
+    def module_step(self, import_name: str, step: str):
+        stats = self.modules.setdefault(
+            import_name, {"import_ns": 0, "setup_ns": 0, "new_modules": 0, "imports": {}}
+        )
+        modules_before = set(sys.modules)
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            stats[f"{step}_ns"] += time.perf_counter_ns() - start
+            new_names = sys.modules.keys() - modules_before
+            if step == "import":
+                stats["new_modules"] += len(new_names)
+            _count_imports(stats["imports"], new_names, import_name)
+
+    def as_dict(self) -> t.Dict[str, t.Any]:
+        modules = [
+            dict(stats, module=name, total_ns=stats["import_ns"] + stats["setup_ns"])
+            for name, stats in self.modules.items()
+        ]
+        modules.sort(key=lambda m: m["total_ns"], reverse=True)
+        return {
+            "phases": [{"phase": name, "ns": ns} for name, ns in self.phases],
+            "modules": modules,
+        }
+
+    def format_report(self) -> str:
+        data = self.as_dict()
+        lines = ["autocli startup profile (ms)"]
+        for phase in data["phases"]:
+            lines.append(f"  {phase['phase']:<28}{phase['ns'] / 1e6:>10.3f}")
+
+        if data["modules"]:
+            width = max(len(m["module"]) for m in data["modules"])
+            lines.append("")
+            lines.append(
+                f"  {'module':<{width}}  {'import':>10}{'setup':>10}{'total':>10}{'imports':>9}"
+            )
+            for m in data["modules"]:
+                lines.append(
+                    f"  {m['module']:<{width}}  {m['import_ns'] / 1e6:>10.3f}"
+                    f"{m['setup_ns'] / 1e6:>10.3f}{m['total_ns'] / 1e6:>10.3f}"
+                    f"{m['new_modules']:>9}"
+                )
+
+        # Which command modules pull in other packages before run_command
+        paying = [m for m in data["modules"] if m["imports"]]
+        if paying:
+            width = max(len(m["module"]) for m in paying)
+            lines.append("")
+            lines.append("  imported while building the parser (package: modules)")
+            for m in paying:
+                imports = sorted(m["imports"].items(), key=lambda item: (-item[1], item[0]))
+                listing = ", ".join(f"{name}: {count}" for name, count in imports)
+                lines.append(f"  {m['module']:<{width}}  {listing}")
+        return "\n".join(lines)
+
+    def emit(self, target: t.Union[bool, str, os.PathLike]) -> None:
+        """Prints the report to stderr (target True) or writes JSON to a path."""
+        if target is True:
+            print(self.format_report(), file=sys.stderr)
+            return
+        try:
+            with open(target, "w", encoding="utf-8") as f:
+                json.dump(self.as_dict(), f, indent=2)
+        except OSError as e:
+            print(f"Warning: Could not write startup profile {target}: {e}", file=sys.stderr)
+
+
+def _count_imports(
+    counts: t.Dict[str, int], new_names: t.Iterable[str], import_name: str
+) -> None:
+    """
+    Adds the newly imported modules to counts by top-level package, leaving
+    out the command module itself and its parent packages.
+    """
+    parts = import_name.split(".")
+    own = {".".join(parts[: i + 1]) for i in range(len(parts))}
+    for name in new_names:
+        if name not in own:
+            top = name.partition(".")[0]
+            counts[top] = counts.get(top, 0) + 1
+
+
+class NullProfile:
+    """Stands in for StartupProfile when profiling is off."""
+
+    enabled = False
+
+    def phase(self, name: str):
+        return contextlib.nullcontext()
+
+    def module_step(self, import_name: str, step: str):
+        return contextlib.nullcontext()
+
+
+NULL_PROFILE = NullProfile()
+
+Profile = t.Union[StartupProfile, NullProfile]
+
+
+def resolve_profile_target(profile: ProfileTarget = None) -> ProfileTarget:
+    """
+    Normalizes the profile argument (or AUTOCLI_PROFILE) to False, True
+    (stderr report) or a JSON output path.
+    """
+    if profile is None:
+        profile = os.environ.get(PROFILE_ENV, "")
+        if profile.lower() in ("", "0", "false", "no", "off"):
+            return False
+        if profile.lower() in ("1", "true", "yes", "on", "stderr"):
+            return True
+    return profile
+
+
+def start_profile(profile: ProfileTarget = None) -> Profile:
+    """
+    Returns a collecting profile that reports at interpreter exit (so work
+    done lazily during parse_args is included), or NULL_PROFILE when off.
+    """
+    target = resolve_profile_target(profile)
+    if target is False:
+        return NULL_PROFILE
+
+    startup_profile = StartupProfile()
+    atexit.register(startup_profile.emit, target)
+    return startup_profile
@@ -0,0 +1,298 @@
+import io
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import functools
+import threading
+import contextlib
+import typing as t
+from pathlib import Path
+
+from . import _manifest
+
+# Namespace attribute the --no-cache/--refresh flags of a cached command set
+CACHE_DEST = "autocli_cache"
+NO_CACHE = "off"
+REFRESH = "refresh"
+
+# Bump whenever the layout of a stored result changes
+RESULT_VERSION = 1
+
+
+class _Uncacheable(Exception):
+    pass
+
+
+def _key_default(value: t.Any) -> t.Any:
+    if isinstance(value, os.PathLike):
+        return os.fspath(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    raise _Uncacheable
+
+
+def result_key(func: t.Callable, command: str, args: argparse.Namespace) -> t.Optional[str]:
+    """
+    Returns the cache key of a call: a digest of the command, the function
+    and every parsed argument (sorted by dest, so the order options were
+    given in does not matter). Returns None when an argument has no stable
+    JSON form (an open file, say), so the call is never cached.
+    """
+    values = {
+        dest: value
+        for dest, value in vars(args).items()
+        if dest not in ("func", CACHE_DEST) and not callable(value)
+    }
+    try:
+        normalized = json.dumps(
+            [command, func.__module__, func.__qualname__, values],
+            sort_keys=True,
+            default=_key_default,
+        )
+    except (_Uncacheable, TypeError, ValueError):
+        return None
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def default_cache_root() -> Path:
+    """AUTOCLI_CACHE_DIR, else the user cache directory (XDG_CACHE_HOME or ~/.cache)."""
+    cache_dir = _manifest.resolve_cache_dir()
+    if cache_dir is None:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join("~", ".cache")
+        cache_dir = Path(base).expanduser() / "autocli"
+    return cache_dir / "results"
+
+
+class ResultStore:
+    """
+    The stored output of one cached function: a JSON file per key holding
+    the captured stdout and stderr. A hit touches its file, so the file
+    times order the entries by last use; storing a result evicts the least
+    recently used ones beyond max_entries or max_bytes.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        ttl: t.Optional[float],
+        max_entries: int,
+        max_bytes: int,
+    ):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def get(self, key: str) -> t.Optional[t.Dict[str, t.Any]]:
+        path = self.directory / f"{key}.json"
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        expired = self.ttl is not None and entry.get("created", 0) + self.ttl < time.time()
+        if entry.get("version") != RESULT_VERSION or expired:
+            with contextlib.suppress(OSError):
+                path.unlink()
+            return None
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        return entry
+
+    def put(self, key: str, stdout: str, stderr: str) -> None:
+        entry = {
+            "version": RESULT_VERSION,
+            "created": time.time(),
+            "stdout": stdout,
+            "stderr": stderr,
+        }
+        data = json.dumps(entry).encode("utf-8")
+        if len(data) > self.max_bytes:
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / f"{key}.json"
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+            self.evict()
+        except OSError as e:
+            print(
+                f"Warning: Could not store cached result in {self.directory}: {e}",
+                file=sys.stderr,
+            )
+
+    def evict(self) -> None:
+        """Removes the least recently used entries beyond the caps."""
+        entries = []
+        for path in self.directory.glob("*.json"):
+            with contextlib.suppress(OSError):
+                stat = path.stat()
+                entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort(reverse=True)
+
+        total = 0
+        for count, (_mtime, size, path) in enumerate(entries, start=1):
+            total += size
+            if count > self.max_entries or total > self.max_bytes:
+                with contextlib.suppress(OSError):
+                    path.unlink()
+
+
+class _CapturingStream(io.TextIOBase):
+    """
+    Stands in for sys.stdout/sys.stderr while cached commands run: writes
+    go through to the stream it replaced and also to every capture buffer
+    the writing thread has open, so concurrent runs (fan-out threads) never
+    capture each other's output.
+    """
+
+    def __init__(self, stream: t.TextIO, name: str):
+        self._stream = stream
+        self._name = name
+
+    def write(self, s: str) -> int:
+        for buffer in getattr(_captures, self._name, ()):
+            buffer.write(s)
+        return self._stream.write(s)
+
+    def flush(self) -> None:
+        self._stream.flush()
+
+    def isatty(self) -> bool:
+        return self._stream.isatty()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+# The capture buffers open in each thread, innermost last
+_captures = threading.local()
+_capture_lock = threading.Lock()
+_capture_depth = 0
+_saved_streams: t.Optional[t.Tuple[t.TextIO, t.TextIO]] = None
+
+
+@contextlib.contextmanager
+def _capture_output() -> t.Iterator[t.Tuple[io.StringIO, io.StringIO]]:
+    """Captures what the current thread writes to sys.stdout and sys.stderr."""
+    global _capture_depth, _saved_streams
+
+    with _capture_lock:
+        if _capture_depth == 0:
+            _saved_streams = sys.stdout, sys.stderr
+            sys.stdout = _CapturingStream(sys.stdout, "stdout")
+            sys.stderr = _CapturingStream(sys.stderr, "stderr")
+        _capture_depth += 1
+    out, err = io.StringIO(), io.StringIO()
+    _captures.stdout = getattr(_captures, "stdout", ()) + (out,)
+    _captures.stderr = getattr(_captures, "stderr", ()) + (err,)
+    try:
+        yield out, err
+    finally:
+        _captures.stdout = _captures.stdout[:-1]
+        _captures.stderr = _captures.stderr[:-1]
+        with _capture_lock:
+            _capture_depth -= 1
+            if _capture_depth == 0:
+                # Leave the streams alone if someone replaced them meanwhile
+                if isinstance(sys.stdout, _CapturingStream):
+                    sys.stdout = _saved_streams[0]
+                if isinstance(sys.stderr, _CapturingStream):
+                    sys.stderr = _saved_streams[1]
+                _saved_streams = None
+
+
+def cached(
+    ttl: t.Optional[float] = None,
+    max_entries: int = 128,
+    max_bytes: int = 16 * 1024 * 1024,
+    cache_dir: t.Optional[t.Union[str, os.PathLike]] = None,
+) -> t.Callable[[t.Callable], t.Callable]:
+    """
+    Memoizes the output of an expensive, read-only run_command:
+
+        @autocli.cached(ttl=600, max_entries=50)
+        def run_command(args):
+            print(build_report(args.month))
+
+    The first run with a given command and set of parsed arguments runs the
+    function, showing its output as usual while capturing it; later runs
+    within ttl seconds (forever when None) print the captured stdout and
+    stderr again without calling it. At most max_entries results and
+    max_bytes of them are kept per function, the least recently used going
+    first, in cache_dir (default: AUTOCLI_CACHE_DIR or ~/.cache/autocli,
+    under results/).
+
+    autocli adds --no-cache (run without the cache) and --refresh (run and
+    replace the cached result) to the command's parser. Only runs that
+    return normally are stored; exceptions, sys.exit() and returned values
+    pass through uncached, as do arguments without a JSON form (open files).
+    Output written to sys.stdout.buffer directly is not captured.
+    """
+
+    def decorator(func: t.Callable) -> t.Callable:
+        import inspect
+
+        if inspect.iscoroutinefunction(func):
+            raise TypeError("autocli.cached does not support coroutine commands")
+
+        root = Path(cache_dir).expanduser() if cache_dir is not None else None
+        name = f"{func.__module__}.{func.__qualname__}".replace("<", "").replace(">", "")
+        stores: t.Dict[Path, ResultStore] = {}
+
+        def get_store() -> ResultStore:
+            # AUTOCLI_CACHE_DIR is read at call time, not at import time
+            directory = (root or default_cache_root()) / name
+            store = stores.get(directory)
+            if store is None:
+                store = stores[directory] = ResultStore(directory, ttl, max_entries, max_bytes)
+            return store
+
+        @functools.wraps(func)
+        def run_command(args: argparse.Namespace):
+            from .telemetry import command_path
+
+            mode = getattr(args, CACHE_DEST, None)
+            key = None if mode == NO_CACHE else result_key(func, command_path(args), args)
+            if key is None:
+                return func(args)
+
+            store = get_store()
+            entry = None if mode == REFRESH else store.get(key)
+            if entry is not None:
+                sys.stdout.write(entry["stdout"])
+                sys.stderr.write(entry["stderr"])
+                return None
+
+            with _capture_output() as (out, err):
+                result = func(args)
+            if result is None:
+                store.put(key, out.getvalue(), err.getvalue())
+            return result
+
+        run_command.__autocli_cached__ = True  # type: ignore[attr-defined]
+        return run_command
+
+    return decorator
+
+
+def add_cache_options(parser: argparse.ArgumentParser) -> None:
+    """Adds --no-cache and --refresh to the parser of a cached command."""
+    func = parser._defaults.get("func")
+    if not getattr(func, "__autocli_cached__", False):
+        return
+    group = parser.add_argument_group("result cache")
+    if "--no-cache" not in parser._option_string_actions:
+        group.add_argument(
+            "--no-cache", dest=CACHE_DEST, action="store_const", const=NO_CACHE,
+            help="Run the command without reading or storing a cached result.",
+        )
+    if "--refresh" not in parser._option_string_actions:
+        group.add_argument(
+            "--refresh", dest=CACHE_DEST, action="store_const", const=REFRESH,
+            help="Run the command and replace its cached result.",
+        )
@@ -0,0 +1,203 @@
+import os
+import re
+import fnmatch
+import typing as t
+from pathlib import Path
+
+from ._index import INDEX_MODULE
+from .tree import CommandEntry
+
+_PYCACHE = "__pycache__"
+
+
+def compile_ignore(
+    patterns: t.Optional[t.Iterable[str]],
+) -> t.Optional[t.Callable[[str], t.Any]]:
+    """
+    Combines fnmatch-style ignore patterns into one matcher, or returns None
+    when there are none. Patterns are case-sensitive on every platform.
+    """
+    patterns = list(patterns or ())
+    if not patterns:
+        return None
+    return re.compile("|".join(fnmatch.translate(p) for p in patterns)).match
+
+
+def module_entry(pkg_name: str, relative: str) -> CommandEntry:
+    """
+    Describes the command module at a package-relative posix path, e.g.
+    user/db__connect.py -> ('user', 'db', 'connect'), pkg.user.db__connect
+    """
+    stem = relative[:-3]
+    return CommandEntry(
+        stem.replace("/", "__").split("__"),
+        f"{pkg_name}.{stem.replace('/', '.')}",
+        relative,
+    )
+
+
+def scan_order(relative: str) -> t.List[t.Tuple[int, str]]:
+    """
+    Sort key of a package-relative posix path in the order every scanner
+    returns modules: depth-first, and within a directory its modules by name
+    before its subdirectories by name (so user.py, user/add.py, zz.py sorts
+    as user.py, zz.py, user/add.py).
+    """
+    *directories, name = relative.split("/")
+    return [(1, directory) for directory in directories] + [(0, name)]
+
+
+def scan_package(
+    pkg_dir: Path,
+    pkg_name: str,
+    ignore: t.Optional[t.Iterable[str]] = None,
+    dirs: t.Optional[t.Dict[str, int]] = None,
+) -> t.List[CommandEntry]:
+    """
+    Walks the package directory with os.scandir and returns a CommandEntry
+    (command parts, import name and package-relative path) for every command
+    module (*.py), in scan_order(): the order os.scandir lists a directory in
+    depends on the filesystem (and pathlib.Path.rglob's order on the Python
+    version), so entries are sorted by name to keep discovery deterministic.
+
+    Bytecode caches and directories that cannot be part of an import name are
+    pruned without being listed. A file or directory is also skipped when an
+    ignore pattern matches its name or its posix path relative to pkg_dir
+    (e.g. "tests", "vendor", "legacy/*", "*_test.py").
+
+    When dirs is given, the mtime of every directory visited is recorded in it
+    (see _manifest.directories_unchanged). Each directory is stat'ed before it
+    is listed so a file added mid-scan still changes its recorded mtime.
+    """
+    is_ignored = compile_ignore(ignore)
+    found_modules: t.List[CommandEntry] = []
+    index_file = f"{INDEX_MODULE}.py"
+
+    def scan(path: str, prefix: str) -> None:
+        if dirs is not None:
+            try:
+                dirs[prefix[:-1] or "."] = os.stat(path).st_mtime_ns
+            except OSError:
+                return
+        try:
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            return
+
+        subdirs = []
+        for entry in entries:
+            name = entry.name
+            relative = prefix + name
+            if is_ignored is not None and (is_ignored(name) or is_ignored(relative)):
+                continue
+
+            if name.endswith(".py"):
+                if name == "__init__.py" or relative == index_file:
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+
+                found_modules.append(module_entry(pkg_name, relative))
+            # Bytecode caches and directories whose name cannot be part of an
+            # import name (.git, .venv, ...) never hold command modules.
+            # Symlinked directories are not followed, like rglob
+            elif name != _PYCACHE and "." not in name:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry)
+                except OSError:
+                    continue
+
+        for entry in subdirs:
+            scan(entry.path, f"{prefix}{entry.name}/")
+
+    scan(str(pkg_dir), "")
+    return found_modules
+
+
+def scan_resources(
+    root: t.Any,
+    pkg_name: str,
+    ignore: t.Optional[t.Iterable[str]] = None,
+) -> t.List[CommandEntry]:
+    """
+    scan_package() for a package that is not a directory on disk, such as one
+    inside a zipapp or zipimport archive. The tree is walked through the
+    importlib.resources Traversable of the package (importlib.resources.files)
+    with the same pruning and ignore rules, and in the same order.
+    """
+    is_ignored = compile_ignore(ignore)
+    found_modules: t.List[CommandEntry] = []
+    index_file = f"{INDEX_MODULE}.py"
+
+    def scan(node: t.Any, prefix: str) -> None:
+        subdirs = []
+        for entry in sorted(node.iterdir(), key=lambda entry: entry.name):
+            name = entry.name
+            relative = prefix + name
+            if is_ignored is not None and (is_ignored(name) or is_ignored(relative)):
+                continue
+
+            if name.endswith(".py"):
+                if name != "__init__.py" and relative != index_file and entry.is_file():
+                    found_modules.append(module_entry(pkg_name, relative))
+            elif name != _PYCACHE and "." not in name and entry.is_dir():
+                subdirs.append(entry)
+
+        for entry in subdirs:
+            scan(entry, f"{prefix}{entry.name}/")
+
+    scan(root, "")
+    return found_modules
+
+
+def scan_zip(
+    archive: str,
+    prefix: str,
+    pkg_name: str,
+    ignore: t.Optional[t.Iterable[str]] = None,
+) -> t.List[CommandEntry]:
+    """
+    scan_package() for a package at prefix (e.g. "app/commands/") inside a
+    zip archive imported with zipimport. Reading the archive's table of
+    contents once is far cheaper than walking it as a tree; its members are
+    sorted into scan_order() afterwards.
+    """
+    import zipfile
+
+    is_ignored = compile_ignore(ignore)
+    index_file = f"{INDEX_MODULE}.py"
+    pruned: t.Dict[str, bool] = {}
+
+    def is_pruned(directory: str) -> bool:
+        # directory is package-relative with a trailing slash, e.g. "user/db/"
+        if directory not in pruned:
+            parent, _, name = directory[:-1].rpartition("/")
+            skip = (parent and is_pruned(parent + "/")) or name == _PYCACHE or "." in name
+            if not skip and is_ignored is not None:
+                skip = is_ignored(name) or is_ignored(directory[:-1])
+            pruned[directory] = bool(skip)
+        return pruned[directory]
+
+    with zipfile.ZipFile(archive) as zf:
+        names = zf.namelist()
+
+    found_modules: t.List[CommandEntry] = []
+    for member in names:
+        if not member.startswith(prefix) or not member.endswith(".py"):
+            continue
+        relative = member[len(prefix) :]
+        directory, _, name = relative.rpartition("/")
+        if name == "__init__.py" or relative == index_file:
+            continue
+        if directory and is_pruned(directory + "/"):
+            continue
+        if is_ignored is not None and (is_ignored(name) or is_ignored(relative)):
+            continue
+        found_modules.append(module_entry(pkg_name, relative))
+    found_modules.sort(key=lambda mod_info: scan_order(mod_info.path))
+    return found_modules
@@ -0,0 +1,195 @@
+import os
+import ast
+import typing as t
+from pathlib import Path
+
+# Trees smaller than this are analyzed in-process; process start-up would cost
+# more than it saves
+PARALLEL_THRESHOLD = 256
+
+REQUIRED_FUNCTIONS = ("autocli_setup_parser", "run_command")
+
+
+def analyze_source(source: str, filename: str = "<command>") -> t.Dict[str, t.Any]:
+    """
+    Statically inspects a command module without executing it.
+
+    Returns a dict with:
+        defines: the required functions (autocli_setup_parser, run_command)
+            the module defines, assigns or imports at top level.
+        valid: whether both required functions were found, or None when that
+            cannot be decided statically (syntax error, `import *`).
+        help: the help= string given to add_parser() in autocli_setup_parser,
+            if it is a literal. f-strings that only interpolate the command
+            name parameter are kept as a template with "{command_name}".
+        arguments: one entry per add_argument() call in autocli_setup_parser
+            with its literal option strings ("flags") and literal keyword
+            arguments ("options"); keywords that are not literals are listed
+            under "dynamic".
+        error: the syntax error message when the source does not parse.
+    """
+    result: t.Dict[str, t.Any] = {
+        "defines": [],
+        "valid": None,
+        "help": None,
+        "arguments": [],
+        "error": None,
+    }
+    try:
+        tree = ast.parse(source, filename=filename)
+    except SyntaxError as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+    setup_func = None
+    defines = set()
+    star_import = False
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            defines.add(node.name)
+            if node.name == "autocli_setup_parser":
+                setup_func = node
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            defines.update(alias.asname or alias.name for alias in node.names)
+            star_import = star_import or "*" in defines
+        elif isinstance(node, ast.Assign):
+            defines.update(
+                target.id for target in node.targets if isinstance(target, ast.Name)
+            )
+        elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+            defines.add(node.target.id)
+
+    result["defines"] = [name for name in REQUIRED_FUNCTIONS if name in defines]
+    if len(result["defines"]) == len(REQUIRED_FUNCTIONS):
+        result["valid"] = True
+    elif not star_import:
+        result["valid"] = False
+
+    if setup_func is not None:
+        params = setup_func.args.args
+        name_param = params[1].arg if len(params) > 1 else None
+        for node in ast.walk(setup_func):
+            if not isinstance(node, ast.Call) or not isinstance(node.func, ast.Attribute):
+                continue
+            if node.func.attr == "add_parser" and result["help"] is None:
+                for keyword in node.keywords:
+                    if keyword.arg == "help":
+                        result["help"] = _literal_string(keyword.value, name_param)
+            elif node.func.attr == "add_argument":
+                result["arguments"].append(_describe_argument(node))
+
+    return result
+
+
+def analyze_file(path: t.Union[str, os.PathLike]) -> t.Dict[str, t.Any]:
+    """
+    analyze_source() for a file on disk (or an importlib.resources Traversable,
+    e.g. inside a zip archive); unreadable files become errors.
+    """
+    if not hasattr(path, "read_text"):
+        path = Path(path)
+    try:
+        source = path.read_text(encoding="utf-8")
+    except (OSError, KeyError, UnicodeDecodeError) as e:
+        return {
+            "defines": [],
+            "valid": None,
+            "help": None,
+            "arguments": [],
+            "error": f"{type(e).__name__}: {e}",
+        }
+    return analyze_source(source, str(path))
+
+
+def analyze_files(
+    paths: t.Sequence[t.Union[str, os.PathLike]],
+    max_workers: t.Optional[int] = None,
+    parallel_threshold: int = PARALLEL_THRESHOLD,
+) -> t.List[t.Dict[str, t.Any]]:
+    """
+    Analyzes many command files, in a process pool for big trees. Results are
+    returned in the order of paths.
+    """
+    if len(paths) < parallel_threshold or max_workers == 1:
+        return [analyze_file(path) for path in paths]
+
+    # Only big trees pay for importing the pool machinery
+    import concurrent.futures
+
+    workers = max_workers or os.cpu_count() or 1
+    chunksize = max(1, len(paths) // (workers * 4))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(analyze_file, paths, chunksize=chunksize))
+
+
+def format_help(help_template: t.Optional[str], command_name: str) -> t.Optional[str]:
+    """Fills the command name into a help string returned by analyze_source()."""
+    if help_template is None:
+        return None
+    return help_template.replace("{command_name}", command_name)
+
+
+def option_strings(result: t.Dict[str, t.Any]) -> t.Optional[t.List[str]]:
+    """
+    Returns every option flag declared in an analyze_source() result, or None
+    when some add_argument() call has flags that are not literals.
+    """
+    options = ["-h", "--help"]
+    for argument in result["arguments"]:
+        if "*args" in argument["dynamic"]:
+            return None
+        options.extend(flag for flag in argument["flags"] if flag.startswith("-"))
+    return options
+
+
+def _literal_string(node: ast.AST, name_param: t.Optional[str]) -> t.Optional[str]:
+    """Returns a literal (or command-name-only f-string) as a string template."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+
+    if isinstance(node, ast.JoinedStr):
+        pieces = []
+        for value in node.values:
+            if isinstance(value, ast.Constant) and isinstance(value.value, str):
+                pieces.append(value.value)
+            elif (
+                isinstance(value, ast.FormattedValue)
+                and isinstance(value.value, ast.Name)
+                and value.value.id == name_param
+                and value.conversion == -1
+                and value.format_spec is None
+            ):
+                pieces.append("{command_name}")
+            else:
+                return None
+        return "".join(pieces)
+
+    return None
+
+
+def _describe_argument(call: ast.Call) -> t.Dict[str, t.Any]:
+    """Extracts the literal parts of an add_argument() call."""
+    flags = []
+    dynamic = []
+    for arg in call.args:
+        if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+            flags.append(arg.value)
+        else:
+            dynamic.append("*args")
+
+    options = {}
+    for keyword in call.keywords:
+        if keyword.arg is None:
+            dynamic.append("**kwargs")
+            continue
+        value = keyword.value
+        if isinstance(value, ast.Name) and keyword.arg == "type":
+            # Builtin converters are recorded by name (int, float, str, ...)
+            options[keyword.arg] = value.id
+            continue
+        try:
+            options[keyword.arg] = ast.literal_eval(value)
+        except (ValueError, TypeError):
+            dynamic.append(keyword.arg)
+
+    return {"flags": flags, "options": options, "dynamic": dynamic}
@@ -0,0 +1,102 @@
+import bisect
+import typing as t
+
+
+def edit_distance(a: str, b: str, limit: t.Optional[int] = None) -> int:
+    """
+    Levenshtein distance (insertions, deletions and substitutions). With a
+    limit, gives up as soon as the distance must exceed it and returns
+    limit + 1.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b),
+                )
+            )
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _bigrams(word: str) -> t.Set[str]:
+    padded = f" {word} "
+    return {padded[i : i + 2] for i in range(len(padded) - 1)}
+
+
+class ChoiceIndex:
+    """
+    The names of one subparsers action, indexed for abbreviation and typo
+    lookups. A sorted list answers prefix queries with a binary search.
+    Typos go through an inverted index of character bigrams: a name within k
+    edits of a word shares all but at most 2k of the word's bigrams, so only
+    the names found through the word's own bigrams are compared with it.
+    Both lookups stay far below a scan of every name, which matters for
+    groups of thousands of commands.
+    """
+
+    __slots__ = ("_names", "_bigrams", "_lengths")
+
+    def __init__(self, names: t.Iterable[str]):
+        self._names = sorted(names)
+        # Only built once a name is actually mistyped
+        self._bigrams: t.Optional[t.Dict[str, t.List[str]]] = None
+        self._lengths: t.Dict[int, t.List[str]] = {}
+
+    def with_prefix(self, prefix: str, limit: t.Optional[int] = None) -> t.List[str]:
+        """Returns the names starting with prefix (at most limit of them), sorted."""
+        matches = []
+        i = bisect.bisect_left(self._names, prefix)
+        while i < len(self._names) and self._names[i].startswith(prefix):
+            if limit is not None and len(matches) == limit:
+                break
+            matches.append(self._names[i])
+            i += 1
+        return matches
+
+    def suggest(self, word: str, limit: int = 3) -> t.List[str]:
+        """Returns up to limit names within a few edits of word, closest first."""
+        # Allow one edit per three characters, at most three
+        max_distance = min(3, (len(word) + 2) // 3)
+        found = []
+        for name in self._candidates(word, max_distance):
+            distance = edit_distance(word, name, max_distance)
+            if distance <= max_distance:
+                found.append((distance, name))
+        return [name for _, name in sorted(found)[:limit]]
+
+    def _candidates(self, word: str, max_distance: int) -> t.List[str]:
+        """Returns the names that can be within max_distance edits of word."""
+        if self._bigrams is None:
+            self._bigrams = {}
+            for name in self._names:
+                self._lengths.setdefault(len(name), []).append(name)
+                for bigram in _bigrams(name):
+                    self._bigrams.setdefault(bigram, []).append(name)
+
+        bigrams = _bigrams(word)
+        required = len(bigrams) - 2 * max_distance
+        if required <= 0:
+            # Too short for the bigrams to rule anything out
+            lengths = range(len(word) - max_distance, len(word) + max_distance + 1)
+            return [name for length in lengths for name in self._lengths.get(length, ())]
+
+        shared: t.Dict[str, int] = {}
+        for bigram in bigrams:
+            for name in self._bigrams.get(bigram, ()):
+                shared[name] = shared.get(name, 0) + 1
+        return [
+            name
+            for name, count in shared.items()
+            if count >= required and abs(len(name) - len(word)) <= max_distance
+        ]
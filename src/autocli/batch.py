@@ -0,0 +1,155 @@
+"""
+Batch execution: run many command lines against one parser in one process.
+
+Each input line is one invocation, either shell-style text
+(`user add alice -e alice@example.com`) or a JSON array of arguments, or a
+JSON object with an "argv" array. Blank lines and lines starting with '#'
+are skipped. Every invocation goes through dispatch(), so sys.exit(), argparse
+errors and exceptions inside a run_command end that line only. A JSON-lines
+report with each line's exit code and timing can be written alongside.
+
+With concurrency > 1, coroutine commands (`async def run_command`) from
+different lines run concurrently on one event loop, at most `concurrency` at
+a time; plain commands still run one after another.
+"""
+
+import sys
+import json
+import time
+import shlex
+import argparse
+import typing as t
+
+from ._dispatch import dispatch, dispatch_async
+
+FORMATS = ("auto", "lines", "jsonl")
+
+
+def parse_line(line: str, format: str = "auto") -> t.Optional[t.List[str]]:
+    """
+    Returns the argv for one input line, or None for blank and comment lines.
+    In auto format, lines starting with '[' or '{' are read as JSON.
+    """
+    stripped = line.strip()
+    if not stripped or (format != "jsonl" and stripped.startswith("#")):
+        return None
+
+    if format == "jsonl" or (format == "auto" and stripped[0] in "[{"):
+        value = json.loads(stripped)
+        if isinstance(value, dict):
+            value = value.get("argv")
+        if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+            raise ValueError("expected a JSON array of strings or an object with 'argv'")
+        return value
+
+    return shlex.split(stripped)
+
+
+def run_batch(
+    parser: argparse.ArgumentParser,
+    lines: t.Iterable[str],
+    format: str = "auto",
+    report: t.Optional[t.TextIO] = None,
+    stop_on_error: bool = False,
+    concurrency: int = 1,
+) -> int:
+    """
+    Runs every command line from lines, returning 0 when all of them
+    succeeded and 1 otherwise. If report is given, one JSON object per
+    invocation is written to it as it finishes: line number, argv, exit_code,
+    duration_ms (and error, when the line itself could not be read).
+    """
+    batch = _Batch(parser, format, report, stop_on_error)
+    if concurrency > 1:
+        import asyncio
+
+        asyncio.run(batch.run_concurrently(lines, concurrency))
+    else:
+        for line_number, line in enumerate(lines, start=1):
+            if batch.stopped:
+                break
+            argv = batch.read_line(line_number, line)
+            if argv is not None:
+                start = time.perf_counter()
+                batch.finish(line_number, argv, dispatch(parser, argv), start)
+
+    return 1 if batch.failures else 0
+
+
+class _Batch:
+    """Bookkeeping shared by the sequential and concurrent batch loops."""
+
+    def __init__(self, parser, format, report, stop_on_error):
+        self.parser = parser
+        self.format = format
+        self.report = report
+        self.stop_on_error = stop_on_error
+        self.failures = 0
+        self.stopped = False
+
+    def read_line(self, line_number: int, line: str) -> t.Optional[t.List[str]]:
+        """Parses one input line, recording unreadable lines as failures."""
+        try:
+            return parse_line(line, self.format)
+        except ValueError as e:
+            error = f"Error: Line {line_number} is not a valid command line: {e}"
+            print(error, file=sys.stderr)
+            self.finish(line_number, None, 2, time.perf_counter(), error)
+            return None
+
+    def finish(
+        self,
+        line_number: int,
+        argv: t.Optional[t.List[str]],
+        code: int,
+        start: float,
+        error: t.Optional[str] = None,
+    ) -> None:
+        # Output of one line must not interleave with the next one's
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+        if self.report is not None:
+            entry = {
+                "line": line_number,
+                "argv": argv,
+                "exit_code": code,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+            }
+            if error is not None:
+                entry["error"] = error
+            self.report.write(json.dumps(entry) + "\n")
+            self.report.flush()
+
+        if code != 0:
+            self.failures += 1
+            self.stopped = self.stop_on_error
+
+    async def run_concurrently(self, lines: t.Iterable[str], concurrency: int) -> None:
+        import asyncio
+
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks = set()
+
+        async def run_line(line_number, argv):
+            try:
+                start = time.perf_counter()
+                code = await dispatch_async(self.parser, argv)
+                self.finish(line_number, argv, code, start)
+            finally:
+                semaphore.release()
+
+        for line_number, line in enumerate(lines, start=1):
+            argv = self.read_line(line_number, line)
+            if argv is None:
+                continue
+            await semaphore.acquire()
+            if self.stopped:
+                semaphore.release()
+                break
+            task = asyncio.ensure_future(run_line(line_number, argv))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks)
@@ -0,0 +1,119 @@
+"""
+Shell completion that answers from the command index instead of the parser.
+
+The generated bash/zsh/fish scripts call the program again with
+AUTOCLI_COMPLETE=<shell> set and the words typed so far (the last one being
+the word under the cursor) as arguments. create_command_parser notices the
+variable right after discovery, prints one candidate per line and exits, so
+no command module is imported unless the options of the command being
+completed are not in the index, manifest or static metadata.
+"""
+
+import sys
+import typing as t
+
+from .tree import CommandEntry, CommandTree
+
+# Set by the shell scripts to ask the program for completions
+COMPLETE_ENV = "AUTOCLI_COMPLETE"
+
+SHELLS = ("bash", "zsh", "fish")
+
+HELP_OPTIONS = ["-h", "--help"]
+
+OptionLoader = t.Callable[[CommandEntry], t.Optional[t.List[str]]]
+
+BASH_TEMPLATE = """\
+_{func}_autocli_complete() {{
+    local IFS=$'\\n'
+    COMPREPLY=( $(AUTOCLI_COMPLETE=bash "${{COMP_WORDS[0]}}" "${{COMP_WORDS[@]:1:$COMP_CWORD}}" 2>/dev/null) )
+}}
+complete -o default -F _{func}_autocli_complete {prog}
+"""
+
+ZSH_TEMPLATE = """\
+#compdef {prog}
+_{func}_autocli_complete() {{
+    local -a candidates
+    candidates=("${{(@f)$(AUTOCLI_COMPLETE=zsh "${{words[1]}}" "${{(@)words[2,$CURRENT]}}" 2>/dev/null)}}")
+    compadd -- $candidates
+}}
+compdef _{func}_autocli_complete {prog}
+"""
+
+FISH_TEMPLATE = """\
+function __{func}_autocli_complete
+    set -l tokens (commandline -opc)
+    set -l current (commandline -ct)
+    env AUTOCLI_COMPLETE=fish $tokens "$current" 2>/dev/null
+end
+complete -c {prog} -f -a '(__{func}_autocli_complete)'
+"""
+
+TEMPLATES = {"bash": BASH_TEMPLATE, "zsh": ZSH_TEMPLATE, "fish": FISH_TEMPLATE}
+
+
+def completion_script(shell: str, prog: str) -> str:
+    """Returns the completion script for prog in the given shell."""
+    if shell not in TEMPLATES:
+        raise ValueError(f"Unsupported shell '{shell}' (choose from {', '.join(SHELLS)})")
+    func = "".join(c if c.isalnum() else "_" for c in prog)
+    return TEMPLATES[shell].format(prog=prog, func=func)
+
+
+def complete(
+    tree: CommandTree,
+    words: t.Sequence[str],
+    load_options: t.Optional[OptionLoader] = None,
+) -> t.List[str]:
+    """
+    Returns the completion candidates for words (everything after the program
+    name, the last entry being the partial word under the cursor).
+
+    Group and command names come straight from the tree of discovered
+    modules; a command's option flags come from its recorded options, or from
+    load_options(mod_info) when they were never recorded (which imports just
+    that one module).
+    """
+    words = list(words) or [""]
+    current = words[-1]
+
+    node = tree.root
+    for word in words[:-1]:
+        if word == "--":
+            return []
+        # Options, and positional values once a command is reached
+        if word.startswith("-") or not node.children:
+            continue
+        node = node.children.get(word)
+        if node is None:
+            return []
+
+    if node.children:
+        if current.startswith("-"):
+            return [flag for flag in HELP_OPTIONS if flag.startswith(current)]
+        return [name for name in node.children if name.startswith(current)]
+
+    if not current.startswith("-") and current:
+        return []
+
+    options: t.List[str] = []
+    for mod_info in node.entries:
+        flags = mod_info.options
+        if flags is None and load_options is not None:
+            flags = load_options(mod_info)
+        for flag in flags or HELP_OPTIONS:
+            if flag not in options:
+                options.append(flag)
+    return [flag for flag in options if flag.startswith(current)]
+
+
+def respond(
+    tree: CommandTree,
+    words: t.Sequence[str],
+    load_options: t.Optional[OptionLoader] = None,
+) -> None:
+    """Prints the candidates for a completion request, one per line."""
+    candidates = complete(tree, words, load_options)
+    if candidates:
+        sys.stdout.write("\n".join(candidates) + "\n")
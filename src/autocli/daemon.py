@@ -0,0 +1,272 @@
+"""
+Persistent server mode for short-lived CLI invocations (Unix only).
+
+serve() keeps a fully built parser (and every imported command module) in a
+long-lived process listening on a Unix domain socket. A thin client sends its
+argv, environment and cwd and passes its own stdin/stdout/stderr file
+descriptors over the socket. For each request the server forks: the child
+adopts the client's descriptors, cwd and environment, runs dispatch() and
+reports the exit code, so sys.exit(), output and any state a command changes
+never leak into the server or other requests.
+
+The client (run_client) only needs the standard library. client_script()
+renders it as a standalone script that does not import autocli at all.
+"""
+
+import os
+import sys
+import signal
+import socket
+import struct
+import argparse
+import typing as t
+
+from ._dispatch import dispatch
+
+# Socket used by the client script when none is given explicitly
+DAEMON_SOCKET_ENV = "AUTOCLI_DAEMON_SOCKET"
+
+_LENGTH = struct.Struct("!Q")
+_INT = struct.Struct("!i")
+
+CLIENT_TEMPLATE = '''\
+#!{python} -IS
+# Thin client for an autocli daemon; generated by `python -m autocli daemon-client`.
+from __future__ import annotations
+
+import os
+import sys
+import signal
+import socket
+import struct
+
+SOCKET_PATH = {socket_path!r}
+
+
+{client_source}
+
+if __name__ == "__main__":
+    sys.exit(run_client(os.environ.get({env!r}, SOCKET_PATH)))
+'''
+
+
+def decode_request(
+    payload: bytes,
+) -> t.Tuple[t.List[str], t.Dict[str, str], str]:
+    """
+    Splits a request payload: NUL-separated cwd, argc, argv and KEY=VALUE
+    environment entries (none of which can contain NUL themselves).
+    """
+    fields = payload.decode("utf-8", "surrogateescape").split("\0")
+    cwd, argc = fields[0], int(fields[1])
+    argv = fields[2 : 2 + argc]
+    env = dict(item.split("=", 1) for item in fields[2 + argc :] if "=" in item)
+    return argv, env, cwd
+
+
+def run_client(
+    socket_path: str,
+    argv: t.Optional[t.Sequence[str]] = None,
+    fds: t.Sequence[int] = (0, 1, 2),
+) -> int:
+    """
+    Forwards one invocation to the daemon and returns its exit code. Ctrl-C
+    and SIGTERM are relayed to the process serving the request.
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    fields = [os.getcwd(), str(len(argv))] + list(argv)
+    fields += [key + "=" + value for key, value in os.environ.items()]
+    payload = "\0".join(fields).encode("utf-8", "surrogateescape")
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError as e:
+        sys.stderr.write(f"Error: autocli daemon not reachable at {socket_path}: {e}\n")
+        return 1
+
+    with sock:
+        socket.send_fds(sock, [struct.pack("!Q", len(payload))], list(fds))
+        sock.sendall(payload)
+
+        def read_int():
+            data = b""
+            while len(data) < 4:
+                chunk = sock.recv(4 - len(data))
+                if not chunk:
+                    return None
+                data += chunk
+            return struct.unpack("!i", data)[0]
+
+        pid = read_int()
+        if pid is None:
+            return 1
+
+        def relay(signum, frame):
+            try:
+                os.kill(pid, signum)
+            except OSError:
+                pass
+
+        signal.signal(signal.SIGINT, relay)
+        signal.signal(signal.SIGTERM, relay)
+
+        code = read_int()
+        return 1 if code is None else code
+
+
+def client_script(socket_path: str, python: str = sys.executable) -> str:
+    """Returns a standalone client script bound to socket_path."""
+    import inspect
+
+    return CLIENT_TEMPLATE.format(
+        python=python,
+        socket_path=str(socket_path),
+        env=DAEMON_SOCKET_ENV,
+        client_source=inspect.getsource(run_client),
+    )
+
+
+def serve(
+    parser: argparse.ArgumentParser,
+    socket_path: t.Union[str, os.PathLike],
+    ready: t.Optional[t.Callable[[], None]] = None,
+) -> None:
+    """
+    Serves invocations of parser on socket_path until interrupted. ready is
+    called once the socket is listening.
+    """
+    socket_path = os.fspath(socket_path)
+    _remove_stale_socket(socket_path)
+
+    # Bound under a temporary name and renamed into place once it is private
+    # and listening: a client can never connect to a socket other users can
+    # reach, nor see the path before connections are accepted
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    tmp_path = f"{socket_path}.{os.getpid()}"
+    try:
+        server.bind(tmp_path)
+        os.chmod(tmp_path, 0o600)
+        server.listen(64)
+        os.rename(tmp_path, socket_path)
+    except BaseException:
+        server.close()
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    # Finished request processes are reaped by the kernel, and SIGTERM shuts
+    # down as cleanly as Ctrl-C
+    previous_sigchld = signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    previous_sigterm = signal.signal(signal.SIGTERM, _interrupt)
+    if ready is not None:
+        ready()
+
+    try:
+        while True:
+            conn, _ = server.accept()
+            try:
+                _accept_request(parser, conn)
+            except OSError as e:
+                print(f"Warning: Dropped daemon request: {e}", file=sys.stderr)
+            finally:
+                conn.close()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        signal.signal(signal.SIGCHLD, previous_sigchld)
+        signal.signal(signal.SIGTERM, previous_sigterm)
+        server.close()
+        try:
+            os.unlink(socket_path)
+        except FileNotFoundError:
+            pass
+
+
+def _accept_request(parser: argparse.ArgumentParser, conn: socket.socket) -> None:
+    """Receives one request and forks the process that serves it."""
+    header, fds, _flags, _addr = socket.recv_fds(conn, _LENGTH.size, 3)
+    try:
+        if not header:
+            return  # connection probe (see _remove_stale_socket)
+        if len(header) != _LENGTH.size or len(fds) != 3:
+            raise OSError("malformed request header")
+        (length,) = _LENGTH.unpack(header)
+        payload = _recv_exactly(conn, length)
+
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            _serve_in_child(parser, conn, fds, payload)
+    finally:
+        for fd in fds:
+            os.close(fd)
+
+
+def _serve_in_child(
+    parser: argparse.ArgumentParser,
+    conn: socket.socket,
+    fds: t.List[int],
+    payload: bytes,
+) -> None:
+    """Runs in the forked child: adopt the client's context, dispatch, exit."""
+    code = 1
+    try:
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+
+        argv, env, cwd = decode_request(payload)
+        os.chdir(cwd)
+        os.environ.clear()
+        os.environ.update(env)
+
+        conn.sendall(_INT.pack(os.getpid()))
+        code = dispatch(parser, argv)
+    except BaseException:
+        import traceback
+
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            conn.sendall(_INT.pack(code & 0xFF))
+        finally:
+            os._exit(code & 0xFF)
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def _recv_exactly(conn: socket.socket, length: int) -> bytes:
+    chunks = []
+    while length:
+        chunk = conn.recv(min(length, 1 << 16))
+        if not chunk:
+            raise OSError("connection closed mid-request")
+        chunks.append(chunk)
+        length -= len(chunk)
+    return b"".join(chunks)
+
+
+def _remove_stale_socket(socket_path: str) -> None:
+    """Removes a socket file left behind, refusing if a daemon still answers."""
+    if not os.path.exists(socket_path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except OSError:
+        os.unlink(socket_path)
+    else:
+        raise OSError(f"An autocli daemon is already serving {socket_path}")
+    finally:
+        probe.close()
@@ -0,0 +1,191 @@
+"""
+Fan-out: run one command once per value (host, tenant, ...) in one process.
+
+Every value is substituted into the command line wherever the placeholder
+("{}" by default) appears, or appended as the last argument when it does
+not appear, like `xargs -I{}`. The invocations run on a bounded thread pool
+(or, with processes=True, a forked process pool) and go through dispatch(),
+so each one has its own exit code. Each invocation's stdout and stderr are
+captured and replayed as one block, either in input order or as the
+invocations complete, so output never interleaves.
+"""
+
+import io
+import sys
+import argparse
+import functools
+import threading
+import contextlib
+import typing as t
+
+from ._dispatch import dispatch
+
+DEFAULT_PLACEHOLDER = "{}"
+
+# (value, exit code, captured stdout, captured stderr)
+FanOutResult = t.Tuple[str, int, str, str]
+
+# The parser used by forked workers; set before the pool forks
+_PROCESS_PARSER: t.Optional[argparse.ArgumentParser] = None
+
+
+def expand_argv(
+    argv: t.Sequence[str], value: str, placeholder: str = DEFAULT_PLACEHOLDER
+) -> t.List[str]:
+    """Substitutes value for placeholder in argv, or appends it."""
+    if not any(placeholder in arg for arg in argv):
+        return list(argv) + [value]
+    return [arg.replace(placeholder, value) for arg in argv]
+
+
+def read_values(stream: t.Iterable[str]) -> t.List[str]:
+    """Reads one value per line, skipping blank lines and '#' comments."""
+    values = []
+    for line in stream:
+        value = line.strip()
+        if value and not value.startswith("#"):
+            values.append(value)
+    return values
+
+
+def fan_out(
+    parser: argparse.ArgumentParser,
+    argv: t.Sequence[str],
+    values: t.Iterable[str],
+    workers: int = 8,
+    ordered: bool = True,
+    processes: bool = False,
+    placeholder: str = DEFAULT_PLACEHOLDER,
+    on_result: t.Optional[t.Callable[[FanOutResult], None]] = None,
+) -> int:
+    """
+    Runs the command line argv once per value with at most `workers` running
+    at a time, and returns 0 if every invocation succeeded and 1 otherwise
+    (a summary of the failed values goes to stderr).
+
+    on_result receives every (value, exit_code, stdout, stderr) in output
+    order; by default the captured output is written to sys.stdout and
+    sys.stderr.
+    """
+    import concurrent.futures
+
+    if on_result is None:
+        on_result = _replay
+    values = list(values)
+    jobs = [expand_argv(argv, value, placeholder) for value in values]
+
+    if processes:
+        executor = _process_pool(parser, workers)
+        run = _run_in_process
+    else:
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        run = functools.partial(_run_in_thread, parser)
+
+    failed = []
+    with _thread_capture(enabled=not processes), executor:
+        futures = {executor.submit(run, job): value for job, value in zip(jobs, values)}
+        if ordered:
+            completed = futures
+        else:
+            completed = concurrent.futures.as_completed(futures)
+        for future in completed:
+            value = futures[future]
+            code, out, err = future.result()
+            if code != 0:
+                failed.append((value, code))
+            on_result((value, code, out, err))
+
+    if failed:
+        summary = ", ".join(f"{value} ({code})" for value, code in failed)
+        print(
+            f"Error: {len(failed)} of {len(values)} invocations failed: {summary}",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+def _replay(result: FanOutResult) -> None:
+    _value, _code, out, err = result
+    if out:
+        sys.stdout.write(out)
+        sys.stdout.flush()
+    if err:
+        sys.stderr.write(err)
+        sys.stderr.flush()
+
+
+class _ThreadLocalStream(io.TextIOBase):
+    """
+    Stands in for sys.stdout/sys.stderr while a fan-out runs: writes from a
+    worker thread go to that thread's capture buffer, everything else to the
+    real stream.
+    """
+
+    def __init__(self, stream: t.TextIO, local: threading.local, name: str):
+        self._stream = stream
+        self._local = local
+        self._name = name
+
+    def _target(self) -> t.TextIO:
+        return getattr(self._local, self._name, None) or self._stream
+
+    def write(self, s: str) -> int:
+        return self._target().write(s)
+
+    def flush(self) -> None:
+        self._target().flush()
+
+    def isatty(self) -> bool:
+        return self._target() is self._stream and self._stream.isatty()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+_local = threading.local()
+
+
+@contextlib.contextmanager
+def _thread_capture(enabled: bool = True):
+    """Routes each worker thread's output to its own buffer."""
+    if not enabled:
+        yield
+        return
+    saved = sys.stdout, sys.stderr
+    sys.stdout = _ThreadLocalStream(saved[0], _local, "stdout")
+    sys.stderr = _ThreadLocalStream(saved[1], _local, "stderr")
+    try:
+        yield
+    finally:
+        sys.stdout, sys.stderr = saved
+
+
+def _run_in_thread(
+    parser: argparse.ArgumentParser, argv: t.List[str]
+) -> t.Tuple[int, str, str]:
+    _local.stdout, _local.stderr = io.StringIO(), io.StringIO()
+    try:
+        code = dispatch(parser, argv)
+        return code, _local.stdout.getvalue(), _local.stderr.getvalue()
+    finally:
+        _local.stdout = _local.stderr = None
+
+
+def _process_pool(parser: argparse.ArgumentParser, workers: int):
+    """A process pool whose forked workers inherit the built parser."""
+    import concurrent.futures
+    import multiprocessing
+
+    global _PROCESS_PARSER
+    _PROCESS_PARSER = parser
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("fork")
+    )
+
+
+def _run_in_process(argv: t.List[str]) -> t.Tuple[int, str, str]:
+    out, err = io.StringIO(), io.StringIO()
+    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+        code = dispatch(_PROCESS_PARSER, argv)
+    return code, out.getvalue(), err.getvalue()
@@ -0,0 +1,568 @@
+"""
+Execution telemetry: hooks around each command's run_command.
+
+A parser created with telemetry (see create_command_parser) hands back
+namespaces whose func is wrapped: before the command runs, every hook's
+before_command(call) is called, and once it has returned, raised or exited,
+after_command(call) sees the same CommandCall filled in with the wall and
+CPU time it took, its exit status and the process's peak RSS. Wrapping the
+function (rather than dispatch()) means a run.py that calls args.func(args)
+itself is covered too.
+
+MetricsCollector is the built-in hook. It aggregates the calls per command
+path into a local file that stays the same size however often commands run:
+
+* OpenMetricsFile: an OpenMetrics text file (for node_exporter's textfile
+  collector, say) with a wall-time histogram, CPU seconds, runs by exit
+  status and peak RSS per command. Calls are appended to a log beside it
+  and folded in every few seconds (or kilobytes), so the file is rewritten
+  atomically under a lock now and then rather than on every call.
+* SQLiteMetrics: the same histogram in a table, plus the most recent runs
+  (max_rows of them) individually.
+
+Recording a call costs well under a millisecond for either store; SQLite
+additionally pays for importing the sqlite3 module once per process.
+"""
+
+import io
+import os
+import abc
+import sys
+import json
+import time
+import argparse
+import functools
+import contextlib
+import typing as t
+
+# Environment variable that turns metrics on without code changes: the path
+# of the metrics file (.db/.sqlite/.sqlite3 for SQLite, else OpenMetrics)
+METRICS_ENV = "AUTOCLI_METRICS"
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+# Upper bounds (seconds) of the wall-time histogram buckets, +Inf implied
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Bump whenever the layout of an OpenMetricsFile's state changes
+STATE_VERSION = 1
+
+# Commands beyond the cap are counted under this name to bound the file size
+OTHER_COMMAND = "(other)"
+
+TelemetryTarget = t.Optional[t.Union[bool, str, os.PathLike, "CommandHooks", t.Sequence]]
+
+
+class CommandCall:
+    """One run of a command, as seen by the hooks."""
+
+    __slots__ = (
+        "command",
+        "args",
+        "started",
+        "wall_seconds",
+        "cpu_seconds",
+        "exit_code",
+        "exception",
+        "peak_rss_bytes",
+        "_wall_start",
+        "_cpu_start",
+    )
+
+    def __init__(self, command: str, args: argparse.Namespace):
+        # The command path, e.g. "user db connect"
+        self.command = command
+        self.args = args
+        self.started = time.time()
+        self.wall_seconds: t.Optional[float] = None
+        self.cpu_seconds: t.Optional[float] = None
+        self.exit_code: t.Optional[int] = None
+        # What run_command raised (SystemExit included), if anything
+        self.exception: t.Optional[BaseException] = None
+        self.peak_rss_bytes: t.Optional[int] = None
+        self._wall_start = 0
+        self._cpu_start = 0
+
+    def start(self) -> None:
+        self._wall_start = time.perf_counter_ns()
+        self._cpu_start = time.process_time_ns()
+
+    def finish(self, exception: t.Optional[BaseException] = None) -> None:
+        self.wall_seconds = (time.perf_counter_ns() - self._wall_start) / 1e9
+        self.cpu_seconds = (time.process_time_ns() - self._cpu_start) / 1e9
+        self.exception = exception
+        self.exit_code = exit_status(exception)
+        self.peak_rss_bytes = peak_rss()
+
+    def __repr__(self) -> str:
+        return f"<CommandCall {self.command!r} exit_code={self.exit_code}>"
+
+
+class CommandHooks:
+    """Base class for telemetry hooks; both methods do nothing by default."""
+
+    def before_command(self, call: CommandCall) -> None:
+        pass
+
+    def after_command(self, call: CommandCall) -> None:
+        pass
+
+
+def exit_status(exception: t.Optional[BaseException]) -> int:
+    """The exit code a command ending with exception gives the process."""
+    if exception is None:
+        return 0
+    if isinstance(exception, SystemExit):
+        code = exception.code
+        if code is None:
+            return 0
+        return code if isinstance(code, int) else 1
+    if isinstance(exception, KeyboardInterrupt):
+        return 130
+    return 1
+
+
+def peak_rss() -> t.Optional[int]:
+    """The process's peak resident set size in bytes, or None if unknown."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def command_path(args: argparse.Namespace, dest: str = "cmd") -> str:
+    """
+    Returns the command args selects, e.g. "user db connect", from the dests
+    the root and group subparsers store the chosen names in.
+    """
+    parts = []
+    name = getattr(args, dest, None)
+    while isinstance(name, str) and name:
+        parts.append(name)
+        name = getattr(args, "__".join(parts), None)
+    return " ".join(parts)
+
+
+class _Notifier:
+    """Calls the hooks, warning (once per hook) instead of failing a command."""
+
+    def __init__(self, hooks: t.Sequence[CommandHooks]):
+        self.hooks = list(hooks)
+        self.failed: t.Set[int] = set()
+
+    def notify(self, method: str, call: CommandCall) -> None:
+        for hook in self.hooks:
+            try:
+                getattr(hook, method)(call)
+            except Exception as e:
+                if id(hook) not in self.failed:
+                    self.failed.add(id(hook))
+                    name = type(hook).__name__
+                    print(f"Warning: Telemetry hook {name} failed: {e}", file=sys.stderr)
+
+
+def instrument(func: t.Callable, command: str, notifier: _Notifier) -> t.Callable:
+    """Wraps a run_command so the hooks see every call of it."""
+
+    @functools.wraps(func)
+    def run_command(args, *rest, **kwargs):
+        call = CommandCall(command, args)
+        notifier.notify("before_command", call)
+        call.start()
+        try:
+            result = func(args, *rest, **kwargs)
+        except BaseException as e:
+            call.finish(e)
+            notifier.notify("after_command", call)
+            raise
+        if hasattr(result, "__await__"):
+            return _finish_awaitable(result, call, notifier)
+        call.finish()
+        notifier.notify("after_command", call)
+        return result
+
+    run_command.__wrapped_command__ = command  # type: ignore[attr-defined]
+    return run_command
+
+
+async def _finish_awaitable(awaitable: t.Awaitable, call: CommandCall, notifier: _Notifier):
+    """Times a coroutine run_command until it completes."""
+    try:
+        result = await awaitable
+    except BaseException as e:
+        call.finish(e)
+        notifier.notify("after_command", call)
+        raise
+    call.finish()
+    notifier.notify("after_command", call)
+    return result
+
+
+def install(parser: argparse.ArgumentParser, hooks: t.Sequence[CommandHooks]) -> None:
+    """Makes parser wrap the func of every namespace it returns with the hooks."""
+    notifier = _Notifier(hooks)
+    parse_known_args = parser.parse_known_args
+
+    @functools.wraps(parse_known_args)
+    def parse_known_args_with_telemetry(*args, **kwargs):
+        namespace, extras = parse_known_args(*args, **kwargs)
+        func = getattr(namespace, "func", None)
+        if callable(func) and not hasattr(func, "__wrapped_command__"):
+            namespace.func = instrument(func, command_path(namespace), notifier)
+        return namespace, extras
+
+    parser.parse_known_args = parse_known_args_with_telemetry
+
+
+def resolve_hooks(telemetry: TelemetryTarget = None) -> t.List[CommandHooks]:
+    """
+    Normalizes the telemetry argument (or AUTOCLI_METRICS) to a list of
+    hooks: a path becomes a MetricsCollector writing to it, False or an
+    empty value none at all.
+    """
+    if telemetry is None:
+        telemetry = os.environ.get(METRICS_ENV, "")
+    if telemetry is False or telemetry is True or telemetry == "":
+        # There is no default location, so True alone cannot turn metrics on
+        return []
+    if isinstance(telemetry, (str, os.PathLike)):
+        return [MetricsCollector(open_store(telemetry))]
+    if isinstance(telemetry, CommandHooks) or not isinstance(telemetry, t.Sequence):
+        return [telemetry]
+    return list(telemetry)
+
+
+def open_store(path: t.Union[str, os.PathLike]) -> "MetricsStore":
+    """Returns the store for path, chosen by its suffix."""
+    if os.fspath(path).lower().endswith(SQLITE_SUFFIXES):
+        return SQLiteMetrics(path)
+    return OpenMetricsFile(path)
+
+
+class MetricsStore(abc.ABC):
+    """Where MetricsCollector keeps its aggregates."""
+
+    @abc.abstractmethod
+    def record(self, call: CommandCall) -> None:
+        """Adds one finished call."""
+
+
+class MetricsCollector(CommandHooks):
+    """Records every finished call in a MetricsStore."""
+
+    def __init__(self, store: MetricsStore):
+        self.store = store
+
+    def after_command(self, call: CommandCall) -> None:
+        self.store.record(call)
+
+
+def _bucket_index(seconds: float) -> int:
+    """The first bucket seconds falls into (len(BUCKETS) for +Inf)."""
+    for i, bound in enumerate(BUCKETS):
+        if seconds <= bound:
+            return i
+    return len(BUCKETS)
+
+
+@contextlib.contextmanager
+def _locked(path: str, shared: bool = False):
+    """Holds a lock on path + '.lock' (advisory, POSIX only)."""
+    try:
+        import fcntl
+    except ImportError:  # Windows: os.replace keeps the files whole at least
+        yield
+        return
+    with open(path + ".lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_float(value: float) -> str:
+    return repr(float(value))
+
+
+class OpenMetricsFile(MetricsStore):
+    """
+    Aggregates calls into an OpenMetrics text file.
+
+    Recording a call only appends one line to a log beside the file (path +
+    '.log'). Once the log holds flush_bytes, or the text file is older than
+    flush_interval seconds, the next call folds the log into the aggregates
+    (path + '.json') and rewrites the text file from them, both replaced
+    atomically under a lock so concurrent CLI processes do not lose each
+    other's counts. At most max_commands command paths get their own series;
+    calls of any further ones are added up under OTHER_COMMAND.
+    """
+
+    PREFIX = "autocli_command"
+
+    FAMILIES = (
+        ("duration_seconds", "histogram", "Wall time of command runs.", "seconds"),
+        ("cpu_seconds", "counter", "CPU time of command runs.", "seconds"),
+        ("runs", "counter", "Command runs by exit status.", None),
+        ("peak_rss_bytes", "gauge", "Largest peak RSS of a process running it.", "bytes"),
+    )
+
+    def __init__(
+        self,
+        path: t.Union[str, os.PathLike],
+        max_commands: int = 1000,
+        flush_bytes: int = 64 * 1024,
+        flush_interval: float = 10.0,
+    ):
+        self.path = os.fspath(path)
+        self.log_path = self.path + ".log"
+        self.state_path = self.path + ".json"
+        self.max_commands = max_commands
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+
+    def record(self, call: CommandCall) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fields = [call.command, call.wall_seconds, call.cpu_seconds, call.exit_code]
+        line = json.dumps(fields + [call.peak_rss_bytes])
+        # Appends of a single short line do not interleave; the shared lock
+        # only keeps them out of a flush that is taking the log away
+        with _locked(self.path, shared=True):
+            fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, (line + "\n").encode("utf-8"))
+                size = os.fstat(fd).st_size
+            finally:
+                os.close(fd)
+
+        try:
+            stale = os.stat(self.path).st_mtime + self.flush_interval < time.time()
+        except FileNotFoundError:
+            stale = True
+        if stale or size >= self.flush_bytes:
+            self.flush()
+
+    def flush(self) -> None:
+        """Folds the logged calls into the aggregates and rewrites the file."""
+        pending = self.log_path + ".pending"
+        with _locked(self.path):
+            # A pending log is left over from a flush that did not finish
+            if not os.path.exists(pending):
+                try:
+                    os.replace(self.log_path, pending)
+                except FileNotFoundError:
+                    return
+            commands = self.load()
+            with open(pending, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self._add(commands, *json.loads(line))
+                    except (ValueError, TypeError):
+                        continue  # a line cut short by a crash
+            self.save(commands)
+            os.remove(pending)
+
+    def _add(
+        self,
+        commands: t.Dict[str, t.Dict[str, t.Any]],
+        command: str,
+        wall_seconds: float,
+        cpu_seconds: float,
+        exit_code: int,
+        peak_rss_bytes: t.Optional[int],
+    ) -> None:
+        if command not in commands and len(commands) >= self.max_commands:
+            command = OTHER_COMMAND
+        entry = commands.get(command)
+        if entry is None:
+            entry = commands[command] = {
+                "buckets": [0] * (len(BUCKETS) + 1),
+                "count": 0,
+                "sum": 0.0,
+                "cpu": 0.0,
+                "runs": {},
+                "rss": None,
+            }
+        entry["buckets"][_bucket_index(wall_seconds)] += 1
+        entry["count"] += 1
+        entry["sum"] += wall_seconds
+        entry["cpu"] += cpu_seconds
+        status = str(exit_code)
+        entry["runs"][status] = entry["runs"].get(status, 0) + 1
+        if peak_rss_bytes is not None:
+            entry["rss"] = max(entry["rss"] or 0, peak_rss_bytes)
+
+    def load(self) -> t.Dict[str, t.Dict[str, t.Any]]:
+        """Returns the flushed aggregates by command (empty if there are none)."""
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(state, dict) or state.get("version") != STATE_VERSION:
+            return {}
+        return state["commands"]
+
+    def render_command(self, command: str, entry: t.Dict[str, t.Any]) -> t.List[str]:
+        """Returns the lines of one command for each of the FAMILIES."""
+        p = self.PREFIX
+        label = f'command="{_escape(command)}"'
+        bounds = [_format_float(b) for b in BUCKETS] + ["+Inf"]
+
+        histogram = []
+        cumulative = 0
+        for bound, count in zip(bounds, entry["buckets"]):
+            cumulative += count
+            bucket = f'{p}_duration_seconds_bucket{{{label},le="{bound}"}}'
+            histogram.append(f"{bucket} {cumulative}\n")
+        total = _format_float(entry["sum"])
+        histogram.append(f"{p}_duration_seconds_count{{{label}}} {entry['count']}\n")
+        histogram.append(f"{p}_duration_seconds_sum{{{label}}} {total}\n")
+
+        cpu = f"{p}_cpu_seconds_total{{{label}}} {_format_float(entry['cpu'])}\n"
+        runs = [
+            f'{p}_runs_total{{{label},status="{status}"}} {entry["runs"][status]}\n'
+            for status in sorted(entry["runs"], key=int)
+        ]
+        rss = ""
+        if entry["rss"] is not None:
+            rss = f"{p}_peak_rss_bytes{{{label}}} {entry['rss']}\n"
+        return ["".join(histogram), cpu, "".join(runs), rss]
+
+    def render(self, commands: t.Dict[str, t.Dict[str, t.Any]]) -> str:
+        """Returns the OpenMetrics text of the aggregates."""
+        rendered = [self.render_command(name, commands[name]) for name in sorted(commands)]
+        out = io.StringIO()
+        for i, (family, kind, help, unit) in enumerate(self.FAMILIES):
+            name = f"{self.PREFIX}_{family}"
+            out.write(f"# TYPE {name} {kind}\n# HELP {name} {help}\n")
+            if unit:
+                out.write(f"# UNIT {name} {unit}\n")
+            for lines in rendered:
+                out.write(lines[i])
+        out.write("# EOF\n")
+        return out.getvalue()
+
+    def save(self, commands: t.Dict[str, t.Dict[str, t.Any]]) -> None:
+        state = {"version": STATE_VERSION, "commands": commands}
+        suffix = f".{os.getpid()}.tmp"
+        with open(self.state_path + suffix, "w", encoding="utf-8") as f:
+            json.dump(state, f, separators=(",", ":"))
+        with open(self.path + suffix, "w", encoding="utf-8") as f:
+            f.write(self.render(commands))
+        os.replace(self.state_path + suffix, self.state_path)
+        os.replace(self.path + suffix, self.path)
+
+
+class SQLiteMetrics(MetricsStore):
+    """
+    Keeps calls in a SQLite database: the runs table holds the latest
+    max_rows calls one by one, the histogram table their wall-time bucket
+    counts per command (never trimmed, and of a fixed size per command). As
+    in OpenMetricsFile, at most max_commands command paths get their own
+    histogram; calls of any further ones are counted under OTHER_COMMAND.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY,
+            command TEXT NOT NULL,
+            started REAL NOT NULL,
+            wall_seconds REAL NOT NULL,
+            cpu_seconds REAL NOT NULL,
+            exit_code INTEGER NOT NULL,
+            peak_rss_bytes INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS histogram (
+            command TEXT NOT NULL,
+            le TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (command, le)
+        );
+    """
+
+    def __init__(
+        self,
+        path: t.Union[str, os.PathLike],
+        max_rows: int = 10000,
+        max_commands: int = 1000,
+    ):
+        self.path = os.fspath(path)
+        self.max_rows = max_rows
+        self.max_commands = max_commands
+
+    def connect(self):
+        import sqlite3
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=5.0)
+        # Metrics are not worth an fsync per command: losing the latest runs
+        # to a machine crash is fine, the WAL keeps the process crashes safe
+        connection.execute("PRAGMA synchronous=OFF")
+        return connection
+
+    def create_schema(self, connection) -> None:
+        connection.execute("PRAGMA journal_mode=WAL")  # stays on for the file
+        connection.executescript(self.SCHEMA)
+
+    def record(self, call: CommandCall) -> None:
+        import sqlite3
+
+        connection = self.connect()
+        try:
+            try:
+                self._insert(connection, call)
+            except sqlite3.OperationalError:
+                # Only a new file lacks the tables, so they are not created up front
+                self.create_schema(connection)
+                self._insert(connection, call)
+        finally:
+            connection.close()
+
+    def _insert(self, connection, call: CommandCall) -> None:
+        index = _bucket_index(call.wall_seconds)
+        le = _format_float(BUCKETS[index]) if index < len(BUCKETS) else "+Inf"
+        with connection:
+            cursor = connection.execute(
+                "INSERT INTO runs (command, started, wall_seconds, cpu_seconds,"
+                " exit_code, peak_rss_bytes) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    call.command,
+                    call.started,
+                    call.wall_seconds,
+                    call.cpu_seconds,
+                    call.exit_code,
+                    call.peak_rss_bytes,
+                ),
+            )
+            connection.execute(
+                "DELETE FROM runs WHERE id <= ?", (cursor.lastrowid - self.max_rows,)
+            )
+            connection.execute(
+                "INSERT INTO histogram (command, le, count) VALUES (?, ?, 1)"
+                " ON CONFLICT (command, le) DO UPDATE SET count = count + 1",
+                (self._histogram_command(connection, call.command), le),
+            )
+
+    def _histogram_command(self, connection, command: str) -> str:
+        """The command's own name, or OTHER_COMMAND once max_commands are taken."""
+        known = connection.execute(
+            "SELECT 1 FROM histogram WHERE command = ? LIMIT 1", (command,)
+        ).fetchone()
+        if known is not None:
+            return command
+        (count,) = connection.execute(
+            "SELECT COUNT(DISTINCT command) FROM histogram"
+        ).fetchone()
+        return command if count < self.max_commands else OTHER_COMMAND
@@ -0,0 +1,192 @@
+"""
+In-process test runner for autocli applications.
+
+A CliRunner builds an application's parser once and then invokes command
+lines against it in the current process, the way run.py would from a
+shell: stdout and stderr are captured, sys.exit() and argparse errors
+become an exit code (see dispatch()) and stdin can be fed a string. A test
+suite with thousands of commands pays for the interpreter and the imports
+once instead of once per test.
+
+Several example applications usually share a package name (`commands`).
+A runner given the application's root directory imports the package from
+there and keeps its modules to itself: they are only in sys.modules (and
+the directory only on sys.path) while one of its invocations runs, so
+runners for different applications never see each other's commands.
+Invocations are serialized by a lock because they swap process-wide state;
+pytest-xdist runs tests in separate worker processes, each with its own
+runners, and the runner writes no files unless the parser is given a
+cache_dir.
+"""
+
+import io
+import os
+import sys
+import argparse
+import importlib
+import threading
+import contextlib
+import typing as t
+from pathlib import Path
+
+from ._dispatch import dispatch
+
+# sys.modules, sys.path, os.environ and the standard streams are shared by
+# every thread, so one invocation runs at a time
+_LOCK = threading.RLock()
+
+
+class CliResult:
+    """The outcome of one CliRunner.invoke()."""
+
+    __slots__ = ("argv", "exit_code", "stdout", "stderr")
+
+    def __init__(self, argv: t.List[str], exit_code: int, stdout: str, stderr: str):
+        self.argv = argv
+        self.exit_code = exit_code
+        self.stdout = stdout
+        self.stderr = stderr
+
+    def __repr__(self) -> str:
+        return f"<CliResult {' '.join(self.argv)!r} exit_code={self.exit_code}>"
+
+
+class _ModuleScope:
+    """
+    The modules of one application: its package and anything imported from
+    its root directory. Entering the scope puts them (and the directory) in
+    place, leaving it takes them out again, together with whatever the
+    application imported in between (lazy commands, for instance).
+    """
+
+    def __init__(self, package: str, app_root: Path):
+        self.package = package
+        self.app_root = str(app_root)
+        self.modules: t.Dict[str, t.Any] = {}
+        self._saved: t.Dict[str, t.Any] = {}
+        self._before: t.Set[str] = set()
+
+    def owns(self, name: str, module: t.Any) -> bool:
+        if name == self.package or name.startswith(self.package + "."):
+            return True
+        path = getattr(module, "__file__", None)
+        return bool(path) and os.path.abspath(path).startswith(self.app_root + os.sep)
+
+    def _package_names(self) -> t.Set[str]:
+        prefix = self.package + "."
+        return {
+            name for name in sys.modules if name == self.package or name.startswith(prefix)
+        }
+
+    def __enter__(self) -> "_ModuleScope":
+        # Only names the application uses can clash; checking just those (and
+        # what was imported meanwhile, on exit) keeps entering the scope cheap
+        names = self._package_names() | set(self.modules)
+        self._saved = {name: sys.modules.pop(name) for name in names if name in sys.modules}
+        sys.modules.update(self.modules)
+        self._before = set(sys.modules)
+        sys.path.insert(0, self.app_root)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        sys.path.remove(self.app_root)
+        names = (set(sys.modules) - self._before) | self._package_names() | set(self.modules)
+        self.modules = {
+            name: sys.modules.pop(name)
+            for name in names
+            if name in sys.modules and self.owns(name, sys.modules[name])
+        }
+        sys.modules.update(self._saved)
+        self._saved = {}
+
+
+class CliRunner:
+    """
+    Invokes the commands of one application in-process.
+
+    package is the command package (a module or its import name). With
+    app_root, the package is imported from that directory in isolation (see
+    the module docstring); without it, package is imported normally. The
+    parser is built on the first invocation by factory(module, **kwargs),
+    create_command_parser by default, and reused from then on.
+    """
+
+    def __init__(
+        self,
+        package: t.Union[str, t.Any],
+        app_root: t.Optional[t.Union[str, Path]] = None,
+        factory: t.Optional[t.Callable[..., argparse.ArgumentParser]] = None,
+        **kwargs: t.Any,
+    ):
+        self.package = package
+        self.factory = factory
+        self.kwargs = kwargs
+        self._parser: t.Optional[argparse.ArgumentParser] = None
+        self._scope: t.Optional[_ModuleScope] = None
+        if app_root is not None:
+            name = package if isinstance(package, str) else package.__name__
+            self._scope = _ModuleScope(name, Path(app_root).resolve())
+
+    @property
+    def parser(self) -> argparse.ArgumentParser:
+        """The application's parser, built on first use."""
+        if self._parser is None:
+            with _LOCK, self._isolated():
+                self._parser = self._build_parser()
+        return self._parser
+
+    def _build_parser(self) -> argparse.ArgumentParser:
+        module = self.package
+        if isinstance(module, str):
+            module = importlib.import_module(module)
+        if self.factory is None:
+            from . import create_command_parser
+
+            return create_command_parser(module, **self.kwargs)
+        return self.factory(module, **self.kwargs)
+
+    def _isolated(self) -> t.ContextManager:
+        return self._scope if self._scope is not None else contextlib.nullcontext()
+
+    def invoke(
+        self,
+        argv: t.Sequence[str],
+        input: t.Optional[str] = None,
+        env: t.Optional[t.Mapping[str, str]] = None,
+    ) -> CliResult:
+        """
+        Runs one command line and returns its exit code and captured output.
+        input becomes sys.stdin, and env is applied to os.environ for the
+        duration of the call.
+        """
+        argv = list(argv)
+        parser = self.parser
+        out, err = io.StringIO(), io.StringIO()
+        stdin = io.StringIO(input or "")
+
+        with _LOCK, self._isolated(), _patched_environ(env):
+            saved_stdin, sys.stdin = sys.stdin, stdin
+            try:
+                with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+                    code = dispatch(parser, argv)
+            finally:
+                sys.stdin = saved_stdin
+
+        return CliResult(argv, code, out.getvalue(), err.getvalue())
+
+
+@contextlib.contextmanager
+def _patched_environ(env: t.Optional[t.Mapping[str, str]]):
+    if not env:
+        yield
+        return
+    saved = {key: os.environ.get(key) for key in env}
+    os.environ.update(env)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
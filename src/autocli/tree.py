@@ -0,0 +1,229 @@
+"""
+The command tree shared by discovery, the caches, completion and the parsers.
+
+Every discovered command module is described by a CommandEntry: its command
+parts, import name and package-relative path, plus whatever registration or
+the static analysis learned about it (validity, help, option flags and the
+parse table of its parser). A
+CommandTree nests the entries by command part. Each CommandNode is a group
+(it has children), a command (it has entries) or, when two modules disagree
+about a name, both.
+
+All three classes use __slots__ and leaf nodes allocate no containers, so a
+tree of ten thousand commands costs a fraction of the equivalent nested
+dicts (see scripts/bench_tree.py).
+"""
+
+import typing as t
+
+# Bump whenever the layout of CommandTree.to_dict() changes
+TREE_VERSION = 1
+
+
+class CommandEntry:
+    """One discovered command module, e.g. user/db__connect.py."""
+
+    __slots__ = (
+        "command_parts",
+        "import_name",
+        "path",
+        "valid",
+        "help",
+        "options",
+        "table",
+    )
+
+    def __init__(
+        self,
+        command_parts: t.Iterable[str],
+        import_name: str,
+        path: str,
+        valid: t.Optional[bool] = None,
+        help: t.Optional[str] = None,
+        options: t.Optional[t.List[str]] = None,
+        table: t.Optional[t.Dict[str, t.Any]] = None,
+    ):
+        self.command_parts: t.Tuple[str, ...] = tuple(command_parts)
+        self.import_name = import_name
+        # Package-relative posix path of the module's source
+        self.path = path
+        # None until the module was imported (or statically analysed)
+        self.valid = valid
+        self.help = help
+        self.options = options
+        # The parse table of the command's parser (see _fastparse)
+        self.table = table
+
+    @property
+    def name(self) -> str:
+        """The command's own name, the last of its command parts."""
+        return self.command_parts[-1]
+
+    def to_dict(self) -> t.Dict[str, t.Any]:
+        """Returns the entry as a JSON-serializable dict."""
+        return {
+            "command_parts": list(self.command_parts),
+            "import_name": self.import_name,
+            "path": self.path,
+            "valid": self.valid,
+            "help": self.help,
+            "options": self.options,
+            "table": self.table,
+        }
+
+    @classmethod
+    def from_dict(cls, data: t.Mapping[str, t.Any]) -> "CommandEntry":
+        """Inverse of to_dict(); keys it does not know are ignored."""
+        return cls(
+            data["command_parts"],
+            data["import_name"],
+            data["path"],
+            data.get("valid"),
+            data.get("help"),
+            data.get("options"),
+            data.get("table"),
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CommandEntry):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    # Entries are updated in place as registration learns about them
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"CommandEntry({' '.join(self.command_parts)!r}, {self.import_name!r})"
+
+
+class CommandNode:
+    """
+    One name in the command tree. children maps the names below a group to
+    their nodes and stays None for a node that is not a group; entries holds
+    the modules registering a command under this name.
+    """
+
+    __slots__ = ("name", "parent", "children", "entries")
+
+    def __init__(self, name: str = "", parent: t.Optional["CommandNode"] = None):
+        self.name = name
+        self.parent = parent
+        self.children: t.Optional[t.Dict[str, CommandNode]] = None
+        self.entries: t.Tuple[CommandEntry, ...] = ()
+
+    @property
+    def parts(self) -> t.Tuple[str, ...]:
+        """The names from the root down to this node (empty for the root)."""
+        parts = []
+        node: t.Optional[CommandNode] = self
+        while node is not None and node.parent is not None:
+            parts.append(node.name)
+            node = node.parent
+        return tuple(reversed(parts))
+
+    @property
+    def key(self) -> str:
+        """The parts joined by '__', e.g. 'user__db' ('' for the root)."""
+        return "__".join(self.parts)
+
+    @property
+    def is_group(self) -> bool:
+        return self.children is not None
+
+    def child(self, name: str) -> t.Optional["CommandNode"]:
+        """Returns the node for name below this group, or None."""
+        if self.children is None:
+            return None
+        return self.children.get(name)
+
+    def walk(self) -> t.Iterator["CommandNode"]:
+        """Yields this node and every node below it, parents first."""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            if node.children:
+                stack.extend(reversed(list(node.children.values())))
+
+    def __repr__(self) -> str:
+        kind = "group" if self.is_group else "command"
+        return f"<CommandNode {self.key or '(root)'!r} ({kind})>"
+
+
+class CommandTree:
+    """
+    The discovered command modules nested by command part. Entries keep the
+    order they were added in, which is the order their commands are
+    registered (and listed in help) in.
+    """
+
+    __slots__ = ("root", "_entries")
+
+    def __init__(self, entries: t.Iterable[CommandEntry] = ()):
+        self.root = CommandNode()
+        self._entries: t.List[CommandEntry] = []
+        for entry in entries:
+            self.add(entry)
+
+    def add(self, entry: CommandEntry) -> CommandNode:
+        """Adds an entry, creating its parent groups, and returns its node."""
+        node = self.root
+        for part in entry.command_parts:
+            if node.children is None:
+                node.children = {}
+            child = node.children.get(part)
+            if child is None:
+                child = node.children[part] = CommandNode(part, node)
+            node = child
+        node.entries += (entry,)
+        self._entries.append(entry)
+        return node
+
+    def __iter__(self) -> t.Iterator[CommandEntry]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def find(self, parts: t.Iterable[str]) -> t.Optional[CommandNode]:
+        """Returns the node at exactly parts, or None."""
+        node: t.Optional[CommandNode] = self.root
+        for part in parts:
+            node = node.child(part)
+            if node is None:
+                return None
+        return node
+
+    def lookup(self, argv: t.Sequence[str]) -> t.Tuple[CommandNode, int]:
+        """
+        Follows argv from the root for as long as its words name groups and
+        commands, e.g. ['user', 'add', '--name', 'x'] -> (node of 'user add', 2).
+        Returns the deepest node reached and the number of words consumed;
+        the cost is bounded by the depth of the tree, not by its size.
+        """
+        node = self.root
+        consumed = 0
+        for word in argv:
+            child = node.child(word)
+            if child is None:
+                break
+            node = child
+            consumed += 1
+        return node, consumed
+
+    def groups(self) -> t.Iterator[CommandNode]:
+        """Yields every group node, the root first, parents before children."""
+        return (node for node in self.root.walk() if node.children is not None)
+
+    def to_dict(self) -> t.Dict[str, t.Any]:
+        """Returns the tree as a JSON-serializable dict (see from_dict)."""
+        return {
+            "version": TREE_VERSION,
+            "commands": [entry.to_dict() for entry in self._entries],
+        }
+
+    @classmethod
+    def from_dict(cls, data: t.Mapping[str, t.Any]) -> "CommandTree":
+        if data.get("version") != TREE_VERSION:
+            raise ValueError(f"Unsupported command tree version: {data.get('version')!r}")
+        return cls(CommandEntry.from_dict(entry) for entry in data["commands"])
@@ -0,0 +1,77 @@
+"""Helpers for tests that need a throwaway command package on sys.path."""
+
+import importlib
+import sys
+import uuid
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+
+COMMAND_TEMPLATE = """\
+import argparse
+
+
+def autocli_setup_parser(subparsers: argparse._SubParsersAction, command_name: str):
+    parser = subparsers.add_parser(command_name, help=f"The {command_name} command.")
+    parser.add_argument("--test-value", type=str, required=True)
+    parser.set_defaults(func=run_command)
+
+
+def run_command(args: argparse.Namespace):
+    print(f"ran with value: {args.test_value}")
+"""
+
+
+class CommandPackageMixin:
+    """
+    Creates a uniquely named command package in a temporary directory for each
+    test. FILES lists the package-relative paths to create; __init__.py files
+    are written empty and everything else gets COMMAND_TEMPLATE unless a
+    content string is given in CONTENTS.
+    """
+
+    FILES: list = []
+    CONTENTS: dict = {}
+
+    def setUp(self):
+        super().setUp()
+        self._pkg_tempdir = TemporaryDirectory()
+        self.pkg_name = f"autocli_test_cmds_{uuid.uuid4().hex}"
+        self.pkg_dir = Path(self._pkg_tempdir.name) / self.pkg_name
+        self.pkg_dir.mkdir()
+        (self.pkg_dir / "__init__.py").write_text("")
+        for relative in self.FILES:
+            self.write_command(relative, self.CONTENTS.get(relative))
+
+        sys.path.insert(0, self._pkg_tempdir.name)
+        self.package = importlib.import_module(self.pkg_name)
+
+    def tearDown(self):
+        sys.path.remove(self._pkg_tempdir.name)
+        self.unload_package()
+        self._pkg_tempdir.cleanup()
+        super().tearDown()
+
+    def write_command(self, relative: str, content: str = None) -> Path:
+        path = self.pkg_dir / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if content is None:
+            content = "" if path.name == "__init__.py" else COMMAND_TEMPLATE
+        path.write_text(content)
+        return path
+
+    def unload_package(self, keep_root: bool = False):
+        """Drops the package's modules from sys.modules (optionally keeping the root)."""
+        importlib.invalidate_caches()
+        for name in list(sys.modules):
+            if name.startswith(f"{self.pkg_name}.") or (
+                name == self.pkg_name and not keep_root
+            ):
+                del sys.modules[name]
+
+    def imported(self) -> list:
+        """Returns the package-relative names of the submodules imported so far."""
+        prefix = f"{self.pkg_name}."
+        return sorted(
+            name[len(prefix) :] for name in sys.modules if name.startswith(prefix)
+        )
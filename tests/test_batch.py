@@ -0,0 +1,131 @@
+import io
+import json
+import sys
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+from autocli import create_command_parser
+from autocli.batch import parse_line, run_batch
+from command_packages import CommandPackageMixin
+
+ADD_TEMPLATE = """\
+import sys
+
+
+def autocli_setup_parser(subparsers, command_name):
+    parser = subparsers.add_parser(command_name)
+    parser.add_argument("username")
+    parser.add_argument("-e", "--email", required=True)
+    parser.set_defaults(func=run_command)
+
+
+def run_command(args):
+    if args.username == "erroruser":
+        sys.exit("Error: Username reserved or invalid.")
+    print(f"added {args.username} <{args.email}>")
+"""
+
+
+FETCH_TEMPLATE = """\
+import asyncio
+import sys
+
+IN_FLIGHT = 0
+PEAK = 0
+
+
+def autocli_setup_parser(subparsers, command_name):
+    parser = subparsers.add_parser(command_name)
+    parser.add_argument("host")
+    parser.set_defaults(func=run_command)
+
+
+async def run_command(args):
+    global IN_FLIGHT, PEAK
+    IN_FLIGHT += 1
+    PEAK = max(PEAK, IN_FLIGHT)
+    try:
+        await asyncio.sleep(0.05)
+        if args.host == "down":
+            sys.exit(f"Error: {args.host} unreachable.")
+        print(f"fetched {args.host}")
+    finally:
+        IN_FLIGHT -= 1
+"""
+
+
+class ParseLineTest(unittest.TestCase):
+    def test_formats(self):
+        self.assertEqual(parse_line("user add 'a b' -e x\n"), ["user", "add", "a b", "-e", "x"])
+        self.assertEqual(parse_line('["user", "add", "a"]'), ["user", "add", "a"])
+        self.assertEqual(parse_line('{"argv": ["user"]}'), ["user"])
+        self.assertIsNone(parse_line("   \n"))
+        self.assertIsNone(parse_line("# comment"))
+        self.assertEqual(parse_line("[x]", format="lines"), ["[x]"])
+        with self.assertRaises(ValueError):
+            parse_line('{"args": 1}')
+
+
+class RunBatchTest(CommandPackageMixin, unittest.TestCase):
+    FILES = ["user__add.py", "fetch.py"]
+    CONTENTS = {"user__add.py": ADD_TEMPLATE, "fetch.py": FETCH_TEMPLATE}
+
+    def run_lines(self, lines, **kwargs):
+        parser = create_command_parser(self.package)
+        out, err, report = io.StringIO(), io.StringIO(), io.StringIO()
+        with redirect_stdout(out), redirect_stderr(err):
+            code = run_batch(parser, lines, report=report, **kwargs)
+        entries = [json.loads(line) for line in report.getvalue().splitlines()]
+        return code, out.getvalue(), err.getvalue(), entries
+
+    def test_failures_do_not_stop_the_batch(self):
+        code, out, err, entries = self.run_lines(
+            [
+                "user add alice -e a@example.com",
+                "user add erroruser -e e@example.com",
+                "",
+                "user add",
+                '["user", "add", "bob", "--email", "b@example.com"]',
+            ]
+        )
+        self.assertEqual(code, 1)
+        self.assertEqual(out, "added alice <a@example.com>\nadded bob <b@example.com>\n")
+        self.assertIn("Error: Username reserved or invalid.", err)
+        self.assertEqual([e["line"] for e in entries], [1, 2, 4, 5])
+        self.assertEqual([e["exit_code"] for e in entries], [0, 1, 2, 0])
+        self.assertTrue(all(e["duration_ms"] >= 0 for e in entries))
+
+    def test_stop_on_error(self):
+        code, out, _, entries = self.run_lines(
+            ["user add erroruser -e x", "user add alice -e y"], stop_on_error=True
+        )
+        self.assertEqual(code, 1)
+        self.assertEqual(out, "")
+        self.assertEqual(len(entries), 1)
+
+    def test_all_succeed(self):
+        code, _, _, entries = self.run_lines(["user add a -e x", "user add b -e y"])
+        self.assertEqual(code, 0)
+        self.assertEqual(len(entries), 2)
+
+
+    def test_async_commands_run_concurrently(self):
+        lines = [f"fetch host{i}" for i in range(8)] + ["fetch down", "user add a -e x"]
+        code, out, err, entries = self.run_lines(lines, concurrency=4)
+
+        fetch = sys.modules[f"{self.pkg_name}.fetch"]
+        self.assertEqual(fetch.PEAK, 4)
+        self.assertEqual(code, 1)
+        self.assertEqual(out.count("fetched host"), 8)
+        self.assertIn("added a <x>", out)
+        self.assertIn("Error: down unreachable.", err)
+        self.assertEqual(sorted(e["line"] for e in entries), list(range(1, 11)))
+        self.assertEqual({e["line"]: e["exit_code"] for e in entries}[9], 1)
+
+    def test_async_commands_sequential_by_default(self):
+        self.run_lines(["fetch a", "fetch b"])
+        self.assertEqual(sys.modules[f"{self.pkg_name}.fetch"].PEAK, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
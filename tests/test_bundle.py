@@ -0,0 +1,145 @@
+import io
+import os
+import sys
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from unittest import mock
+
+from autocli import _bundle, _scan, create_command_parser
+from command_packages import CommandPackageMixin
+
+HELPER_USER_TEMPLATE = """\
+from .._helpers import greeting
+
+
+def autocli_setup_parser(subparsers, command_name):
+    parser = subparsers.add_parser(command_name, help="Greets.")
+    parser.set_defaults(func=run_command)
+
+
+def run_command(args):
+    print(greeting())
+"""
+
+
+class BundleTest(CommandPackageMixin, unittest.TestCase):
+    FILES = [
+        "report.py",
+        "user__add.py",
+        "admin/__init__.py",
+        "admin/hello.py",
+        "_helpers/__init__.py",
+        "tests/test_report.py",
+    ]
+    CONTENTS = {
+        "admin/hello.py": HELPER_USER_TEMPLATE,
+        "_helpers/__init__.py": "def greeting():\n    return 'hello from the bundle'\n",
+    }
+
+    def tearDown(self):
+        for finder in list(_bundle._installed.values()):
+            finder.uninstall()
+        super().tearDown()
+
+    def build_bundle(self, **kwargs):
+        path = _bundle.build_bundle(self.package, **kwargs)
+        self.assertEqual(path, self.pkg_dir / _bundle.BUNDLE_FILE)
+        return path
+
+    def remove_sources(self):
+        """Deletes every module but the package __init__, leaving only the bundle."""
+        for path in self.pkg_dir.rglob("*.py"):
+            if path != self.pkg_dir / "__init__.py":
+                path.unlink()
+        self.unload_package(keep_root=True)
+
+    def run_command(self, parser, argv):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            args = parser.parse_args(argv)
+            args.func(args)
+        return out.getvalue()
+
+    def test_commands_import_from_bundle(self):
+        self.build_bundle(ignore=["tests"])
+        self.remove_sources()
+
+        scanned = AssertionError("scanned")
+        with mock.patch.object(_scan, "scan_package", side_effect=scanned):
+            parser = create_command_parser(self.package)
+        choices = parser._subparsers._group_actions[0].choices
+        self.assertEqual(sorted(choices), ["admin", "report", "user"])
+        self.assertEqual(
+            self.run_command(parser, ["admin", "hello"]), "hello from the bundle\n"
+        )
+        module = sys.modules[f"{self.pkg_name}.admin.hello"]
+        self.assertIsInstance(module.__loader__, _bundle.BundleFinder)
+        self.assertEqual(module.__file__, str(self.pkg_dir / "admin" / "hello.py"))
+
+    def test_lazy_loads_only_selected_module(self):
+        self.build_bundle()
+        self.unload_package(keep_root=True)
+        parser = create_command_parser(self.package, lazy=True)
+        self.run_command(parser, ["report", "--test-value", "x"])
+        self.assertEqual(self.imported(), ["report"])
+        self.assertIsInstance(
+            sys.modules[f"{self.pkg_name}.report"].__loader__, _bundle.BundleFinder
+        )
+
+    def test_bundle_can_be_disabled(self):
+        self.build_bundle()
+        self.unload_package(keep_root=True)
+        parser = create_command_parser(self.package, bundle=False)
+        self.assertNotIsInstance(
+            sys.modules[f"{self.pkg_name}.report"].__loader__, _bundle.BundleFinder
+        )
+        self.assertIn("report", parser._subparsers._group_actions[0].choices)
+
+    def test_bundle_for_other_python_is_ignored(self):
+        path = self.build_bundle()
+        data = bytearray(path.read_bytes())
+        data[8:12] = b"\0\0\0\0"  # bytecode magic
+        path.write_bytes(bytes(data))
+
+        err = io.StringIO()
+        with redirect_stderr(err):
+            parser = create_command_parser(self.package)
+        self.assertIn("different Python version", err.getvalue())
+        self.assertIn("report", parser._subparsers._group_actions[0].choices)
+
+    def test_changed_source_ignores_bundle(self):
+        path = self.build_bundle()
+        self.unload_package(keep_root=True)
+        source = self.pkg_dir / "admin" / "hello.py"
+        built = path.stat().st_mtime
+        os.utime(source, (built + 10, built + 10))
+
+        err = io.StringIO()
+        with redirect_stderr(err):
+            parser = create_command_parser(self.package)
+        self.assertIn(
+            f"Ignoring command bundle {path} (admin/hello.py changed since it was built)",
+            err.getvalue(),
+        )
+        self.assertNotIsInstance(
+            sys.modules[f"{self.pkg_name}.admin.hello"].__loader__, _bundle.BundleFinder
+        )
+        self.assertIn("admin", parser._subparsers._group_actions[0].choices)
+
+    def test_cli(self):
+        from autocli.__main__ import main
+
+        out = io.StringIO()
+        with redirect_stdout(out):
+            main(["bundle", self.pkg_name, "--ignore", "tests"])
+        self.assertIn(_bundle.BUNDLE_FILE, out.getvalue())
+        finder = _bundle.BundleFinder.open(
+            os.path.join(self.pkg_dir, _bundle.BUNDLE_FILE), self.pkg_name
+        )
+        self.addCleanup(finder.uninstall)
+        self.assertIn(f"{self.pkg_name}._helpers", finder.modules)
+        self.assertNotIn(f"{self.pkg_name}.tests.test_report", finder.modules)
+
+
+if __name__ == "__main__":
+    unittest.main()
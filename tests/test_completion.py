@@ -0,0 +1,110 @@
+import io
+import os
+import sys
+import subprocess
+import unittest
+from contextlib import redirect_stdout
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from autocli import create_command_parser
+from autocli.completion import completion_script
+from command_packages import CommandPackageMixin
+
+
+class CompletionTest(CommandPackageMixin, unittest.TestCase):
+    FILES = [
+        "report.py",
+        "user/__init__.py",
+        "user/add.py",
+        "user__delete.py",
+        "admin__db/connect.py",
+        "broken.py",
+    ]
+    CONTENTS = {"broken.py": "VALUE = 1\n"}
+
+    def complete(self, *words, **kwargs):
+        out = io.StringIO()
+        with mock.patch.dict(os.environ, {"AUTOCLI_COMPLETE": "bash"}), mock.patch(
+            "sys.argv", ["prog"] + list(words)
+        ), redirect_stdout(out), self.assertRaises(SystemExit) as cm:
+            create_command_parser(self.package, **kwargs)
+        self.assertEqual(cm.exception.code, 0)
+        return out.getvalue().splitlines()
+
+    def test_group_and_command_names(self):
+        self.assertEqual(
+            sorted(self.complete("", static=True)), ["admin", "report", "user"]
+        )
+        self.assertEqual(self.complete("user", "d", static=True), ["delete"])
+        self.assertEqual(self.complete("admin", "db", "", static=True), ["connect"])
+        self.assertEqual(self.complete("nope", "", static=True), [])
+        self.assertEqual(self.imported(), [])
+
+    def test_option_flags_from_static_metadata(self):
+        self.assertEqual(
+            self.complete("user", "add", "-", static=True),
+            ["-h", "--help", "--test-value"],
+        )
+        self.assertEqual(
+            self.complete("user", "add", "--test-value", "x", "--t", static=True),
+            ["--test-value"],
+        )
+        self.assertEqual(self.imported(), [])
+
+    def test_unknown_options_import_only_that_module(self):
+        self.assertEqual(self.complete("report", "--"), ["--help", "--test-value"])
+        self.assertEqual(self.imported(), ["report"])
+
+    def test_options_are_cached_in_manifest(self):
+        with TemporaryDirectory() as cache_dir:
+            self.complete("report", "--", cache_dir=cache_dir)
+            self.unload_package(keep_root=True)
+            self.assertEqual(
+                self.complete("report", "--", cache_dir=cache_dir),
+                ["--help", "--test-value"],
+            )
+        self.assertEqual(self.imported(), [])
+
+    def test_parser_modules_are_not_imported(self):
+        # Completion runs on every <TAB>, so it must stay clear of argparse and
+        # everything that builds or runs parsers
+        heavy = [
+            "argparse", "threading", "autocli._bundle", "autocli._dispatch",
+            "autocli._fastparse", "autocli._help", "autocli._static", "autocli.telemetry",
+        ]
+        script = (
+            "import sys, autocli\n"
+            "try:\n"
+            f"    autocli.create_command_parser(__import__({self.pkg_name!r}))\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            f"print(sorted(set({heavy!r}) & set(sys.modules)))\n"
+        )
+        with TemporaryDirectory() as cache_dir:
+            env = dict(
+                os.environ,
+                PYTHONPATH=os.pathsep.join(sys.path),
+                AUTOCLI_CACHE_DIR=cache_dir,
+                AUTOCLI_COMPLETE="bash",
+            )
+            for _ in range(2):  # scanning, then from the manifest
+                result = subprocess.run(
+                    [sys.executable, "-c", script, "user", ""],
+                    capture_output=True, text=True, env=env,
+                )
+                *words, loaded = result.stdout.splitlines() or [""]
+                self.assertEqual(
+                    (sorted(words), loaded), (["add", "delete"], "[]"), result.stderr
+                )
+
+    def test_scripts(self):
+        self.assertIn("complete -o default -F _my_app_autocli_complete my-app", completion_script("bash", "my-app"))
+        self.assertIn("compdef _my_app_autocli_complete my-app", completion_script("zsh", "my-app"))
+        self.assertIn("complete -c my-app", completion_script("fish", "my-app"))
+        with self.assertRaises(ValueError):
+            completion_script("tcsh", "my-app")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from autocli.daemon import client_script, run_client
+from command_packages import CommandPackageMixin
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+ENV_TEMPLATE = """\
+import os
+import sys
+
+
+def autocli_setup_parser(subparsers, command_name):
+    parser = subparsers.add_parser(command_name)
+    parser.add_argument("name")
+    parser.set_defaults(func=run_command)
+
+
+def run_command(args):
+    print(f"{args.name}={os.environ.get(args.name)} cwd={os.getcwd()}")
+    print(f"stdin={sys.stdin.read().strip()}")
+    if args.name == "FAIL":
+        sys.exit("Error: failed on purpose.")
+"""
+
+
+@unittest.skipUnless(
+    hasattr(socket, "AF_UNIX") and hasattr(socket, "send_fds") and hasattr(os, "fork"),
+    "daemon mode needs Unix sockets with fd passing",
+)
+class DaemonTest(CommandPackageMixin, unittest.TestCase):
+    FILES = ["env.py"]
+    CONTENTS = {"env.py": ENV_TEMPLATE}
+
+    def setUp(self):
+        super().setUp()
+        self.socket_path = os.path.join(self._pkg_tempdir.name, "daemon.sock")
+        env = dict(
+            os.environ,
+            PYTHONPATH=os.pathsep.join([str(SRC_DIR), self._pkg_tempdir.name]),
+        )
+        self.server = subprocess.Popen(
+            [sys.executable, "-m", "autocli", "daemon", self.pkg_name, "--socket", self.socket_path],
+            env=env,
+            stderr=subprocess.PIPE,
+        )
+        deadline = time.monotonic() + 10
+        while not self.accepts_connections():
+            if time.monotonic() > deadline or self.server.poll() is not None:
+                self.fail(f"daemon did not start: {self.server.stderr.read()}")
+            time.sleep(0.02)
+
+    def tearDown(self):
+        self.server.terminate()
+        self.server.wait(timeout=10)
+        self.server.stderr.close()
+        self.assertFalse(os.path.exists(self.socket_path))
+        super().tearDown()
+
+    def accepts_connections(self):
+        # An empty connection is a probe the daemon ignores
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            return False
+        finally:
+            probe.close()
+        return True
+
+    def test_socket_is_private(self):
+        self.assertEqual(os.stat(self.socket_path).st_mode & 0o777, 0o600)
+        # The temporary name it was bound under is gone
+        names = os.listdir(self._pkg_tempdir.name)
+        self.assertEqual([n for n in names if n.startswith("daemon.sock")], ["daemon.sock"])
+
+    def invoke(self, argv, stdin=b""):
+        with tempfile.TemporaryFile() as fin, tempfile.TemporaryFile() as fout, tempfile.TemporaryFile() as ferr:
+            fin.write(stdin)
+            fin.seek(0)
+            code = run_client(self.socket_path, argv, (fin.fileno(), fout.fileno(), ferr.fileno()))
+            fout.seek(0)
+            ferr.seek(0)
+            return code, fout.read().decode(), ferr.read().decode()
+
+    def test_forwards_env_cwd_and_stdio(self):
+        os.environ["AUTOCLI_DAEMON_TEST"] = "forwarded"
+        try:
+            code, out, _ = self.invoke(["env", "AUTOCLI_DAEMON_TEST"], b"piped")
+        finally:
+            del os.environ["AUTOCLI_DAEMON_TEST"]
+        self.assertEqual(code, 0)
+        self.assertIn(f"AUTOCLI_DAEMON_TEST=forwarded cwd={os.getcwd()}", out)
+        self.assertIn("stdin=piped", out)
+
+    def test_sys_exit_is_isolated(self):
+        code, _, err = self.invoke(["env", "FAIL"])
+        self.assertEqual(code, 1)
+        self.assertIn("Error: failed on purpose.", err)
+
+        # The server survived and keeps serving
+        self.assertEqual(self.invoke(["env", "HOME"])[0], 0)
+        self.assertEqual(self.invoke(["missing"])[0], 2)
+
+    def test_client_script_runs_standalone(self):
+        script = Path(self._pkg_tempdir.name) / "client.py"
+        script.write_text(client_script(self.socket_path))
+        result = subprocess.run(
+            [sys.executable, "-IS", str(script), "env", "NOPE"],
+            capture_output=True,
+            text=True,
+            env={},
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("NOPE=None", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
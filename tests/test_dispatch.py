@@ -0,0 +1,98 @@
+import io
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+from autocli import create_command_parser, dispatch
+from command_packages import CommandPackageMixin
+
+EXIT_TEMPLATE = """\
+import sys
+
+
+def autocli_setup_parser(subparsers, command_name):
+    parser = subparsers.add_parser(command_name)
+    parser.add_argument("how")
+    parser.set_defaults(func=run_command)
+
+
+def run_command(args):
+    if args.how == "message":
+        sys.exit("Error: Username reserved or invalid.")
+    if args.how == "code":
+        sys.exit(3)
+    if args.how == "raise":
+        raise RuntimeError("boom")
+    print("fine")
+"""
+
+
+ASYNC_TEMPLATE = """\
+import asyncio
+import sys
+
+
+def autocli_setup_parser(subparsers, command_name):
+    parser = subparsers.add_parser(command_name)
+    parser.add_argument("how")
+    parser.set_defaults(func=run_command)
+
+
+async def run_command(args):
+    await asyncio.sleep(0)
+    if args.how == "message":
+        sys.exit("Error: async exit.")
+    if args.how == "raise":
+        raise RuntimeError("async boom")
+    print("awaited")
+"""
+
+
+class DispatchTest(CommandPackageMixin, unittest.TestCase):
+    FILES = ["exit.py", "wait.py"]
+    CONTENTS = {"exit.py": EXIT_TEMPLATE, "wait.py": ASYNC_TEMPLATE}
+
+    def run_dispatch(self, *argv):
+        parser = create_command_parser(self.package)
+        out, err = io.StringIO(), io.StringIO()
+        with redirect_stdout(out), redirect_stderr(err):
+            code = dispatch(parser, list(argv))
+        return code, out.getvalue(), err.getvalue()
+
+    def test_success(self):
+        self.assertEqual(self.run_dispatch("exit", "ok"), (0, "fine\n", ""))
+
+    def test_sys_exit_message(self):
+        code, _, err = self.run_dispatch("exit", "message")
+        self.assertEqual(code, 1)
+        self.assertEqual(err, "Error: Username reserved or invalid.\n")
+
+    def test_sys_exit_code(self):
+        self.assertEqual(self.run_dispatch("exit", "code")[0], 3)
+
+    def test_exception(self):
+        code, _, err = self.run_dispatch("exit", "raise")
+        self.assertEqual(code, 1)
+        self.assertIn("RuntimeError: boom", err)
+
+    def test_argparse_error(self):
+        code, _, err = self.run_dispatch("exit")
+        self.assertEqual(code, 2)
+        self.assertIn("the following arguments are required: how", err)
+
+
+    def test_async_command(self):
+        self.assertEqual(self.run_dispatch("wait", "ok"), (0, "awaited\n", ""))
+
+    def test_async_sys_exit(self):
+        code, _, err = self.run_dispatch("wait", "message")
+        self.assertEqual(code, 1)
+        self.assertEqual(err, "Error: async exit.\n")
+
+    def test_async_exception(self):
+        code, _, err = self.run_dispatch("wait", "raise")
+        self.assertEqual(code, 1)
+        self.assertIn("RuntimeError: async boom", err)
+
+
+if __name__ == "__main__":
+    unittest.main()
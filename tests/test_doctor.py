@@ -0,0 +1,78 @@
+import io
+import json
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+from autocli import _doctor
+from autocli.__main__ import main
+from command_packages import COMMAND_TEMPLATE, CommandPackageMixin
+
+HEAVY_NAME = "autocli_test_heavy_dependency"
+
+
+class DoctorTest(CommandPackageMixin, unittest.TestCase):
+    FILES = ["report.py", "user/heavy.py", "user/broken.py"]
+    CONTENTS = {
+        "user/heavy.py": f"import {HEAVY_NAME}\n" + COMMAND_TEMPLATE,
+        "user/broken.py": "raise ImportError('no such thing')\n",
+    }
+
+    def setUp(self):
+        super().setUp()
+        # A slow "third-party" package beside the command package
+        heavy = Path(self._pkg_tempdir.name) / f"{HEAVY_NAME}.py"
+        heavy.write_text("import time\ntime.sleep(0.05)\n")
+
+    def doctor(self, *argv):
+        out, err = io.StringIO(), io.StringIO()
+        with redirect_stdout(out), redirect_stderr(err), self.assertRaises(SystemExit) as cm:
+            main(["doctor", self.pkg_name, "--ignore", "broken.py", *argv])
+            raise SystemExit(0)
+        return cm.exception.code, out.getvalue(), err.getvalue()
+
+    def test_probe(self):
+        heavy = _doctor.probe_module(f"{self.pkg_name}.user.heavy")
+        self.assertIsNone(heavy["error"])
+        self.assertGreaterEqual(heavy["import_ms"], 50)
+        self.assertEqual(heavy["third_party"], [HEAVY_NAME])
+
+        report = _doctor.probe_module(f"{self.pkg_name}.report")
+        self.assertEqual(report["third_party"], [])
+        self.assertLess(report["import_ms"], heavy["import_ms"])
+
+        broken = _doctor.probe_module(f"{self.pkg_name}.user.broken")
+        self.assertEqual(broken["error"], "ImportError: no such thing")
+        # Nothing was imported here
+        self.assertEqual(self.imported(), [])
+
+    def test_budgets(self):
+        code, out, err = self.doctor("--max-import-ms", "40", "-j", "2")
+        self.assertEqual(code, "1 command module(s) over budget.")
+        self.assertIn("user/heavy.py: import took", err)
+        self.assertIn("user heavy", out)
+
+        code, _, err = self.doctor("--max-import-ms", "40", "--budget", "user *=5000")
+        self.assertEqual((code, err), (0, ""))
+
+        code, _, err = self.doctor("--forbid", HEAVY_NAME, "--json")
+        self.assertIn(f"imports {HEAVY_NAME} at module level", err)
+        self.assertNotEqual(code, 0)
+
+    def test_json_report_and_import_errors(self):
+        out, err = io.StringIO(), io.StringIO()
+        with redirect_stdout(out), redirect_stderr(err), self.assertRaises(SystemExit):
+            main(["doctor", self.pkg_name, "--json"])
+        report = {entry["command"]: entry for entry in json.loads(out.getvalue())}
+        self.assertEqual(sorted(report), ["report", "user broken", "user heavy"])
+        self.assertEqual(report["user heavy"]["third_party"], [HEAVY_NAME])
+        self.assertIn("user/broken.py: import failed: ImportError", err.getvalue())
+
+    def test_parse_budget(self):
+        self.assertEqual(_doctor.parse_budget("report *=250"), ("report *", 250.0))
+        with self.assertRaises(ValueError):
+            _doctor.parse_budget("250")
+
+
+if __name__ == "__main__":
+    unittest.main()
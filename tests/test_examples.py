@@ -6,6 +6,8 @@ from pathlib import Path
 from tempfile import TemporaryDirectory
 from abc import ABC, abstractmethod
 
+from autocli.testing import CliResult, CliRunner
+
 
 # --- GLOBAL PATHS ---
 
@@ -64,6 +66,15 @@ class BaseAppTest(ABC):
     APP_NAME = ""
     COMMANDS: list[tuple[list[str], str]] = []
 
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # One parser per app; the app's `commands` package is only importable
+        # while one of its commands runs, so the apps do not see each other's
+        cls.cli = CliRunner(
+            "commands", app_root=EXAMPLES_DIR / cls.APP_NAME, description="run"
+        )
+
     def setUp(self):
         super().setUp()
         self.app_root = EXAMPLES_DIR / self.APP_NAME
@@ -76,7 +87,10 @@ class BaseAppTest(ABC):
         self._tempdir.cleanup()
         super().tearDown()
 
-    def run_cli(self, args: list[str]) -> subprocess.CompletedProcess:
+    def run_cli(self, args: list[str]) -> CliResult:
+        return self.cli.invoke(args)
+
+    def run_script(self, args: list[str]) -> subprocess.CompletedProcess:
         cmd = [sys.executable, str(self.runner)] + args
         return subprocess.run(
             cmd,
@@ -86,6 +100,15 @@ class BaseAppTest(ABC):
             check=False,
         )
 
+    def test_run_py(self):
+        """run.py itself, end to end, once per app."""
+        cli_args, _ = self.COMMANDS[0]
+        full_args = cli_args + ["--test-value", "FROM_RUN_PY"]
+        result = self.run_script(full_args)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("ran with value: FROM_RUN_PY", result.stdout)
+        self.assertEqual(result.stdout, self.run_cli(full_args).stdout)
+
 
 # --- DYNAMIC TEST GENERATION ---
 
@@ -124,11 +147,11 @@ def generate_tests():
 
                     result = self.run_cli(full_args)
 
-                    if result.returncode != 0:
+                    if result.exit_code != 0:
                         self.fail(
                             f"\n❌ Command returned nonzero exit code\n"
                             f"Command: {' '.join(full_args)}\n"
-                            f"Return code: {result.returncode}\n\n"
+                            f"Return code: {result.exit_code}\n\n"
                             f"STDERR:\n{result.stderr}\n"
                             f"STDOUT:\n{result.stdout}\n"
                         )
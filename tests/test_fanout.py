@@ -0,0 +1,130 @@
+import io
+import multiprocessing
+import sys
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+from autocli import create_command_parser
+from autocli.fanout import expand_argv, fan_out, read_values
+from command_packages import CommandPackageMixin
+
+PING_TEMPLATE = """\
+import sys
+import threading
+import time
+
+LOCK = threading.Lock()
+IN_FLIGHT = 0
+PEAK = 0
+
+
+def autocli_setup_parser(subparsers, command_name):
+    parser = subparsers.add_parser(command_name)
+    parser.add_argument("--host", required=True)
+    parser.add_argument("--delay", type=float, default=0.0)
+    parser.set_defaults(func=run_command)
+
+
+def run_command(args):
+    global IN_FLIGHT, PEAK
+    with LOCK:
+        IN_FLIGHT += 1
+        PEAK = max(PEAK, IN_FLIGHT)
+    try:
+        print(f"pinging {args.host}")
+        time.sleep(args.delay)
+        if args.host.startswith("down"):
+            sys.exit(f"Error: {args.host} unreachable.")
+        print(f"{args.host} is up")
+    finally:
+        with LOCK:
+            IN_FLIGHT -= 1
+"""
+
+
+class ExpandArgvTest(unittest.TestCase):
+    def test_placeholder_and_append(self):
+        self.assertEqual(
+            expand_argv(["db", "ping", "--host={}"], "a"), ["db", "ping", "--host=a"]
+        )
+        self.assertEqual(expand_argv(["db", "ping", "--host"], "a"), ["db", "ping", "--host", "a"])
+        self.assertEqual(expand_argv(["x", "%"], "a", placeholder="%"), ["x", "a"])
+
+    def test_read_values(self):
+        self.assertEqual(read_values(io.StringIO("a\n\n# skip\n b \n")), ["a", "b"])
+
+
+class FanOutTest(CommandPackageMixin, unittest.TestCase):
+    FILES = ["db__ping.py"]
+    CONTENTS = {"db__ping.py": PING_TEMPLATE}
+
+    def run_fan_out(self, argv, values, lazy=True, **kwargs):
+        parser = create_command_parser(self.package, lazy=lazy)
+        out, err = io.StringIO(), io.StringIO()
+        with redirect_stdout(out), redirect_stderr(err):
+            code = fan_out(parser, argv, values, **kwargs)
+        return code, out.getvalue(), err.getvalue()
+
+    def test_output_blocks_in_input_order(self):
+        # Each value is also the delay, so earlier values finish last
+        delays = ["0.08", "0.04", "0.0"]
+        code, out, err = self.run_fan_out(
+            ["db", "ping", "--host", "{}", "--delay", "{}"], delays, workers=3
+        )
+        self.assertEqual(code, 0, err)
+        self.assertEqual(out, "".join(f"pinging {d}\n{d} is up\n" for d in delays))
+        self.assertEqual(err, "")
+
+    def test_value_appended_without_placeholder(self):
+        hosts = [f"h{i}" for i in range(8)]
+        code, out, err = self.run_fan_out(["db", "ping", "--host"], hosts)
+        self.assertEqual(code, 0, err)
+        self.assertEqual(out, "".join(f"pinging {h}\n{h} is up\n" for h in hosts))
+
+    def test_bounded_concurrency(self):
+        hosts = [f"h{i}" for i in range(6)]
+        code, _out, _err = self.run_fan_out(
+            ["db", "ping", "--delay", "0.05", "--host={}"], hosts, workers=2
+        )
+        self.assertEqual(code, 0)
+        module = sys.modules[f"{self.pkg_name}.db__ping"]
+        self.assertEqual(module.PEAK, 2)
+
+    def test_failures_are_aggregated(self):
+        code, out, err = self.run_fan_out(
+            ["db", "ping", "--host"], ["up1", "down1", "up2", "down2"], lazy=False
+        )
+        self.assertEqual(code, 1)
+        self.assertIn("up1 is up\n", out)
+        self.assertIn("up2 is up\n", out)
+        self.assertIn("Error: down1 unreachable.\n", err)
+        self.assertIn("Error: 2 of 4 invocations failed: down1 (1), down2 (1)", err)
+
+    def test_as_completed_reports_every_result(self):
+        results = []
+        code = fan_out(
+            create_command_parser(self.package),
+            ["db", "ping", "--host"],
+            ["a", "b", "c"],
+            ordered=False,
+            on_result=results.append,
+        )
+        self.assertEqual(code, 0)
+        self.assertEqual(sorted(r[0] for r in results), ["a", "b", "c"])
+        for value, code, out, err in results:
+            self.assertEqual(out, f"pinging {value}\n{value} is up\n")
+
+    @unittest.skipUnless(
+        "fork" in multiprocessing.get_all_start_methods(), "needs the fork start method"
+    )
+    def test_process_pool(self):
+        code, out, err = self.run_fan_out(
+            ["db", "ping", "--host"], ["a", "down"], processes=True, workers=2
+        )
+        self.assertEqual(code, 1)
+        self.assertEqual(out, "pinging a\na is up\npinging down\n")
+        self.assertIn("Error: down unreachable.", err)
+
+
+if __name__ == "__main__":
+    unittest.main()
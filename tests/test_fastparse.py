@@ -0,0 +1,219 @@
+import argparse
+import io
+import os
+import sys
+import unittest
+from contextlib import redirect_stderr
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from autocli import CommandTree, create_command_parser
+from autocli._fastparse import MAX_CHOICES, compile_table, fast_parse
+from autocli._index import build_index
+from command_packages import CommandPackageMixin
+
+DEPLOY_TEMPLATE = """\
+SETUP_CALLS = []
+
+
+def autocli_setup_parser(subparsers, command_name):
+    SETUP_CALLS.append(command_name)
+    parser = subparsers.add_parser(command_name, help="Deploys.")
+    parser.add_argument("target")
+    parser.add_argument("replicas", type=int)
+    parser.add_argument("--region", choices=["eu", "us"], default="eu")
+    parser.add_argument("--timeout", type=float, default="2.5")
+    parser.add_argument("--port", type=int, choices=range(1, 2**24), default=80)
+    parser.add_argument("--force", action="store_true")
+    parser.add_argument("--no-wait", dest="wait", action="store_false")
+    parser.add_argument("--tag", action="append")
+    parser.add_argument("-v", "--verbose", action="count", default=0)
+    parser.add_argument("--token", required=True)
+    parser.set_defaults(func=run_command, kind="deploy")
+
+
+def run_command(args):
+    pass
+"""
+
+NARGS_TEMPLATE = """\
+def autocli_setup_parser(subparsers, command_name):
+    parser = subparsers.add_parser(command_name)
+    parser.add_argument("paths", nargs="+")
+    parser.set_defaults(func=run_command)
+
+
+def run_command(args):
+    pass
+"""
+
+GREET_TEMPLATE = """\
+from .common import add_options
+
+
+def autocli_setup_parser(subparsers, command_name):
+    parser = subparsers.add_parser(command_name)
+    add_options(parser)
+    parser.set_defaults(func=run_command)
+
+
+def run_command(args):
+    pass
+"""
+
+COMMON_TEMPLATE = """\
+def add_options(parser):
+    parser.add_argument("--name", required=True)
+"""
+
+
+class FastParseTest(CommandPackageMixin, unittest.TestCase):
+    FILES = ["app/deploy.py", "report.py", "copy.py", "greet.py", "common.py"]
+    CONTENTS = {
+        "app/deploy.py": DEPLOY_TEMPLATE,
+        "copy.py": NARGS_TEMPLATE,
+        "greet.py": GREET_TEMPLATE,
+        "common.py": COMMON_TEMPLATE,
+    }
+
+    def setUp(self):
+        super().setUp()
+        self._cache_tempdir = TemporaryDirectory()
+        self.cache_dir = self._cache_tempdir.name
+
+    def tearDown(self):
+        self._cache_tempdir.cleanup()
+        super().tearDown()
+
+    def warm_parser(self):
+        """A lazy parser whose manifest already has every command's parse table."""
+        create_command_parser(self.package, cache_dir=self.cache_dir)
+        self.unload_package(keep_root=True)
+        return create_command_parser(self.package, lazy=True, cache_dir=self.cache_dir)
+
+    def argparse_namespace(self, argv):
+        parser = create_command_parser(self.package, fast_parse=False)
+        return parser.parse_args(argv)
+
+    def test_tables(self):
+        parser = argparse.ArgumentParser()
+        parser.add_argument("name")
+        parser.set_defaults(func=print)
+        table = compile_table(parser, sys.modules["builtins"])
+        self.assertEqual(table["defaults"], {"func": {"attr": "print"}})
+        self.assertEqual(table["positionals"], [0])
+
+        # A range is stored by its bounds, however long it is
+        parser.add_argument("--port", type=int, choices=range(0, 2**24, 2))
+        table = compile_table(parser, sys.modules["builtins"])
+        self.assertEqual(table["actions"][-1]["choices"], {"range": [0, 2**24, 2]})
+
+        parser.add_argument("--level", type=int, choices=list(range(MAX_CHOICES + 1)))
+        self.assertIsNone(compile_table(parser, None))
+
+        parser = argparse.ArgumentParser()
+        parser.add_argument("--each", nargs=2)
+        self.assertIsNone(compile_table(parser, None))
+
+    def test_tables_only_compiled_for_a_manifest(self):
+        with mock.patch("autocli._fastparse.compile_table") as compile_table:
+            create_command_parser(self.package)
+        compile_table.assert_not_called()
+
+    def test_same_namespace_as_argparse(self):
+        parser = self.warm_parser()
+        for argv in (
+            ["app", "deploy", "web", "3", "--token", "t"],
+            ["app", "deploy", "--token=t", "web", "--region", "us", "3", "--force"],
+            ["app", "deploy", "web", "3", "--token", "t", "--tag", "a", "--tag=b"],
+            ["app", "deploy", "web", "3", "--token", "t", "-v", "--verbose"],
+            ["app", "deploy", "web", "3", "--token", "t", "--timeout", "1", "--no-wait"],
+            ["app", "deploy", "web", "3", "--token", "t", "--port", "8080"],
+            ["report", "--test-value", "x"],
+        ):
+            fast = parser.parse_args(argv)
+            self.assertEqual(vars(fast), vars(self.argparse_namespace(argv)), argv)
+
+    def test_fast_path_skips_setup(self):
+        parser = self.warm_parser()
+        args = parser.parse_args(["app", "deploy", "web", "3", "--token", "t"])
+        module = sys.modules[f"{self.pkg_name}.app.deploy"]
+        self.assertEqual(module.SETUP_CALLS, [])
+        self.assertIs(args.func, module.run_command)
+        self.assertEqual(self.imported(), ["app", "app.deploy"])
+
+    def test_unusual_arguments_fall_back(self):
+        parser = self.warm_parser()
+        for argv in (
+            ["app", "deploy", "web", "three", "--token", "t"],  # bad int
+            ["app", "deploy", "web", "3", "--region", "asia", "--token", "t"],
+            ["app", "deploy", "web", "3", "--port", "0", "--token", "t"],
+            ["app", "deploy", "web", "3"],  # missing required option
+            ["app", "deploy", "web", "3", "4", "--token", "t"],  # extra positional
+            ["app", "deploy", "web", "3", "--tok", "t"],  # abbreviation
+            ["app", "deploy", "web", "-3", "--token", "t"],
+            ["app", "deploy", "--force=yes", "web", "3", "--token", "t"],
+            ["ap", "deploy", "web", "3", "--token", "t"],
+            ["copy", "a", "b"],  # no table (nargs)
+        ):
+            fast = self.parse(parser, argv)
+            self.assertEqual(fast, self.parse(create_command_parser(self.package), argv))
+
+    def test_root_options_disable_the_fast_path(self):
+        parser = self.warm_parser()
+        parser.add_argument("--debug", action="store_true")
+        argv = ["report", "--test-value", "x"]
+        self.assertIsNone(fast_parse(parser, CommandTree(), argv))
+        self.assertFalse(parser.parse_args(argv).debug)
+
+    def parse(self, parser, argv):
+        """Returns the namespace (as a dict) or the exit code and error for argv."""
+        err = io.StringIO()
+        with redirect_stderr(err):
+            try:
+                return vars(parser.parse_args(argv)), ""
+            except SystemExit as e:
+                return e.code, err.getvalue()
+
+    def test_changed_helper_module_drops_tables(self):
+        argv = ["greet", "--name", "bob"]
+        self.assertEqual(self.parse(self.warm_parser(), argv)[0]["name"], "bob")
+
+        path = self.write_command(
+            "common.py", COMMON_TEMPLATE + '    parser.add_argument("--region", required=True)\n'
+        )
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.unload_package(keep_root=True)
+        parser = create_command_parser(self.package, lazy=True, cache_dir=self.cache_dir)
+        code, err = self.parse(parser, argv)
+        self.assertEqual(code, 2)
+        self.assertIn("--region", err)
+
+    def test_profile_covers_the_fast_path(self):
+        create_command_parser(self.package, cache_dir=self.cache_dir)
+        self.unload_package(keep_root=True)
+        with mock.patch("autocli._profile.atexit.register") as register:
+            parser = create_command_parser(
+                self.package, lazy=True, cache_dir=self.cache_dir, profile=True
+            )
+        startup_profile = register.call_args[0][0].__self__
+        parser.parse_args(["app", "deploy", "web", "3", "--token", "t"])
+
+        report = startup_profile.as_dict()
+        self.assertIn("parse_args", [phase["phase"] for phase in report["phases"]])
+        modules = {m["module"]: m for m in report["modules"]}
+        deploy = modules[f"{self.pkg_name}.app.deploy"]
+        self.assertGreater(deploy["import_ns"], 0)
+        self.assertEqual(deploy["setup_ns"], 0)
+
+    def test_index_records_tables(self):
+        build_index(self.package)
+        self.unload_package(keep_root=True)
+        parser = create_command_parser(self.package, lazy=True)
+        parser.parse_args(["app", "deploy", "web", "3", "--token", "t"])
+        self.assertEqual(sys.modules[f"{self.pkg_name}.app.deploy"].SETUP_CALLS, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import io
+import json
+import os
+import unittest
+from contextlib import redirect_stdout
+from tempfile import TemporaryDirectory
+
+from autocli import create_command_parser
+from command_packages import CommandPackageMixin
+
+OTHER_TEMPLATE = """\
+def autocli_setup_parser(subparsers, command_name):
+    parser = subparsers.add_parser(command_name, help="Changed.")
+    parser.add_argument("--other")
+    parser.set_defaults(func=run_command)
+
+
+def run_command(args):
+    pass
+"""
+
+HELPER_COMMAND_TEMPLATE = """\
+from .common import add_options
+
+
+def autocli_setup_parser(subparsers, command_name):
+    parser = subparsers.add_parser(command_name, help="Uses a helper.")
+    add_options(parser)
+    parser.set_defaults(func=run_command)
+
+
+def run_command(args):
+    pass
+"""
+
+COMMON_TEMPLATE = """\
+def add_options(parser):
+    parser.add_argument("{option}")
+"""
+
+
+class CachedHelpTest(CommandPackageMixin, unittest.TestCase):
+    FILES = ["report.py", "user/add.py", "user/delete.py"]
+
+    def setUp(self):
+        super().setUp()
+        self._cache_tempdir = TemporaryDirectory()
+        self.cache_dir = self._cache_tempdir.name
+
+    def tearDown(self):
+        self._cache_tempdir.cleanup()
+        super().tearDown()
+
+    def help(self, argv, **kwargs):
+        """Returns the help printed for argv by a fresh lazy parser."""
+        self.unload_package(keep_root=True)
+        parser = create_command_parser(
+            self.package, lazy=True, cache_dir=self.cache_dir, prog="prog", **kwargs
+        )
+        out = io.StringIO()
+        with redirect_stdout(out), self.assertRaises(SystemExit) as cm:
+            parser.parse_args(argv)
+        self.assertEqual(cm.exception.code, 0)
+        return out.getvalue()
+
+    def expected_help(self, argv):
+        """Returns the help argparse prints for argv without any cache."""
+        parser = create_command_parser(self.package, prog="prog")
+        out = io.StringIO()
+        with redirect_stdout(out), self.assertRaises(SystemExit):
+            parser.parse_args(argv)
+        return out.getvalue()
+
+    def test_help_served_without_imports(self):
+        for argv in (["--help"], ["user", "-h"], ["user", "add", "--help"]):
+            first = self.help(argv)
+            self.assertEqual(first, self.expected_help(argv))
+            self.assertEqual(self.help(argv), first)
+            self.assertEqual(self.imported(), [])
+
+        with open(os.path.join(self.cache_dir, os.listdir(self.cache_dir)[0])) as f:
+            self.assertEqual(sorted(json.load(f)["help"]), ["", "user", "user__add"])
+
+    def test_changed_module_regenerates_help(self):
+        self.help(["user", "add", "-h"])
+        self.help(["user", "-h"])
+        path = self.write_command("user/add.py", OTHER_TEMPLATE)
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        self.assertIn("--other", self.help(["user", "add", "-h"]))
+        self.assertIn("Changed.", self.help(["user", "-h"]))
+        # Unrelated help is still served from the cache
+        self.help(["report", "-h"])
+        self.assertIn("--test-value", self.help(["report", "-h"]))
+        self.assertEqual(self.imported(), [])
+
+    def test_changed_helper_module_regenerates_help(self):
+        self.write_command("greet.py", HELPER_COMMAND_TEMPLATE)
+        self.write_command("common.py", COMMON_TEMPLATE.format(option="--name"))
+        self.assertIn("--name", self.help(["greet", "-h"]))
+
+        path = self.write_command("common.py", COMMON_TEMPLATE.format(option="--region"))
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertIn("--region", self.help(["greet", "-h"]))
+
+    def test_root_options_are_part_of_the_key(self):
+        self.help(["-h"])
+        self.unload_package(keep_root=True)
+        parser = create_command_parser(
+            self.package, lazy=True, cache_dir=self.cache_dir, prog="prog"
+        )
+        parser.add_argument("--verbose", action="store_true")
+        out = io.StringIO()
+        with redirect_stdout(out), self.assertRaises(SystemExit):
+            parser.parse_args(["-h"])
+        self.assertIn("--verbose", out.getvalue())
+
+    def test_other_arguments_are_parsed(self):
+        parser = create_command_parser(self.package, lazy=True, cache_dir=self.cache_dir)
+        args = parser.parse_args(["user", "add", "--test-value=-h"])
+        self.assertEqual(args.test_value, "-h")
+
+
+if __name__ == "__main__":
+    unittest.main()
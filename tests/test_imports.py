@@ -0,0 +1,96 @@
+import io
+import json
+import os
+import sys
+import unittest
+from contextlib import redirect_stdout
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from autocli import create_command_parser, lazy_import
+from autocli._imports import LazyModule
+from command_packages import CommandPackageMixin
+
+COMMAND_TEMPLATE = """\
+{header}
+
+
+def autocli_setup_parser(subparsers, command_name):
+    parser = subparsers.add_parser(command_name)
+    parser.set_defaults(func=run_command)
+
+
+def run_command(args):
+    print(heavy.answer())
+"""
+
+
+class LazyImportTest(CommandPackageMixin, unittest.TestCase):
+    FILES = []
+
+    def setUp(self):
+        super().setUp()
+        self.heavy = f"{self.pkg_name}_heavy"
+        (self.pkg_dir.parent / f"{self.heavy}.py").write_text(
+            "LOADS = 1\n\ndef answer():\n    return 42\n"
+        )
+        self.write_command(
+            "lazy.py",
+            COMMAND_TEMPLATE.format(
+                header=f"import autocli\n\nheavy = autocli.lazy_import({self.heavy!r})"
+            ),
+        )
+        self.write_command(
+            "eager.py", COMMAND_TEMPLATE.format(header=f"import {self.heavy} as heavy")
+        )
+
+    def tearDown(self):
+        sys.modules.pop(self.heavy, None)
+        super().tearDown()
+
+    def test_already_imported_module_is_returned(self):
+        self.assertIs(lazy_import("json"), sys.modules["json"])
+
+    def test_import_deferred_until_attribute_access(self):
+        proxy = lazy_import(self.heavy)
+        self.assertIsInstance(proxy, LazyModule)
+        self.assertNotIn(self.heavy, sys.modules)
+        self.assertIn("not loaded", repr(proxy))
+
+        self.assertEqual(proxy.answer(), 42)
+        self.assertIn(self.heavy, sys.modules)
+        proxy.LOADS = 2
+        self.assertEqual(sys.modules[self.heavy].LOADS, 2)
+        self.assertIn("answer", dir(proxy))
+
+    def test_missing_module_fails_on_first_use(self):
+        proxy = lazy_import(f"{self.heavy}_missing")
+        with self.assertRaises(ModuleNotFoundError):
+            proxy.anything
+
+    def test_command_setup_does_not_import(self):
+        parser = create_command_parser(self.package, lazy=True)
+        args = parser.parse_args(["lazy"])
+        self.assertNotIn(self.heavy, sys.modules)
+
+        out = io.StringIO()
+        with redirect_stdout(out):
+            args.func(args)
+        self.assertEqual(out.getvalue(), "42\n")
+
+    def test_profile_reports_imports_paid_while_building(self):
+        with TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "profile.json")
+            with mock.patch("autocli._profile.atexit.register") as register:
+                create_command_parser(self.package, profile=path)
+            emit, target = register.call_args[0]
+            emit(target)
+            with open(path, encoding="utf-8") as f:
+                modules = {m["module"]: m for m in json.load(f)["modules"]}
+
+        self.assertEqual(modules[f"{self.pkg_name}.eager"]["imports"], {self.heavy: 1})
+        self.assertNotIn(self.heavy, modules[f"{self.pkg_name}.lazy"]["imports"])
+
+
+if __name__ == "__main__":
+    unittest.main()
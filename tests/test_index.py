@@ -0,0 +1,56 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+import autocli
+from autocli import create_command_parser
+from autocli.__main__ import main
+from command_packages import CommandPackageMixin
+
+
+class StaticIndexTest(CommandPackageMixin, unittest.TestCase):
+    FILES = ["report.py", "user/__init__.py", "user/add.py", "user__delete.py"]
+
+    def build_index(self):
+        with redirect_stdout(io.StringIO()):
+            main(["build-index", self.pkg_name])
+        self.unload_package(keep_root=True)
+        return self.pkg_dir / "_autocli_index.py"
+
+    def test_build_index_writes_entries(self):
+        index_file = self.build_index()
+        source = index_file.read_text()
+        self.assertIn("'module': 'user.add'", source)
+        self.assertIn("'command_parts': ['user', 'delete']", source)
+        self.assertIn("'help': 'The report command.'", source)
+
+    def test_index_replaces_filesystem_scan(self):
+        self.build_index()
+        with mock.patch.object(
+            autocli, "_scan_command_modules", side_effect=AssertionError("scanned")
+        ), mock.patch.object(
+            autocli, "_get_package_dir", side_effect=AssertionError("stat")
+        ):
+            parser = create_command_parser(self.package)
+
+        args = parser.parse_args(["user", "delete", "--test-value", "v"])
+        self.assertEqual(args.test_value, "v")
+
+    def test_index_module_is_not_a_command(self):
+        self.build_index()
+        parser = create_command_parser(self.package, index=False)
+        choices = parser._subparsers._group_actions[0].choices
+        self.assertEqual(sorted(choices), ["report", "user"])
+
+    def test_lazy_mode_uses_indexed_help(self):
+        self.build_index()
+        parser = create_command_parser(self.package, lazy=True)
+        root = parser._subparsers._group_actions[0]
+        help_text = parser.format_help() + root.resolve("user").format_help()
+        self.assertIn("The report command.", help_text)
+        self.assertIn("The delete command.", help_text)
+        self.assertEqual(self.imported(), ["_autocli_index"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import io
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+from autocli import LazySubParsersAction, create_command_parser
+from command_packages import CommandPackageMixin
+
+
+class LazyParserTest(CommandPackageMixin, unittest.TestCase):
+    FILES = [
+        "report.py",
+        "user/__init__.py",
+        "user/add.py",
+        "user__delete.py",
+        "admin__db/connect.py",
+        "broken.py",
+    ]
+    CONTENTS = {"broken.py": "VALUE = 1\n"}
+
+    def root_action(self, parser):
+        return parser._subparsers._group_actions[0]
+
+    def test_nothing_is_imported_up_front(self):
+        parser = create_command_parser(self.package, lazy=True)
+        self.assertEqual(self.imported(), [])
+        self.assertIsInstance(self.root_action(parser), LazySubParsersAction)
+        self.assertEqual(
+            sorted(self.root_action(parser).choices),
+            ["admin", "broken", "report", "user"],
+        )
+
+    def test_only_selected_command_is_imported(self):
+        parser = create_command_parser(self.package, lazy=True)
+        args = parser.parse_args(["user", "add", "--test-value", "x"])
+        self.assertEqual(self.imported(), ["user", "user.add"])
+
+        out = io.StringIO()
+        with redirect_stdout(out):
+            args.func(args)
+        self.assertIn("ran with value: x", out.getvalue())
+        self.assertEqual(args.cmd, "user")
+        self.assertEqual(args.user, "add")
+
+    def test_dunder_command_is_selected(self):
+        parser = create_command_parser(self.package, lazy=True)
+        args = parser.parse_args(["admin", "db", "connect", "--test-value", "y"])
+        self.assertEqual(self.imported(), ["admin__db", "admin__db.connect"])
+        self.assertEqual(args.test_value, "y")
+        self.assertEqual(args.admin__db, "connect")
+
+    def test_group_help_imports_direct_children_only(self):
+        parser = create_command_parser(self.package, lazy=True)
+        user_parser = self.root_action(parser).resolve("user")
+        self.assertEqual(self.imported(), [])
+
+        help_text = user_parser.format_help()
+        self.assertEqual(self.imported(), ["user", "user.add", "user__delete"])
+        self.assertIn("The add command.", help_text)
+        self.assertIn("The delete command.", help_text)
+
+    def test_root_help_keeps_order_and_drops_invalid_modules(self):
+        parser = create_command_parser(self.package, lazy=True)
+        eager_help = create_command_parser(self.package).format_help()
+
+        err = io.StringIO()
+        with redirect_stderr(err):
+            lazy_help = parser.format_help()
+        self.assertIn("broken skipped", err.getvalue())
+        # Column widths may differ (choices listed before they are loaded)
+        self.assertEqual(
+            [line.split() for line in lazy_help.split("Commands:")[1].splitlines()[2:]],
+            [line.split() for line in eager_help.split("Commands:")[1].splitlines()[2:]],
+        )
+
+    def test_invalid_module_selected(self):
+        parser = create_command_parser(self.package, lazy=True)
+        with redirect_stderr(io.StringIO()) as err, self.assertRaises(SystemExit):
+            parser.parse_args(["broken"])
+        self.assertIn("could not be loaded", err.getvalue())
+
+    def test_eager_mode_imports_everything(self):
+        with redirect_stderr(io.StringIO()):
+            create_command_parser(self.package)
+        self.assertEqual(
+            self.imported(),
+            [
+                "admin__db",
+                "admin__db.connect",
+                "broken",
+                "report",
+                "user",
+                "user.add",
+                "user__delete",
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import io
+import json
+import os
+import unittest
+from contextlib import redirect_stderr
+from tempfile import TemporaryDirectory
+
+from autocli import create_command_parser
+from command_packages import CommandPackageMixin
+
+
+class ManifestTest(CommandPackageMixin, unittest.TestCase):
+    FILES = ["report.py", "user/__init__.py", "user/add.py", "broken.py"]
+    CONTENTS = {"broken.py": "VALUE = 1\n"}
+
+    def setUp(self):
+        super().setUp()
+        self._cache = TemporaryDirectory()
+        self.cache_dir = self._cache.name
+
+    def tearDown(self):
+        self._cache.cleanup()
+        super().tearDown()
+
+    def build(self, **kwargs):
+        """Builds a parser as a fresh process would: nothing imported yet."""
+        self.unload_package(keep_root=True)
+        err = io.StringIO()
+        with redirect_stderr(err):
+            parser = create_command_parser(self.package, cache_dir=self.cache_dir, **kwargs)
+        return parser, err.getvalue()
+
+    def manifest(self):
+        (name,) = os.listdir(self.cache_dir)
+        with open(os.path.join(self.cache_dir, name), encoding="utf-8") as f:
+            return json.load(f)
+
+    def commands(self, parser):
+        return sorted(parser._subparsers._group_actions[0].choices)
+
+    def test_manifest_records_modules(self):
+        self.build()
+        modules = self.manifest()["modules"]
+        self.assertEqual(sorted(modules), ["broken.py", "report.py", "user/add.py"])
+        self.assertEqual(modules["user/add.py"]["command_parts"], ["user", "add"])
+        self.assertEqual(modules["user/add.py"]["help"], "The add command.")
+        self.assertTrue(modules["report.py"]["valid"])
+        self.assertFalse(modules["broken.py"]["valid"])
+
+    def test_invalid_module_is_not_imported_again(self):
+        _, first_err = self.build()
+        self.assertIn("broken skipped", first_err)
+
+        _, second_err = self.build()
+        self.assertIn("broken skipped", second_err)
+        self.assertNotIn("broken", self.imported())
+
+    def test_modified_module_is_revalidated(self):
+        self.build()
+        self.write_command("broken.py")  # now a valid command
+        parser, err = self.build()
+        self.assertEqual(err, "")
+        self.assertIn("broken", self.commands(parser))
+
+    def test_added_and_removed_files_invalidate(self):
+        self.build()
+        self.write_command("user/delete.py")
+        os.unlink(self.pkg_dir / "report.py")
+
+        parser, _ = self.build()
+        self.assertIn("user/delete.py", self.manifest()["modules"])
+        self.assertNotIn("report.py", self.manifest()["modules"])
+        self.assertEqual(self.commands(parser), ["user"])
+
+    def test_rename_between_layouts(self):
+        self.build()
+        os.rename(self.pkg_dir / "user" / "add.py", self.pkg_dir / "user__add.py")
+
+        self.build()
+        modules = self.manifest()["modules"]
+        self.assertNotIn("user/add.py", modules)
+        self.assertEqual(modules["user__add.py"]["command_parts"], ["user", "add"])
+        self.assertEqual(modules["user__add.py"]["import_name"], f"{self.pkg_name}.user__add")
+
+    def test_lazy_choices_use_cached_help(self):
+        self.build()
+        parser, _ = self.build(lazy=True)
+        root = parser._subparsers._group_actions[0]
+        help_text = root.resolve("user").format_help()
+        self.assertIn("The add command.", help_text)
+        self.assertEqual(self.imported(), [])
+
+    def test_lazy_loading_updates_manifest(self):
+        self.build(lazy=True)
+        self.assertIsNone(self.manifest()["modules"]["report.py"]["help"])
+
+        parser, _ = self.build(lazy=True)
+        parser.parse_args(["report", "--test-value", "x"])
+        self.assertEqual(self.manifest()["modules"]["report.py"]["help"], "The report command.")
+
+if __name__ == "__main__":
+    unittest.main()
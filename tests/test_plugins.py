@@ -0,0 +1,123 @@
+import importlib
+import io
+import os
+import sys
+import unittest
+from contextlib import redirect_stderr
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from autocli import _plugins, create_command_parser
+from command_packages import COMMAND_TEMPLATE, CommandPackageMixin
+
+
+class PluginTest(CommandPackageMixin, unittest.TestCase):
+    FILES = ["report.py", "user__add.py"]
+
+    # Files of the separately "installed" plugin package
+    PLUGIN_FILES = [
+        "deploy.py",
+        "report.py",
+        "user/__init__.py",
+        "user/list.py",
+        "user__add__x.py",
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.root = self.pkg_dir.parent
+        self.plugin_name = f"{self.pkg_name}_plugin"
+        self.group = f"{self.pkg_name}.commands"
+        plugin_dir = self.root / self.plugin_name
+        plugin_dir.mkdir()
+        (plugin_dir / "__init__.py").write_text("")
+        for relative in self.PLUGIN_FILES:
+            path = plugin_dir / relative
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("" if path.name == "__init__.py" else COMMAND_TEMPLATE)
+
+        self._cache = TemporaryDirectory()
+        self.cache_dir = self._cache.name
+
+    def tearDown(self):
+        for name in list(sys.modules):
+            if name.startswith(self.plugin_name):
+                del sys.modules[name]
+        self._cache.cleanup()
+        super().tearDown()
+
+    def install(self, dist, entry_points):
+        """Writes a minimal .dist-info directory onto sys.path (dist: normalized name)."""
+        dist_info = self.root / f"{dist}-1.0.dist-info"
+        dist_info.mkdir()
+        (dist_info / "METADATA").write_text(
+            f"Metadata-Version: 2.1\nName: {dist}\nVersion: 1.0\n"
+        )
+        lines = [f"[{self.group}]"] + [f"{k} = {v}" for k, v in entry_points.items()]
+        (dist_info / "entry_points.txt").write_text("\n".join(lines) + "\n")
+        importlib.invalidate_caches()
+
+    def build(self, packages=None, **kwargs):
+        err = io.StringIO()
+        with redirect_stderr(err):
+            parser = create_command_parser(packages or self.package, **kwargs)
+        return parser, err.getvalue()
+
+    def commands(self, parser, *group):
+        action = parser._subparsers._group_actions[0]
+        for name in group:
+            action = action.choices[name]._subparsers._group_actions[0]
+        return sorted(action.choices)
+
+    def test_merges_packages_first_one_wins(self):
+        plugin = importlib.import_module(self.plugin_name)
+        parser, err = self.build([self.package, plugin])
+
+        self.assertEqual(self.commands(parser), ["deploy", "report", "user"])
+        self.assertEqual(self.commands(parser, "user"), ["add", "list"])
+        self.assertIn(f"Skipping {self.plugin_name}.report: command 'report'", err)
+        self.assertIn(f"conflicts with {self.pkg_name}.report", err)
+        # 'user add' is a command of the first package, not a group
+        self.assertIn(f"Skipping {self.plugin_name}.user__add__x", err)
+
+        args = parser.parse_args(["report", "--test-value", "x"])
+        self.assertEqual(args.func.__module__, f"{self.pkg_name}.report")
+
+    def test_lazy_merge(self):
+        plugin = importlib.import_module(self.plugin_name)
+        parser, _ = self.build([self.package, plugin], lazy=True)
+        args = parser.parse_args(["user", "list", "--test-value", "x"])
+        self.assertEqual(args.func.__module__, f"{self.plugin_name}.user.list")
+
+    def test_entry_point_group(self):
+        self.install("autocli_test_plugin", {"extra": self.plugin_name})
+        parser, _ = self.build(entry_points=self.group)
+        self.assertEqual(self.commands(parser), ["deploy", "report", "user"])
+
+    def test_broken_plugin_is_skipped(self):
+        self.install("autocli_test_broken", {"broken": f"{self.pkg_name}_missing"})
+        parser, err = self.build(entry_points=self.group)
+        self.assertEqual(self.commands(parser), ["report", "user"])
+        self.assertIn("Skipping command plugin 'broken'", err)
+
+    def test_resolution_is_cached_until_distributions_change(self):
+        self.install("autocli_test_plugin", {"extra": self.plugin_name})
+        cache_dir = _plugins.Path(self.cache_dir)
+        first = _plugins.resolve_entry_points(self.group, cache_dir)
+        self.assertEqual([ep["value"] for ep in first], [self.plugin_name])
+
+        with mock.patch.object(
+            _plugins, "find_entry_points", side_effect=AssertionError("rescanned")
+        ):
+            self.assertEqual(_plugins.resolve_entry_points(self.group, cache_dir), first)
+
+        self.install("autocli_test_other", {"other": f"{self.plugin_name}.user"})
+        # importlib.metadata itself caches directory listings by st_mtime
+        mtime = os.stat(self.root).st_mtime + 1
+        os.utime(self.root, (mtime, mtime))
+        second = _plugins.resolve_entry_points(self.group, cache_dir)
+        self.assertEqual([ep["name"] for ep in second], ["extra", "other"])
+
+
+if __name__ == "__main__":
+    unittest.main()
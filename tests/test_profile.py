@@ -0,0 +1,63 @@
+import io
+import json
+import os
+import unittest
+from contextlib import redirect_stderr
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from autocli import create_command_parser
+from command_packages import CommandPackageMixin
+
+
+class StartupProfileTest(CommandPackageMixin, unittest.TestCase):
+    FILES = ["report.py", "user/__init__.py", "user/add.py"]
+
+    def build(self, **kwargs):
+        """Builds a parser and returns it with the profile's exit callback."""
+        with mock.patch("autocli._profile.atexit.register") as register:
+            parser = create_command_parser(self.package, **kwargs)
+        if not register.called:
+            return parser, None
+        emit, target = register.call_args[0]
+        return parser, lambda: emit(target)
+
+    def test_disabled_by_default(self):
+        with mock.patch.dict(os.environ, {"AUTOCLI_PROFILE": ""}):
+            _, emit = self.build()
+        self.assertIsNone(emit)
+
+    def test_stderr_report_from_environment(self):
+        with mock.patch.dict(os.environ, {"AUTOCLI_PROFILE": "1"}):
+            parser, emit = self.build()
+        parser.parse_args(["report", "--test-value", "x"])
+
+        err = io.StringIO()
+        with redirect_stderr(err):
+            emit()
+        report = err.getvalue()
+        for phase in ("discover", "register", "parse_args"):
+            self.assertIn(phase, report)
+        self.assertIn(f"{self.pkg_name}.user.add", report)
+
+    def test_json_report_includes_lazy_loads(self):
+        with TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "profile.json")
+            parser, emit = self.build(lazy=True, profile=path)
+            parser.parse_args(["user", "add", "--test-value", "x"])
+            emit()
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+
+        self.assertEqual(
+            [p["phase"] for p in data["phases"]], ["discover", "register", "parse_args"]
+        )
+        (module,) = data["modules"]
+        self.assertEqual(module["module"], f"{self.pkg_name}.user.add")
+        self.assertGreater(module["import_ns"], 0)
+        self.assertGreater(module["setup_ns"], 0)
+        self.assertGreaterEqual(module["new_modules"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
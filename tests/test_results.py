@@ -0,0 +1,165 @@
+import io
+import os
+import sys
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+import autocli
+from autocli import create_command_parser, dispatch
+from command_packages import CommandPackageMixin
+
+CACHED_TEMPLATE = """\
+import sys
+import autocli
+
+CALLS = []
+
+
+def autocli_setup_parser(subparsers, command_name):
+    parser = subparsers.add_parser(command_name)
+    parser.add_argument("--month", default="jan")
+    parser.add_argument("--top", type=int, default=3)
+    parser.add_argument("--fail", action="store_true")
+    parser.set_defaults(func=run_command)
+
+
+@autocli.cached({options})
+def run_command(args):
+    CALLS.append(args.month)
+    if args.fail:
+        raise RuntimeError("no data")
+    print(f"report for {{args.month}} (top {{args.top}}), run {{len(CALLS)}}")
+    print("slow source", file=sys.stderr)
+"""
+
+HOST_TEMPLATE = """\
+import time
+import autocli
+
+
+def autocli_setup_parser(subparsers, command_name):
+    parser = subparsers.add_parser(command_name)
+    parser.add_argument("--host")
+    parser.set_defaults(func=run_command)
+
+
+@autocli.cached()
+def run_command(args):
+    for part in range(3):
+        print(f"{args.host} part {part}")
+        time.sleep(0.01)
+"""
+
+
+class CachedTest(CommandPackageMixin, unittest.TestCase):
+    FILES = ["report.py", "stats/expiring.py", "stats/small.py", "hosts.py"]
+    CONTENTS = {
+        "report.py": CACHED_TEMPLATE.format(options=""),
+        "stats/expiring.py": CACHED_TEMPLATE.format(options="ttl=0"),
+        "stats/small.py": CACHED_TEMPLATE.format(options="max_entries=2"),
+        "hosts.py": HOST_TEMPLATE,
+    }
+
+    def setUp(self):
+        super().setUp()
+        self._cache_tempdir = TemporaryDirectory()
+        self.addCleanup(self._cache_tempdir.cleanup)
+        self.cache_dir = self._cache_tempdir.name
+        environ = mock.patch.dict(os.environ, {"AUTOCLI_CACHE_DIR": self.cache_dir})
+        environ.start()
+        self.addCleanup(environ.stop)
+
+    def run_cli(self, *argv, **kwargs):
+        parser = create_command_parser(self.package, **kwargs)
+        out, err = io.StringIO(), io.StringIO()
+        with redirect_stdout(out), redirect_stderr(err):
+            code = dispatch(parser, list(argv))
+        return code, out.getvalue(), err.getvalue()
+
+    def calls(self, command):
+        return sys.modules[f"{self.pkg_name}.{command}"].CALLS
+
+    def stored(self, command):
+        directory = Path(self.cache_dir, "results", f"{self.pkg_name}.{command}.run_command")
+        return sorted(directory.glob("*.json")) if directory.exists() else []
+
+    def test_output_is_replayed(self):
+        first = self.run_cli("report", "--month", "feb", "--top", "5")
+        self.assertEqual(first, (0, "report for feb (top 5), run 1\n", "slow source\n"))
+        # Same arguments in another order: replayed without running
+        self.assertEqual(self.run_cli("report", "--top", "5", "--month", "feb"), first)
+        self.assertEqual(self.calls("report"), ["feb"])
+
+        code, out, _ = self.run_cli("report", "--month", "mar", "--top", "5", lazy=True)
+        self.assertEqual(out, "report for mar (top 5), run 2\n")
+        self.assertEqual(len(self.stored("report")), 2)
+
+    def test_no_cache_and_refresh(self):
+        self.run_cli("report")
+        _, out, _ = self.run_cli("report", "--no-cache")
+        self.assertEqual(out, "report for jan (top 3), run 2\n")
+        _, out, _ = self.run_cli("report", "--refresh")
+        self.assertEqual(out, "report for jan (top 3), run 3\n")
+        _, out, _ = self.run_cli("report")
+        self.assertEqual(out, "report for jan (top 3), run 3\n")
+        self.assertEqual(len(self.stored("report")), 1)
+
+        _, out, _ = self.run_cli("report", "-h")
+        self.assertIn("--no-cache", out)
+        self.assertIn("--refresh", out)
+
+    def test_failures_are_not_cached(self):
+        code, _, err = self.run_cli("report", "--fail")
+        self.assertEqual(code, 1)
+        self.assertIn("RuntimeError: no data", err)
+        self.run_cli("report", "--fail")
+        self.assertEqual(self.calls("report"), ["jan", "jan"])
+        self.assertEqual(self.stored("report"), [])
+
+    def test_ttl_and_lru_eviction(self):
+        self.run_cli("stats", "expiring")
+        self.run_cli("stats", "expiring")
+        self.assertEqual(len(self.calls("stats.expiring")), 2)
+
+        for month in ("jan", "feb", "jan", "mar"):
+            self.run_cli("stats", "small", "--month", month)
+            # File times are the LRU order; keep them apart on coarse filesystems
+            for path in self.stored("stats.small"):
+                stat = path.stat()
+                os.utime(path, (stat.st_atime - 1, stat.st_mtime - 1))
+        self.assertEqual(self.calls("stats.small"), ["jan", "feb", "mar"])
+        self.assertEqual(len(self.stored("stats.small")), 2)
+
+        # feb was the least recently used, so it is the one that has to run again
+        self.run_cli("stats", "small", "--month", "jan")
+        self.run_cli("stats", "small", "--month", "feb")
+        self.assertEqual(self.calls("stats.small"), ["jan", "feb", "mar", "feb"])
+
+    def test_fan_out_threads_capture_their_own_output(self):
+        from autocli.fanout import fan_out
+
+        hosts = [f"db{i}" for i in range(6)]
+        expected = "".join(f"{host} part {part}\n" for host in hosts for part in range(3))
+        stdout = sys.stdout
+        for _ in range(2):
+            parser = create_command_parser(self.package)
+            out = io.StringIO()
+            with redirect_stdout(out):
+                code = fan_out(parser, ["hosts", "--host", "{}"], hosts, workers=6)
+            self.assertEqual((code, out.getvalue()), (0, expected))
+            self.assertIs(sys.stdout, stdout)
+        self.assertEqual(len(self.stored("hosts")), len(hosts))
+
+    def test_coroutines_are_rejected(self):
+        async def run_command(args):
+            pass
+
+        with self.assertRaises(TypeError):
+            autocli.cached()(run_command)
+
+
+if __name__ == "__main__":
+    unittest.main()
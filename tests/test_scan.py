@@ -0,0 +1,133 @@
+import io
+import os
+import unittest
+from contextlib import redirect_stderr
+from tempfile import TemporaryDirectory
+
+from autocli import create_command_parser
+from autocli import CommandEntry
+from autocli._scan import scan_order, scan_package
+from command_packages import CommandPackageMixin
+
+
+def rglob_scan(pkg_dir, pkg_name):
+    """The original pathlib scanner, kept as the reference for parity."""
+    found_modules = []
+    for file_path in pkg_dir.rglob("*.py"):
+        relative_path = file_path.relative_to(pkg_dir)
+        if relative_path.name == "__init__.py":
+            continue
+        if relative_path.as_posix() == "_autocli_index.py":
+            continue
+        cmd_path_str = relative_path.with_suffix("").as_posix()
+        found_modules.append(
+            CommandEntry(
+                cmd_path_str.replace("/", "__").split("__"),
+                f"{pkg_name}.{cmd_path_str.replace('/', '.')}",
+                relative_path.as_posix(),
+            )
+        )
+    return found_modules
+
+
+class ScanPackageTest(CommandPackageMixin, unittest.TestCase):
+    FILES = [
+        "report.py",
+        "user__add.py",
+        "user/__init__.py",
+        "user/delete.py",
+        "admin__db/connect.py",
+        "admin__db/reset__all.py",
+        "admin/user/list.py",
+        "odd_/_name.py",
+        "tests/test_report.py",
+        "vendor/lib/helper.py",
+    ]
+
+    def setUp(self):
+        super().setUp()
+        (self.pkg_dir / "_autocli_index.py").write_text("INDEX = []\n")
+        (self.pkg_dir / "notes.txt").write_text("")
+
+    def scan(self, **kwargs):
+        return scan_package(self.pkg_dir, self.pkg_name, **kwargs)
+
+    def test_matches_rglob(self):
+        # rglob's own order differs between Python versions and filesystems
+        expected = sorted(
+            rglob_scan(self.pkg_dir, self.pkg_name), key=lambda m: scan_order(m.path)
+        )
+        self.assertEqual(self.scan(), expected)
+
+    def test_scan_order(self):
+        self.assertEqual(
+            [m.path for m in self.scan(ignore=["tests", "vendor", "odd_"])],
+            [
+                "report.py",
+                "user__add.py",
+                "admin/user/list.py",
+                "admin__db/connect.py",
+                "admin__db/reset__all.py",
+                "user/delete.py",
+            ],
+        )
+
+    def test_prunes_caches_and_hidden_directories(self):
+        for junk in ["__pycache__/report.py", ".git/hooks/x.py", "data.v2/x.py"]:
+            path = self.pkg_dir / junk
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("")
+
+        paths = [mod_info.path for mod_info in self.scan()]
+        self.assertIn("admin__db/reset__all.py", paths)
+        self.assertFalse([p for p in paths if "__pycache__" in p or "." in p[:-3]])
+
+    def test_ignore_patterns(self):
+        modules = self.scan(ignore=["tests", "vendor/*", "*__all.py"])
+        paths = sorted(mod_info.path for mod_info in modules)
+        self.assertEqual(
+            paths,
+            [
+                "admin/user/list.py",
+                "admin__db/connect.py",
+                "odd_/_name.py",
+                "report.py",
+                "user/delete.py",
+                "user__add.py",
+            ],
+        )
+
+    def test_records_directory_mtimes(self):
+        dirs = {}
+        self.scan(ignore=["tests"], dirs=dirs)
+        self.assertIn(".", dirs)
+        self.assertIn("admin/user", dirs)
+        self.assertNotIn("tests", dirs)
+        self.assertEqual(dirs["user"], os.stat(self.pkg_dir / "user").st_mtime_ns)
+
+
+class IgnoreDiscoveryTest(CommandPackageMixin, unittest.TestCase):
+    FILES = ["report.py", "tests/test_report.py"]
+
+    def commands(self, parser):
+        return sorted(parser._subparsers._group_actions[0].choices)
+
+    def test_ignored_modules_are_not_commands(self):
+        parser = create_command_parser(self.package, ignore=["tests"])
+        self.assertEqual(self.commands(parser), ["report"])
+
+    def test_manifest_is_keyed_by_ignore_patterns(self):
+        with TemporaryDirectory() as cache_dir:
+            err = io.StringIO()
+            with redirect_stderr(err):
+                parser = create_command_parser(self.package, cache_dir=cache_dir)
+            self.assertEqual(self.commands(parser), ["report", "tests"])
+
+            parser = create_command_parser(
+                self.package, cache_dir=cache_dir, ignore=["tests"]
+            )
+            self.assertEqual(self.commands(parser), ["report"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import io
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+from autocli import _static, create_command_parser
+from autocli.__main__ import main
+from command_packages import CommandPackageMixin
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+class AnalyzeSourceTest(unittest.TestCase):
+    def test_user_add_module(self):
+        result = _static.analyze_file(PROJECT_ROOT / "src" / "user__add.py")
+        self.assertTrue(result["valid"])
+        self.assertEqual(result["help"], "Adds a new user to the system.")
+        self.assertEqual(
+            [arg["flags"] for arg in result["arguments"]],
+            [["username"], ["-e", "--email"], ["--admin"]],
+        )
+        email = result["arguments"][1]["options"]
+        self.assertEqual(email["type"], "str")
+        self.assertTrue(email["required"])
+        self.assertEqual(result["arguments"][2]["options"]["action"], "store_true")
+
+    def test_command_name_fstring_becomes_template(self):
+        source = (
+            "def autocli_setup_parser(subparsers, name):\n"
+            "    subparsers.add_parser(name, help=f'The {name} command.')\n"
+            "from .impl import run_command\n"
+        )
+        result = _static.analyze_source(source)
+        self.assertTrue(result["valid"])
+        self.assertEqual(_static.format_help(result["help"], "report"), "The report command.")
+
+    def test_dynamic_values_are_not_guessed(self):
+        source = (
+            "HELP = 'x'\n"
+            "def autocli_setup_parser(subparsers, name):\n"
+            "    p = subparsers.add_parser(name, help=HELP)\n"
+            "    p.add_argument('--count', type=int, default=compute())\n"
+        )
+        result = _static.analyze_source(source)
+        self.assertFalse(result["valid"])
+        self.assertEqual(result["defines"], ["autocli_setup_parser"])
+        self.assertIsNone(result["help"])
+        self.assertEqual(result["arguments"][0]["options"], {"type": "int"})
+        self.assertEqual(result["arguments"][0]["dynamic"], ["default"])
+
+    def test_syntax_error(self):
+        result = _static.analyze_source("def broken(:\n")
+        self.assertFalse(result["valid"])
+        self.assertIn("SyntaxError", result["error"])
+
+
+class StaticPackageTest(CommandPackageMixin, unittest.TestCase):
+    FILES = ["report.py", "user/__init__.py", "user/add.py", "user__delete.py", "broken.py"]
+    CONTENTS = {"broken.py": "VALUE = 1\n"}
+
+    def test_process_pool_matches_serial(self):
+        paths = sorted(self.pkg_dir.rglob("*.py"))
+        self.assertEqual(
+            _static.analyze_files(paths, max_workers=2, parallel_threshold=0),
+            _static.analyze_files(paths),
+        )
+
+    def test_lazy_help_without_imports(self):
+        parser = create_command_parser(self.package, lazy=True, static=True)
+        root = parser._subparsers._group_actions[0]
+        help_text = parser.format_help() + root.resolve("user").format_help()
+        self.assertIn("The report command.", help_text)
+        self.assertIn("The delete command.", help_text)
+        self.assertEqual(self.imported(), [])
+
+    def test_check_command(self):
+        out, err = io.StringIO(), io.StringIO()
+        with redirect_stdout(out), redirect_stderr(err), self.assertRaises(SystemExit) as cm:
+            main(["check", self.pkg_name])
+        self.assertIn("1 command module(s) failed", str(cm.exception.code))
+        self.assertIn("broken.py: missing autocli_setup_parser, run_command", err.getvalue())
+        self.assertIn("user delete", out.getvalue())
+        self.assertEqual(self.imported(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
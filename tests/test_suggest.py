@@ -0,0 +1,100 @@
+import io
+import random
+import unittest
+from contextlib import redirect_stderr
+
+from autocli import create_command_parser
+from autocli._suggest import ChoiceIndex, edit_distance
+from command_packages import CommandPackageMixin
+
+
+class ChoiceIndexTest(unittest.TestCase):
+    def test_edit_distance(self):
+        self.assertEqual(edit_distance("user", "user"), 0)
+        self.assertEqual(edit_distance("usr", "user"), 1)
+        self.assertEqual(edit_distance("uesr", "user"), 2)
+        self.assertEqual(edit_distance("", "abc"), 3)
+
+    def test_bounded_edit_distance(self):
+        self.assertEqual(edit_distance("report", "user", limit=2), 3)
+        self.assertEqual(edit_distance("reprot", "report", limit=2), 2)
+
+    def test_suggestions_match_brute_force(self):
+        rng = random.Random(0)
+        words = {
+            "".join(rng.choice("abcde") for _ in range(rng.randint(1, 7)))
+            for _ in range(500)
+        }
+        index = ChoiceIndex(words)
+        for query in ["abc", "eddy", "a", "bcdeab", "aaaaaaa"]:
+            max_distance = min(3, (len(query) + 2) // 3)
+            expected = sorted(
+                (edit_distance(query, w), w)
+                for w in words
+                if edit_distance(query, w) <= max_distance
+            )
+            self.assertEqual(
+                index.suggest(query, limit=len(words)), [w for _, w in expected]
+            )
+
+    def test_prefix_and_suggestions(self):
+        index = ChoiceIndex(["user", "users", "update", "report", "admin"])
+        self.assertEqual(index.with_prefix("us"), ["user", "users"])
+        self.assertEqual(index.with_prefix("up"), ["update"])
+        self.assertEqual(index.with_prefix("u", limit=2), ["update", "user"])
+        self.assertEqual(index.with_prefix("x"), [])
+        self.assertEqual(index.suggest("reprot"), ["report"])
+        self.assertEqual(index.suggest("usr"), ["user"])
+        self.assertEqual(index.suggest("zzzzzz"), [])
+
+
+class AbbreviationTest(CommandPackageMixin, unittest.TestCase):
+    FILES = ["report.py", "user/add.py", "user/delete.py", "update.py"]
+
+    def parse_error(self, parser, argv):
+        err = io.StringIO()
+        with redirect_stderr(err), self.assertRaises(SystemExit):
+            parser.parse_args(argv)
+        return err.getvalue()
+
+    def test_unique_prefixes(self):
+        for lazy in (False, True):
+            parser = create_command_parser(self.package, lazy=lazy)
+            args = parser.parse_args(["us", "ad", "--test-value", "x"])
+            self.assertEqual((args.cmd, args.user), ("user", "add"))
+            args = parser.parse_args(["rep", "--test-value", "x"])
+            self.assertEqual(args.cmd, "report")
+
+    def test_errors_resolved_before_import(self):
+        self.unload_package(keep_root=True)
+        parser = create_command_parser(self.package, lazy=True)
+
+        self.assertIn(
+            "ambiguous choice: 'u' could match update, user",
+            self.parse_error(parser, ["u"]),
+        )
+        self.assertIn(
+            "invalid choice: 'reprot' (did you mean 'report'?)",
+            self.parse_error(parser, ["reprot"]),
+        )
+        self.assertIn(
+            "did you mean 'delete'?", self.parse_error(parser, ["user", "delte"])
+        )
+        self.assertEqual(self.imported(), [])
+
+    def test_abbreviations_can_be_disabled(self):
+        parser = create_command_parser(self.package, allow_abbrev=False)
+        self.assertIn("invalid choice: 'rep'", self.parse_error(parser, ["rep"]))
+        self.assertIn("invalid choice: 'ad'", self.parse_error(parser, ["user", "ad"]))
+
+    def test_large_group_is_not_listed(self):
+        for i in range(30):
+            self.write_command(f"job{i}.py")
+        parser = create_command_parser(self.package, lazy=True, prog="prog")
+        error = self.parse_error(parser, ["qqqqqqq"]).splitlines()[-1]
+        self.assertIn("see 'prog --help' for the 33 choices", error)
+        self.assertNotIn("job7", error)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,201 @@
+import io
+import os
+import sqlite3
+import subprocess
+import sys
+import unittest
+from contextlib import closing, redirect_stderr, redirect_stdout
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from autocli import create_command_parser, dispatch
+from autocli.telemetry import (
+    CommandHooks,
+    MetricsCollector,
+    MetricsStore,
+    OpenMetricsFile,
+    SQLiteMetrics,
+)
+from command_packages import CommandPackageMixin
+
+EXIT_TEMPLATE = """\
+import sys
+
+
+def autocli_setup_parser(subparsers, command_name):
+    parser = subparsers.add_parser(command_name)
+    parser.add_argument("--code", type=int, default=0)
+    parser.set_defaults(func=run_command)
+
+
+def run_command(args):
+    if args.code < 0:
+        raise RuntimeError("boom")
+    sys.exit(args.code)
+"""
+
+ASYNC_TEMPLATE = """\
+def autocli_setup_parser(subparsers, command_name):
+    subparsers.add_parser(command_name).set_defaults(func=run_command)
+
+
+async def run_command(args):
+    return None
+"""
+
+
+class Recorder(CommandHooks):
+    def __init__(self):
+        self.events = []
+
+    def before_command(self, call):
+        self.events.append(("before", call.command, call.exit_code))
+
+    def after_command(self, call):
+        self.assertions = (call.wall_seconds >= 0, call.cpu_seconds >= 0)
+        self.events.append(("after", call.command, call.exit_code))
+
+
+class Broken(CommandHooks):
+    def after_command(self, call):
+        raise ValueError("no space left")
+
+
+class TelemetryTest(CommandPackageMixin, unittest.TestCase):
+    FILES = ["user/add.py", "user/db__exit.py", "wait.py"]
+    CONTENTS = {"user/db__exit.py": EXIT_TEMPLATE, "wait.py": ASYNC_TEMPLATE}
+
+    def setUp(self):
+        super().setUp()
+        self._tempdir = TemporaryDirectory()
+        self.tempdir = self._tempdir.name
+
+    def tearDown(self):
+        self._tempdir.cleanup()
+        super().tearDown()
+
+    def run_commands(self, telemetry, *argvs, **kwargs):
+        parser = create_command_parser(self.package, telemetry=telemetry, **kwargs)
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()) as err:
+            codes = [dispatch(parser, argv) for argv in argvs]
+        return codes, err.getvalue()
+
+    def test_hooks_see_every_call(self):
+        for lazy in (False, True):
+            recorder = Recorder()
+            codes, _ = self.run_commands(
+                recorder,
+                ["user", "add", "--test-value", "x"],
+                ["user", "db", "exit", "--code", "3"],
+                ["user", "db", "exit", "--code", "-1"],
+                ["wait"],
+                ["user", "add"],  # never reaches run_command
+                lazy=lazy,
+            )
+            self.assertEqual(codes, [0, 3, 1, 0, 2])
+            self.assertEqual(
+                recorder.events,
+                [
+                    ("before", "user add", None),
+                    ("after", "user add", 0),
+                    ("before", "user db exit", None),
+                    ("after", "user db exit", 3),
+                    ("before", "user db exit", None),
+                    ("after", "user db exit", 1),
+                    ("before", "wait", None),
+                    ("after", "wait", 0),
+                ],
+            )
+            self.assertEqual(recorder.assertions, (True, True))
+
+    def test_failing_hook_does_not_fail_the_command(self):
+        codes, err = self.run_commands(
+            [Broken()], ["user", "add", "--test-value", "x"], ["wait"]
+        )
+        self.assertEqual(codes, [0, 0])
+        self.assertEqual(err.count("Warning: Telemetry hook Broken failed"), 1)
+
+    def test_openmetrics_file(self):
+        path = os.path.join(self.tempdir, "metrics", "autocli.prom")
+        add = ["user", "add", "--test-value", "x"]
+        self.run_commands(path, add, add, add, ["user", "db", "exit", "--code", "2"])
+        self.run_commands(path, add)
+
+        # The first call created the file, the others are still in the log
+        store = OpenMetricsFile(path)
+        self.assertEqual(store.load()["user add"]["count"], 1)
+        store.flush()
+        self.assertFalse(os.path.exists(store.log_path))
+
+        with open(path) as f:
+            text = f.read()
+        self.assertTrue(text.endswith("# EOF\n"))
+        p = "autocli_command"
+        self.assertIn(f'{p}_duration_seconds_count{{command="user add"}} 4\n', text)
+        self.assertIn(f'{p}_duration_seconds_bucket{{command="user add",le="+Inf"}} 4\n', text)
+        self.assertIn(f'{p}_runs_total{{command="user db exit",status="2"}} 1\n', text)
+        self.assertIn(f'{p}_peak_rss_bytes{{command="user add"}}', text)
+        self.assertEqual(store.render(store.load()), text)
+
+    def test_openmetrics_file_is_bounded(self):
+        path = os.path.join(self.tempdir, "autocli.prom")
+        store = OpenMetricsFile(path, max_commands=1, flush_bytes=0)
+        self.run_commands(
+            MetricsCollector(store),
+            ["user", "add", "--test-value", "x"],
+            ["user", "db", "exit"],
+            ["wait"],
+        )
+        self.assertEqual(sorted(store.load()), ["(other)", "user add"])
+        self.assertEqual(store.load()["(other)"]["count"], 2)
+
+    def test_sqlite(self):
+        path = os.path.join(self.tempdir, "autocli.db")
+        store = SQLiteMetrics(path, max_rows=2, max_commands=2)
+        self.run_commands(
+            MetricsCollector(store),
+            ["user", "add", "--test-value", "x"],
+            ["user", "db", "exit", "--code", "4"],
+            ["wait"],
+            ["user", "add", "--test-value", "y"],
+        )
+        with closing(sqlite3.connect(path)) as connection:
+            runs = connection.execute("SELECT command, exit_code FROM runs").fetchall()
+            histogram = connection.execute(
+                "SELECT command, SUM(count) FROM histogram GROUP BY command ORDER BY command"
+            ).fetchall()
+        self.assertEqual(runs, [("wait", 0), ("user add", 0)])
+        self.assertEqual(histogram, [("(other)", 1), ("user add", 2), ("user db exit", 1)])
+
+    def test_environment_variable(self):
+        path = os.path.join(self.tempdir, "from_env.sqlite")
+        with mock.patch.dict(os.environ, {"AUTOCLI_METRICS": path}):
+            self.run_commands(None, ["wait"])
+        with closing(sqlite3.connect(path)) as connection:
+            runs = connection.execute("SELECT command FROM runs").fetchall()
+        self.assertEqual(runs, [("wait",)])
+
+    def test_stores_implement_record(self):
+        class Incomplete(MetricsStore):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+    def test_not_imported_unless_configured(self):
+        script = (
+            "import sys, autocli\n"
+            f"parser = autocli.create_command_parser(__import__({self.pkg_name!r}))\n"
+            "autocli.dispatch(parser, ['user', 'add', '--test-value', 'x'])\n"
+            "print(sorted({'autocli.telemetry', 'inspect'} & set(sys.modules)))\n"
+        )
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        env.pop("AUTOCLI_METRICS", None)
+        result = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, env=env
+        )
+        self.assertEqual(result.stdout, "ran with value: x\n[]\n", result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import sys
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from autocli.testing import CliRunner
+
+APP_TEMPLATE = """\
+import os
+import sys
+
+
+def autocli_setup_parser(subparsers, command_name):
+    parser = subparsers.add_parser(command_name)
+    parser.add_argument("--code", type=int, default=0)
+    parser.set_defaults(func=run_command)
+
+
+def run_command(args):
+    print("{app}", os.environ.get("GREETING"), sys.stdin.read())
+    if args.code < 0:
+        raise RuntimeError("boom")
+    sys.exit(args.code)
+"""
+
+
+class CliRunnerTest(unittest.TestCase):
+    def setUp(self):
+        self._tempdir = TemporaryDirectory()
+        self.root = Path(self._tempdir.name)
+        # Two apps whose command packages are both called `commands`
+        for app in ("one", "two"):
+            commands = self.root / app / "commands"
+            commands.mkdir(parents=True)
+            (commands / "__init__.py").write_text("")
+            (commands / f"hello_{app}.py").write_text(APP_TEMPLATE.format(app=app))
+
+    def tearDown(self):
+        self._tempdir.cleanup()
+
+    def runner(self, app, **kwargs):
+        return CliRunner("commands", app_root=self.root / app, **kwargs)
+
+    def test_apps_sharing_a_package_name_are_isolated(self):
+        one, two = self.runner("one"), self.runner("two", lazy=True)
+        for _ in range(2):
+            self.assertEqual(one.invoke(["hello_one"]).stdout, "one None \n")
+            self.assertEqual(two.invoke(["hello_two"]).stdout, "two None \n")
+            self.assertEqual(one.invoke(["hello_two"]).exit_code, 2)
+            self.assertEqual(two.invoke(["hello_one"]).exit_code, 2)
+
+        self.assertNotIn("commands", sys.modules)
+        self.assertNotIn(str(self.root / "one"), sys.path)
+
+    def test_exit_codes_and_output(self):
+        cli = self.runner("one")
+        result = cli.invoke(["hello_one", "--code", "3"], input="data", env={"GREETING": "hi"})
+        self.assertEqual((result.exit_code, result.stdout), (3, "one hi data\n"))
+        self.assertNotIn("GREETING", os.environ)
+
+        result = cli.invoke(["hello_one", "--code", "-1"])
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("RuntimeError: boom", result.stderr)
+
+        result = cli.invoke(["hello_one", "--code", "x"])
+        self.assertEqual(result.exit_code, 2)
+        self.assertIn("invalid int value", result.stderr)
+
+    def test_parser_is_built_once(self):
+        calls = []
+
+        def factory(module, **kwargs):
+            from autocli import create_command_parser
+
+            calls.append(module.__name__)
+            return create_command_parser(module, **kwargs)
+
+        cli = self.runner("two", factory=factory)
+        cli.invoke(["hello_two"])
+        cli.invoke(["hello_two"])
+        self.assertEqual(calls, ["commands"])
+
+
+if __name__ == "__main__":
+    unittest.main()
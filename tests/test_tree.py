@@ -0,0 +1,117 @@
+import io
+import json
+import argparse
+import unittest
+from contextlib import redirect_stderr
+from unittest import mock
+
+from autocli import CommandEntry, CommandTree, create_command_parser
+from command_packages import CommandPackageMixin
+
+
+def entry(command):
+    parts = command.split()
+    return CommandEntry(parts, "pkg." + "__".join(parts), "__".join(parts) + ".py")
+
+
+class CommandTreeTest(unittest.TestCase):
+    def setUp(self):
+        self.tree = CommandTree(
+            entry(command)
+            for command in ["report", "user add", "user db connect", "user db reset"]
+        )
+
+    def test_nodes(self):
+        node = self.tree.find(["user", "db"])
+        self.assertTrue(node.is_group)
+        self.assertEqual(node.parts, ("user", "db"))
+        self.assertEqual(node.key, "user__db")
+        self.assertEqual(sorted(node.children), ["connect", "reset"])
+
+        leaf = node.child("connect")
+        self.assertFalse(leaf.is_group)
+        self.assertIsNone(leaf.children)
+        self.assertEqual(leaf.entries, (entry("user db connect"),))
+        self.assertIsNone(leaf.child("x"))
+        self.assertIsNone(self.tree.find(["user", "nope"]))
+
+    def test_lookup_by_argv_prefix(self):
+        node, consumed = self.tree.lookup(["user", "db", "reset", "--force", "db"])
+        self.assertEqual((node.key, consumed), ("user__db__reset", 3))
+        node, consumed = self.tree.lookup(["user", "remove"])
+        self.assertEqual((node.key, consumed), ("user", 1))
+        self.assertIs(self.tree.lookup([])[0], self.tree.root)
+
+    def test_iteration(self):
+        self.assertEqual(len(self.tree), 4)
+        self.assertEqual(
+            [m.name for m in self.tree], ["report", "add", "connect", "reset"]
+        )
+        self.assertEqual([g.key for g in self.tree.groups()], ["", "user", "user__db"])
+
+    def test_serialization_round_trip(self):
+        self.tree.find(["report"]).entries[0].help = "Reports."
+        data = json.loads(json.dumps(self.tree.to_dict()))
+        restored = CommandTree.from_dict(data)
+        self.assertEqual(list(restored), list(self.tree))
+        self.assertEqual(restored.find(["report"]).entries[0].help, "Reports.")
+
+        data["version"] = 0
+        with self.assertRaises(ValueError):
+            CommandTree.from_dict(data)
+
+    def test_slots(self):
+        with self.assertRaises(AttributeError):
+            self.tree.root.extra = 1
+        with self.assertRaises(AttributeError):
+            entry("report").extra = 1
+
+
+class TreeRegistrationTest(CommandPackageMixin, unittest.TestCase):
+    FILES = ["report.py", "user/add.py", "user/db__connect.py"]
+
+    def test_groups_register_in_discovery_order(self):
+        parser = create_command_parser(self.package)
+        root = parser._subparsers._group_actions[0]
+        self.assertEqual(list(root.choices), ["report", "user"])
+
+        user = root.choices["user"]._subparsers._group_actions[0]
+        self.assertEqual(user.dest, "user")
+        self.assertEqual(sorted(user.choices), ["add", "db"])
+        db = user.choices["db"]._subparsers._group_actions[0]
+        self.assertEqual(db.dest, "user__db")
+
+    def test_conflicting_module_is_reported(self):
+        self.write_command("report__daily.py")
+        self.write_command("user__add.py")
+        add_parser = argparse._SubParsersAction.add_parser
+
+        def replacing_add_parser(action, name, **kwargs):
+            # What add_parser() does before Python 3.11: no error, the
+            # earlier parser is silently replaced
+            action._name_parser_map.pop(name, None)
+            return add_parser(action, name, **kwargs)
+
+        for patched in (False, True):
+            err = io.StringIO()
+            with redirect_stderr(err), mock.patch.object(
+                argparse._SubParsersAction, "add_parser",
+                replacing_add_parser if patched else add_parser,
+            ):
+                parser = create_command_parser(self.package)
+            self.assertEqual(
+                err.getvalue().splitlines(),
+                [
+                    f"Error processing module {self.pkg_name}.report__daily: "
+                    "conflicting subparser: report",
+                    f"Error processing module {self.pkg_name}.user.add: "
+                    "conflicting subparser: add",
+                ],
+            )
+            args = parser.parse_args(["report", "--test-value", "x"])
+            self.assertEqual(args.test_value, "x")
+            self.unload_package(keep_root=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
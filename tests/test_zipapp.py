@@ -0,0 +1,166 @@
+import importlib
+import importlib.resources
+import io
+import json
+import os
+import subprocess
+import sys
+import unittest
+import zipapp
+import zipfile
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+import autocli
+from autocli import _index, _scan, create_command_parser
+from command_packages import CommandPackageMixin
+
+RUNNER = """\
+from autocli import create_command_parser
+import {pkg_name}
+
+
+def main():
+    parser = create_command_parser({pkg_name}, prog="app", lazy=True)
+    args = parser.parse_args()
+    args.func(args)
+"""
+
+
+class ZipImportTest(CommandPackageMixin, unittest.TestCase):
+    FILES = [
+        "report.py",
+        "user__add.py",
+        "admin/__init__.py",
+        "admin/db__connect.py",
+        "broken.py",
+        "tests/test_report.py",
+    ]
+    CONTENTS = {"broken.py": "VALUE = 1\n"}
+
+    def setUp(self):
+        super().setUp()
+        self.archive = Path(self._pkg_tempdir.name) / "commands.zip"
+
+    def tearDown(self):
+        if str(self.archive) in sys.path:
+            sys.path.remove(str(self.archive))
+        super().tearDown()
+
+    def import_from_zip(self):
+        """Moves the package into a zip archive and imports it from there."""
+        with zipfile.ZipFile(self.archive, "w") as zf:
+            for path in sorted(self.pkg_dir.rglob("*.py")):
+                zf.write(path, path.relative_to(self.pkg_dir.parent).as_posix())
+        self.unload_package()
+        os.rename(self.pkg_dir, self.pkg_dir.with_name("moved"))
+        sys.path.insert(0, str(self.archive))
+        importlib.invalidate_caches()
+        self.package = importlib.import_module(self.pkg_name)
+        self.assertIn("commands.zip", self.package.__file__)
+
+    def build(self, **kwargs):
+        err = io.StringIO()
+        with redirect_stderr(err):
+            parser = create_command_parser(self.package, **kwargs)
+        return parser, err.getvalue()
+
+    def commands(self, parser):
+        return sorted(parser._subparsers._group_actions[0].choices)
+
+    def test_discovers_and_imports_from_zip(self):
+        self.import_from_zip()
+        parser, err = self.build(ignore=["tests"])
+        self.assertEqual(self.commands(parser), ["admin", "report", "user"])
+        self.assertIn("broken skipped", err)
+
+        out = io.StringIO()
+        with redirect_stdout(out):
+            args = parser.parse_args(["admin", "db", "connect", "--test-value", "z"])
+            args.func(args)
+        self.assertEqual(out.getvalue(), "ran with value: z\n")
+
+    def test_same_modules_as_directory(self):
+        expected = autocli._discover_modules(self.package, None, True)[0]
+        self.import_from_zip()
+        found = autocli._discover_modules(self.package, None, True)[0]
+        by_path = {m.path: m for m in expected}
+        self.assertEqual({m.path: m for m in found}, by_path)
+
+    def test_resources_walk_matches_zip_listing(self):
+        self.write_command(".hidden/x.py")
+        self.write_command("__pycache__/y.py")
+        self.import_from_zip()
+        resources = importlib.resources.files(self.package)
+        prefix = f"{self.pkg_name}/"
+        for ignore in (None, ["tests", "*__connect.py"]):
+            walked = _scan.scan_resources(resources, self.pkg_name, ignore)
+            listed = _scan.scan_zip(str(self.archive), prefix, self.pkg_name, ignore)
+            # Both come in scan order, whatever order the archive stores
+            self.assertEqual(walked, listed)
+            self.assertNotIn(".hidden/x.py", [m.path for m in listed])
+
+    def test_lazy_static_help_without_imports(self):
+        self.import_from_zip()
+        parser, _ = self.build(lazy=True, static=True, ignore=["tests"])
+        self.assertIn("The report command.", parser.format_help())
+        self.assertEqual(self.imported(), [])
+
+    def test_static_help_without_importlib_resources(self):
+        self.import_from_zip()
+        # As on Python 3.8, where importlib.resources.files() does not exist
+        with mock.patch.object(autocli, "_get_package_resources", return_value=None):
+            parser, _ = self.build(lazy=True, static=True, ignore=["tests"])
+        self.assertIn("The report command.", parser.format_help())
+        self.assertEqual(self.imported(), [])
+
+    def test_check_and_doctor_read_the_archive(self):
+        from autocli.__main__ import main
+
+        self.import_from_zip()
+        out, err = io.StringIO(), io.StringIO()
+        with redirect_stdout(out), redirect_stderr(err), self.assertRaises(SystemExit) as cm:
+            main(["check", self.pkg_name, "--ignore", "tests"])
+        self.assertIn("1 command module(s) failed", str(cm.exception.code))
+        self.assertIn("broken.py: missing autocli_setup_parser, run_command", err.getvalue())
+        self.assertIn("admin db connect", out.getvalue())
+
+        out = io.StringIO()
+        with redirect_stdout(out):
+            main(["doctor", self.pkg_name, "--ignore", "tests", "--ignore", "broken.py", "--json"])
+        report = {entry["command"]: entry for entry in json.loads(out.getvalue())}
+        self.assertEqual(sorted(report), ["admin db connect", "report", "user add"])
+        self.assertIsNone(report["user add"]["error"])
+        self.assertEqual(self.imported(), [])
+
+    def test_index_inside_zip(self):
+        _index.build_index(self.package, ignore=["tests"])
+        self.import_from_zip()
+        with mock.patch.object(
+            _scan, "scan_zip", side_effect=AssertionError("scanned")
+        ):
+            parser, _ = self.build(lazy=True)
+        self.assertEqual(self.commands(parser), ["admin", "report", "user"])
+
+    def test_zipapp(self):
+        source = Path(self._pkg_tempdir.name)
+        (source / "run.py").write_text(RUNNER.format(pkg_name=self.pkg_name))
+        target = source.with_name(f"{source.name}.pyz")
+        self.addCleanup(target.unlink)
+        zipapp.create_archive(source, target, main="run:main")
+
+        src_dir = Path(autocli.__file__).parent.parent
+        result = subprocess.run(
+            [sys.executable, str(target), "user", "add", "--test-value", "zip"],
+            env=dict(os.environ, PYTHONPATH=str(src_dir)),
+            capture_output=True,
+            text=True,
+            cwd=str(source.parent),
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout, "ran with value: zip\n")
+
+
+if __name__ == "__main__":
+    unittest.main()